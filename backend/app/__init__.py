@@ -9,6 +9,8 @@ from app.api.v1.amenities import api as amenities_ns
 from app.api.v1.auth import api as auth_ns
 from app.api.v1.bookings import api as bookings_ns
 from app.api.v1.payments import api as payments_ns
+from app.commands import register_commands
+from app.services import facade, payment_gateway
 import os
 from dotenv import load_dotenv
 from flask_cors import CORS
@@ -46,6 +48,8 @@ def create_app(config_class="config.DevelopmentConfig"):
     jwt.init_app(app)
     bcrypt.init_app(app)
     limiter.init_app(app)
+    facade.init_app(app)
+    payment_gateway.init_app(app)
 
     # Configure CORS - Allow frontend origin from config
     frontend_url = app.config.get('FRONTEND_URL', '*')
@@ -82,6 +86,8 @@ def create_app(config_class="config.DevelopmentConfig"):
     api.add_namespace(bookings_ns, path='/api/v1/bookings')
     api.add_namespace(payments_ns, path='/api/v1/payments')
 
+    register_commands(app)
+
     @app.after_request
     def set_security_headers(response):
         response.headers.setdefault('X-Content-Type-Options', 'nosniff')
@@ -0,0 +1,23 @@
+"""
+Conditional GET helpers.
+
+ETags are derived from cheap change markers supplied by the facade
+(row counts and latest updated_at values), so a matching If-None-Match
+is answered with 304 before anything is loaded or serialized.
+"""
+import hashlib
+
+from flask import Response, request
+
+
+def make_etag(*parts):
+    """Return a strong, quoted ETag for the given change markers"""
+    digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+    return f'"{digest}"'
+
+
+def not_modified(etag):
+    """Return a 304 response if the client already holds `etag`, else None"""
+    if etag and request.if_none_match.contains(etag.strip('"')):
+        return Response(status=304, headers={'ETag': etag})
+    return None
@@ -0,0 +1,103 @@
+"""
+Idempotency-Key support for unsafe endpoints.
+
+A client that retries a POST with the same Idempotency-Key header gets
+the first attempt's response back instead of having the work (payment
+provider calls, availability checks, inserts) done again. Keys are scoped
+to the authenticated user and kept for IDEMPOTENCY_TTL_SECONDS.
+
+The first request claims the key by inserting a row, so a duplicate that
+arrives while it is still running finds the row without a response and
+waits for it (up to IDEMPOTENCY_WAIT_SECONDS) rather than racing it.
+The claim is only leased for IDEMPOTENCY_LEASE_SECONDS: if its worker
+dies mid-request, a retry after the lease takes the key over.
+Only responses below 500 are stored; after a server error or an
+exception the key is released and a retry runs the request afresh.
+"""
+import hashlib
+import json
+import time
+from datetime import datetime
+from functools import wraps
+
+from flask import Response, current_app, request
+from flask_jwt_extended import get_jwt_identity
+
+from app.services import facade
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+
+def _fingerprint():
+    digest = hashlib.sha256()
+    for part in (request.method, request.path, request.get_data()):
+        digest.update(part if isinstance(part, bytes) else part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _split(result):
+    """(status, encoded JSON body) of a resource method's return value"""
+    if isinstance(result, Response):
+        return result.status_code, result.get_data(as_text=True)
+    if isinstance(result, tuple):
+        data, status = result[0], result[1] if len(result) > 1 else 200
+    else:
+        data, status = result, 200
+    return status, json.dumps(data)
+
+
+def _replay(row):
+    return json.loads(row.response_body), row.response_status, {REPLAYED_HEADER: 'true'}
+
+
+def idempotent(method):
+    """
+    Decorate a resource method (below @jwt_required) to honour the
+    Idempotency-Key header; requests without it are not affected.
+    """
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return method(*args, **kwargs)
+        if len(key) > 255:
+            return {'error': f'{HEADER} must be at most 255 characters'}, 400
+
+        repo = facade.idempotency_repo
+        user_id = get_jwt_identity()
+        fingerprint = _fingerprint()
+        config = current_app.config
+        lease = config.get('IDEMPOTENCY_LEASE_SECONDS', 300)
+        if not repo.claim(user_id, key, fingerprint, lease):
+            deadline = time.monotonic() + config.get('IDEMPOTENCY_WAIT_SECONDS', 10)
+            while True:
+                row = repo.get(user_id, key)
+                if row is None or row.expires_at <= datetime.utcnow():
+                    # The first attempt released the key or died holding it: run it ourselves
+                    if repo.claim(user_id, key, fingerprint, lease):
+                        break
+                    continue
+                if row.fingerprint != fingerprint:
+                    return {'error': f'{HEADER} was already used for a different request'}, 422
+                if row.response_status is not None:
+                    return _replay(row)
+                if time.monotonic() >= deadline:
+                    return {'error': f'A request with this {HEADER} is still in progress'}, 409
+                time.sleep(config.get('IDEMPOTENCY_POLL_SECONDS', 0.05))
+
+        try:
+            result = method(*args, **kwargs)
+        except Exception:
+            repo.release(user_id, key)
+            raise
+        status, body = _split(result)
+        if status >= 500:
+            repo.release(user_id, key)
+        else:
+            repo.complete(user_id, key, status, body,
+                          config.get('IDEMPOTENCY_TTL_SECONDS', 86400))
+        return result
+
+    return wrapper
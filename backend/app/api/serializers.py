@@ -0,0 +1,47 @@
+"""
+Single-pass serialization for large list responses.
+
+flask-restx's marshal() walks every record field by field through Raw
+field objects, and its JSON representation pretty-prints in debug mode.
+For hot list endpoints we instead build each record once with a
+serializer compiled up front for the model (one attrgetter call for all
+scalar columns, plain list comprehensions for nested collections) and
+encode the result with a compact json.dumps. The restx models are still
+used for the Swagger documentation of these endpoints.
+"""
+import json
+from operator import attrgetter
+
+from flask import Response
+
+
+def compile_serializer(columns, nested=None):
+    """
+    Build a function turning an object into a dict of `columns` plus each
+    nested collection in `nested` ({key: (attribute, child_serializer)}).
+    """
+    names = tuple(columns)
+    nested = tuple((nested or {}).items())
+    if len(names) == 1:
+        single = attrgetter(names[0])
+        get = lambda obj: (single(obj),)  # noqa: E731 - attrgetter returns a bare value for one name
+    else:
+        get = attrgetter(*names)
+
+    def serialize(obj):
+        data = dict(zip(names, get(obj)))
+        for key, (attribute, child) in nested:
+            data[key] = [child(item) for item in getattr(obj, attribute)]
+        return data
+
+    return serialize
+
+
+def dumps(data):
+    """Compact JSON encoding; the output is never nested in another document"""
+    return json.dumps(data, separators=(',', ':'), check_circular=False)
+
+
+def json_response(body, status=200, headers=None):
+    """Wrap an encoded JSON body (see dumps) in a response"""
+    return Response(body, status=status, headers=headers, mimetype='application/json')
@@ -1,6 +1,7 @@
-from flask_restx import Namespace, Resource, fields
+from flask_restx import Namespace, Resource, fields, marshal
 from flask import request
 from app.services import facade
+from app.api.etag import make_etag, not_modified
 from flask_jwt_extended import jwt_required
 
 
@@ -21,10 +22,14 @@ amenity_brief_model = api.model('AmenityBrief', {
 
 @api.route('/')
 class AmenityList(Resource):
-    @api.marshal_list_with(amenity_model)
+    @api.response(200, 'List of amenities', [amenity_model])
     def get(self):
         """Fetch all amenities"""
-        return facade.get_all_amenities()
+        etag = make_etag('amenities', facade.get_amenities_version())
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        return marshal(facade.get_all_amenities(), amenity_model), 200, {'ETag': etag}
 
     @jwt_required()
     @api.expect(amenity_model, validate=True)
@@ -52,13 +57,19 @@ class AmenityList(Resource):
 
 @api.route('/<string:amenity_id>')
 class AmenityResource(Resource):
-    @api.marshal_with(amenity_model)
+    @api.response(200, 'Amenity details', amenity_model)
+    @api.response(404, 'Amenity not found')
     def get(self, amenity_id):
         """Fetch an amenity by ID"""
+        version = facade.get_amenities_version(amenity_id)
+        etag = make_etag('amenity', amenity_id, version) if version[0] else None
+        cached = not_modified(etag)
+        if cached:
+            return cached
         amenity = facade.get_amenity(amenity_id)
         if not amenity:
             return {"error": "Amenity not found"}, 404
-        return amenity
+        return marshal(amenity, amenity_model), 200, {'ETag': etag}
 
     @jwt_required()
     @api.expect(amenity_model)
@@ -1,15 +1,15 @@
 from flask_restx import Namespace, Resource, fields
 from flask import request
-from app.services import facade
+from app.services import facade, payment_gateway
+from app.services.payment_gateway import PaymentUnavailable
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.extensions import db
 from app.models.user import User
+from app.models.booking import CANCELLABLE_STATUSES, cancellation_deadline
+from app.api.idempotency import idempotent
+from app.api.serializers import dumps, json_response
 import stripe
-import os
-from datetime import datetime, date
-
-# Initialize Stripe
-stripe.api_key = os.getenv('STRIPE_SECRET_KEY')
+from datetime import datetime
 
 api = Namespace('bookings', description='Booking operations')
 
@@ -56,43 +56,103 @@ def _parse_dates(check_in_str: str, check_out_str: str):
     return check_in, check_out
 
 
-def _calculate_amount_cents(price_per_night: float, check_in: date, check_out: date) -> int:
-    nights = (check_out - check_in).days
-    if nights <= 0:
-        raise ValueError("Booking must be at least 1 night")
-    return int(round(price_per_night * nights * 100))
+def serialize_booking_rows(rows, now=None):
+    """
+    Serialize (id, place_id, guest_id, check_in_date, check_out_date,
+    total_price, status, created_at, updated_at) tuples in one pass.
+
+    Every row is judged against the same `now`, and each check-in date's
+    cancellation deadline is computed once however many stays share it.
+    """
+    now = now or datetime.utcnow()
+    deadlines = {}
+    result = []
+    for (booking_id, place_id, guest_id, check_in, check_out,
+         total_price, status, created_at, updated_at) in rows:
+        can_cancel, deadline = False, None
+        if status in CANCELLABLE_STATUSES:
+            if check_in not in deadlines:
+                moment = cancellation_deadline(check_in)
+                deadlines[check_in] = (now < moment, moment.isoformat())
+            can_cancel, deadline = deadlines[check_in]
+        result.append({
+            'id': booking_id,
+            'place_id': place_id,
+            'guest_id': guest_id,
+            'check_in_date': check_in.isoformat(),
+            'check_out_date': check_out.isoformat(),
+            'total_price': total_price,
+            'status': status,
+            'can_cancel': can_cancel,
+            'cancellation_deadline': deadline,
+            'created_at': created_at.isoformat(),
+            'updated_at': updated_at.isoformat()
+        })
+    return result
 
 
 def serialize_booking(booking):
     """Serialize booking object"""
-    return {
-        'id': booking.id,
-        'place_id': booking.place_id,
-        'guest_id': booking.guest_id,
-        'check_in_date': booking.check_in_date.isoformat(),
-        'check_out_date': booking.check_out_date.isoformat(),
-        'total_price': booking.total_price,
-        'status': booking.status,
-        'can_cancel': booking.can_cancel(),
-        'cancellation_deadline': booking.get_cancellation_deadline().isoformat() if booking.status in ['pending', 'confirmed'] else None,
-        'created_at': booking.created_at.isoformat(),
-        'updated_at': booking.updated_at.isoformat()
-    }
+    return serialize_booking_rows([(
+        booking.id, booking.place_id, booking.guest_id, booking.check_in_date,
+        booking.check_out_date, booking.total_price, booking.status,
+        booking.created_at, booking.updated_at
+    )])[0]
+
+
+def _payment_mismatch(paid, user_id, booking_data):
+    """
+    Why a paid-for booking request differs from what was paid for (the
+    intent metadata or the booking already made from it), else None
+    """
+    if not paid:
+        return 'Payment intent metadata missing'
+    if paid.get('user_id') and paid.get('user_id') != str(user_id):
+        return 'Payment intent does not belong to this user'
+    if paid.get('place_id') and paid.get('place_id') != str(booking_data['place_id']):
+        return 'Payment intent does not match the selected place'
+    if paid.get('check_in_date') and paid.get('check_in_date') != booking_data['check_in_date']:
+        return 'Payment intent check-in date mismatch'
+    if paid.get('check_out_date') and paid.get('check_out_date') != booking_data['check_out_date']:
+        return 'Payment intent check-out date mismatch'
+    return None
+
+
+def _booking_list_response(result):
+    """Encode a list of booking rows, or a keyset Page of them with its cursors"""
+    if isinstance(result, list):
+        body = serialize_booking_rows(result)
+    else:
+        body = {
+            'items': serialize_booking_rows(result.items),
+            'next_cursor': result.next_cursor,
+            'prev_cursor': result.prev_cursor,
+            'limit': result.limit
+        }
+    return json_response(dumps(body))
 
 
 @api.route('/')
 class BookingList(Resource):
     @api.doc(
-        description='Create a new booking after successful payment verification',
+        description='Return the booking paid for by payment_intent_id. It is '
+                    'normally created by the payment webhook; if that has not '
+                    'arrived yet the payment is verified with Stripe and the '
+                    'booking created here.',
         responses={
+            200: ('Booking already created for this payment', booking_model),
             201: ('Booking created successfully', booking_model),
             400: ('Invalid input, payment not completed, or place not available', error_model),
             401: ('Authentication required', error_model),
-            404: ('Place not found', error_model)
+            404: ('Place not found', error_model),
+            503: ('Payment provider unavailable', error_model)
         },
         security='Bearer Auth'
     )
+    @api.doc(params={'Idempotency-Key': {
+        'in': 'header', 'description': 'Retries with the same key replay the first response'}})
     @jwt_required()
+    @idempotent
     @api.expect(booking_create_model, validate=True)
     def post(self):
         """Create a new booking with payment verification"""
@@ -104,57 +164,45 @@ class BookingList(Resource):
         if not payment_intent_id:
             return {'error': 'Payment intent ID is required'}, 400
 
+        # The payment webhook usually booked the stay already: one indexed read
+        booking = facade.get_booking_by_payment_intent(payment_intent_id)
+        if booking:
+            error = _payment_mismatch({
+                'user_id': booking.guest_id,
+                'place_id': booking.place_id,
+                'check_in_date': booking.check_in_date.isoformat(),
+                'check_out_date': booking.check_out_date.isoformat()
+            }, user_id, booking_data)
+            if error:
+                return {'error': error}, 400
+            return serialize_booking(booking), 200
+
         try:
-            # Verify payment with Stripe
-            payment_intent = stripe.PaymentIntent.retrieve(payment_intent_id)
+            # The webhook has not landed yet: verify payment with Stripe
+            payment_intent = payment_gateway.retrieve_intent(payment_intent_id)
 
             if payment_intent.status != 'succeeded':
                 return {'error': f'Payment not completed. Status: {payment_intent.status}'}, 400
 
-            # Verify payment amount matches booking (optional but recommended)
-            # This prevents users from paying $1 for a $1000 booking
-            place = facade.get_place(booking_data['place_id'])
-            if not place:
+            error = _payment_mismatch(payment_intent.metadata or {}, user_id, booking_data)
+            if error:
+                return {'error': error}, 400
+
+            if not facade.get_place(booking_data['place_id']):
                 return {'error': 'Place not found'}, 404
+            _parse_dates(booking_data['check_in_date'], booking_data['check_out_date'])
 
-            try:
-                check_in, check_out = _parse_dates(booking_data['check_in_date'], booking_data['check_out_date'])
-                expected_amount_cents = _calculate_amount_cents(place.price, check_in, check_out)
-            except ValueError as e:
-                return {'error': str(e)}, 400
-
-            metadata = payment_intent.metadata or {}
-            if not metadata:
-                return {'error': 'Payment intent metadata missing'}, 400
-            # Enforce metadata consistency with the booking request
-            if metadata.get('user_id') and metadata.get('user_id') != str(user_id):
-                return {'error': 'Payment intent does not belong to this user'}, 400
-            if metadata.get('place_id') and metadata.get('place_id') != str(booking_data['place_id']):
-                return {'error': 'Payment intent does not match the selected place'}, 400
-            if metadata.get('check_in_date') and metadata.get('check_in_date') != booking_data['check_in_date']:
-                return {'error': 'Payment intent check-in date mismatch'}, 400
-            if metadata.get('check_out_date') and metadata.get('check_out_date') != booking_data['check_out_date']:
-                return {'error': 'Payment intent check-out date mismatch'}, 400
-
-            if payment_intent.amount != expected_amount_cents:
-                return {'error': 'Payment amount does not match booking total'}, 400
-            if metadata.get('expected_amount_cents'):
-                try:
-                    if int(metadata['expected_amount_cents']) != expected_amount_cents:
-                        return {'error': 'Payment metadata amount mismatch'}, 400
-                except (ValueError, TypeError):
-                    return {'error': 'Payment metadata amount invalid'}, 400
-
-            # Add guest_id from JWT
-            booking_data['guest_id'] = user_id
-
-            # Create booking
-            new_booking = facade.create_booking(booking_data)
-
-            return serialize_booking(new_booking), 201
+            # Books from the intent metadata and checks the amount paid
+            # against the stay's price, exactly as the webhook does
+            booking, created = facade.book_paid_intent(payment_intent)
+            return serialize_booking(booking), 201 if created else 200
 
         except ValueError as e:
             return {'error': str(e)}, 400
+        except PaymentUnavailable as e:
+            return {'error': str(e)}, 503
+        except stripe.StripeError as e:
+            return {'error': str(e)}, 400
         except Exception as e:
             return {'error': f'An error occurred: {str(e)}'}, 500
 
@@ -162,10 +210,14 @@ class BookingList(Resource):
         description='Get all bookings for the authenticated user',
         params={
             'status': 'Filter by booking status (pending, confirmed, completed, cancelled)',
-            'type': 'Filter by time (upcoming, past)'
+            'type': 'Filter by time (upcoming, past)',
+            'limit': 'Page size (capped by the server)',
+            'cursor': 'Opaque next_cursor / prev_cursor from a previous page'
         },
         responses={
-            200: ('List of bookings', [booking_model]),
+            200: ('List of bookings, or a page envelope when limit or cursor is passed',
+                  [booking_model]),
+            400: ('Invalid limit or cursor', error_model),
             401: ('Authentication required', error_model),
             500: ('Server error', error_model)
         },
@@ -177,18 +229,15 @@ class BookingList(Resource):
         user_id = get_jwt_identity()
 
         # Get query parameters
-        status = request.args.get('status')
-        booking_type = request.args.get('type')  # 'upcoming' or 'past'
+        args = request.args
+        booking_type = args.get('type')  # 'upcoming' or 'past'
 
         try:
-            if booking_type == 'upcoming':
-                bookings = facade.get_upcoming_bookings(user_id)
-            elif booking_type == 'past':
-                bookings = facade.get_past_bookings(user_id)
-            else:
-                bookings = facade.get_user_bookings(user_id, status)
-
-            return [serialize_booking(b) for b in bookings], 200
+            result = facade.list_user_bookings(
+                user_id, args.get('status'), booking_type, args.get('limit'), args.get('cursor'))
+            return _booking_list_response(result)
+        except ValueError as e:
+            return {'error': str(e)}, 400
         except Exception as e:
             return {'error': str(e)}, 500
 
@@ -266,7 +315,13 @@ class BookingConfirm(Resource):
 @api.route('/places/<string:place_id>')
 class PlaceBookings(Resource):
     @jwt_required()
+    @api.doc(params={
+        'status': 'Filter by booking status',
+        'limit': 'Page size (capped by the server); switches to a page envelope',
+        'cursor': 'Opaque next_cursor / prev_cursor from a previous page'
+    })
     @api.response(200, 'List of bookings for place')
+    @api.response(400, 'Invalid limit or cursor')
     @api.response(404, 'Place not found')
     def get(self, place_id):
         """Get all bookings for a place (owner only)"""
@@ -280,10 +335,13 @@ class PlaceBookings(Resource):
         if place.owner_id != user_id:
             return {'error': 'Unauthorized - only place owner can view bookings'}, 403
 
-        status = request.args.get('status')
-        bookings = facade.get_place_bookings(place_id, status)
-
-        return [serialize_booking(b) for b in bookings], 200
+        args = request.args
+        try:
+            result = facade.list_place_bookings(
+                place_id, args.get('status'), args.get('limit'), args.get('cursor'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return _booking_list_response(result)
 
 
 @api.route('/availability/check')
@@ -1,17 +1,15 @@
 from flask_restx import Namespace, Resource, fields
-from flask import request
+from flask import current_app, request
 import stripe
-import os
 from datetime import datetime, date
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.services import facade
+from app.services import facade, payment_gateway
+from app.services.payment_gateway import TERMINAL_STATUSES, PaymentUnavailable
 from app.extensions import limiter
+from app.api.idempotency import idempotent
 
 api = Namespace('payments', description='Payment operations')
 
-# Initialize Stripe
-stripe.api_key = os.getenv('STRIPE_SECRET_KEY')
-
 # Payment intent model
 payment_intent_model = api.model('PaymentIntent', {
     'place_id': fields.String(required=True, description='Place ID'),
@@ -46,7 +44,10 @@ def _calculate_amount_cents(price_per_night: float, check_in: date, check_out: d
 class CreatePaymentIntent(Resource):
     @api.expect(payment_intent_model)
     @api.marshal_with(payment_intent_response)
+    @api.doc(params={'Idempotency-Key': {
+        'in': 'header', 'description': 'Retries with the same key replay the first response'}})
     @jwt_required()
+    @idempotent
     @limiter.limit("10 per minute")
     def post(self):
         """Create a Stripe payment intent for a booking"""
@@ -71,40 +72,48 @@ class CreatePaymentIntent(Resource):
 
         try:
             check_in, check_out = _parse_dates(check_in_str, check_out_str)
-            # Basic availability check before taking payment
-            if not facade.check_place_availability(place_id, check_in, check_out):
-                return {'error': 'Place is not available for selected dates'}, 400
-
             amount_cents = _calculate_amount_cents(place.price, check_in, check_out)
+            # Reserve the dates while the guest pays, so a slow payer
+            # cannot lose them to someone else after paying
+            hold = facade.create_booking_hold(place_id, user_id, check_in, check_out)
         except ValueError as e:
             return {'error': str(e)}, 400
+        hold_id = hold.id
 
         try:
             # Create payment intent
-            payment_intent = stripe.PaymentIntent.create(
-                amount=amount_cents,
-                currency=currency,
-                metadata={
+            # Keyed by the hold, so a retried request cannot create a second intent
+            payment_intent = payment_gateway.create_intent({
+                'amount': amount_cents,
+                'currency': currency,
+                'metadata': {
                     'user_id': user_id,
                     'user_email': user.email,
                     'place_id': place_id,
                     'check_in_date': check_in_str,
                     'check_out_date': check_out_str,
                     'expected_amount_cents': str(amount_cents),
+                    'hold_id': hold_id,
                 },
-                automatic_payment_methods={
+                'automatic_payment_methods': {
                     'enabled': True,
                 },
-            )
+            }, idempotency_key=f"hold-{hold_id}")
+            facade.attach_hold_payment(hold_id, payment_intent.id)
 
             return {
                 'client_secret': payment_intent.client_secret,
                 'payment_intent_id': payment_intent.id
             }, 200
 
-        except stripe.error.StripeError as e:
+        except PaymentUnavailable as e:
+            facade.release_booking_hold(hold_id)
+            return {'error': str(e)}, 503
+        except stripe.StripeError as e:
+            facade.release_booking_hold(hold_id)
             return {'error': str(e)}, 400
         except Exception as e:
+            facade.release_booking_hold(hold_id)
             return {'error': 'Payment processing failed'}, 500
 
 
@@ -114,7 +123,7 @@ class VerifyPayment(Resource):
     def get(self, payment_intent_id):
         """Verify a payment intent status"""
         try:
-            payment_intent = stripe.PaymentIntent.retrieve(payment_intent_id)
+            payment_intent = payment_gateway.retrieve_intent(payment_intent_id)
 
             return {
                 'id': payment_intent.id,
@@ -124,7 +133,42 @@ class VerifyPayment(Resource):
                 'metadata': payment_intent.metadata
             }, 200
 
-        except stripe.error.StripeError as e:
+        except PaymentUnavailable as e:
+            return {'error': str(e)}, 503
+        except stripe.StripeError as e:
             return {'error': str(e)}, 400
         except Exception as e:
             return {'error': 'Payment verification failed'}, 500
+
+
+@api.route('/webhook')
+class PaymentWebhook(Resource):
+    @limiter.exempt
+    @api.doc(
+        description='Stripe webhook. Verifies the Stripe-Signature header against '
+                    'STRIPE_WEBHOOK_SECRET, then books payment_intent.succeeded '
+                    'events from the intent metadata. Each event id is applied '
+                    'at most once, so redeliveries are acknowledged and skipped.'
+    )
+    @api.response(200, 'Event received')
+    @api.response(400, 'Invalid payload or signature')
+    @api.response(503, 'Webhook secret not configured')
+    def post(self):
+        """Receive a Stripe event"""
+        secret = current_app.config.get('STRIPE_WEBHOOK_SECRET')
+        if not secret:
+            return {'error': 'Webhook not configured'}, 503
+        try:
+            event = stripe.Webhook.construct_event(
+                request.get_data(), request.headers.get('Stripe-Signature', ''), secret)
+        except ValueError:
+            return {'error': 'Invalid payload'}, 400
+        except stripe.SignatureVerificationError:
+            return {'error': 'Invalid signature'}, 400
+
+        intent = event.data.object
+        if event.type.startswith('payment_intent.') and intent.status in TERMINAL_STATUSES:
+            # Final state, signed by Stripe: later verifications need not ask again
+            intent = payment_gateway.remember(intent)
+        outcome = facade.process_payment_event(event.id, event.type, intent)
+        return {'received': True, 'outcome': outcome}, 200
@@ -1,6 +1,11 @@
+import json
+from functools import lru_cache
 from flask_restx import Namespace, Resource, fields
-from flask import request
+from flask import Response, current_app, request, stream_with_context
 from app.services import facade
+from app.api.etag import make_etag, not_modified
+from app.api.serializers import compile_serializer, dumps, json_response
+from app.utils.export import EXPORT_FORMATS, iter_csv, iter_ndjson
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 api = Namespace('places', description='Place operations')
@@ -42,10 +47,54 @@ place_model = api.model('Place', {
     'latitude': fields.Float(required=True, description='Latitude coordinate', example=34.0522),
     'longitude': fields.Float(required=True, description='Longitude coordinate', example=-118.2437),
     'owner_id': fields.String(description='ID of the property owner', example='550e8400-e29b-41d4-a716-446655440001'),
+    'review_count': fields.Integer(description='Number of reviews', example=12),
+    'avg_rating': fields.Float(description='Average review rating, null when unreviewed', example=4.6),
     'amenities': fields.List(fields.Nested(amenity_model), description='List of amenities'),
     'reviews': fields.List(fields.Nested(review_model), description='List of reviews')
 })
 
+place_page_model = api.model('PlacePage', {
+    'items': fields.List(fields.Nested(place_model), description='Places on this page'),
+    'next_cursor': fields.String(description='Opaque cursor for the following page, null on the last page'),
+    'prev_cursor': fields.String(description='Opaque cursor for the preceding page, null on the first page'),
+    'limit': fields.Integer(description='Page size that was applied', example=20)
+})
+
+place_search_model = api.inherit('PlaceSearchResult', place_model, {
+    'distance_km': fields.Float(description='Distance from the near= point or the origin place', example=1.8),
+    'score': fields.Float(description='Relevance to q (text searches only)', example=3.12)
+})
+
+place_search_page_model = api.inherit('PlaceSearchPage', place_page_model, {
+    'items': fields.List(fields.Nested(place_search_model), description='Places on this page, best match first')
+})
+
+import_result_model = api.model('PlaceImportResult', {
+    'index': fields.Integer(description='Position of the row in the request', example=0),
+    'status': fields.String(description="'created' or 'error'", example='created'),
+    'id': fields.String(description='ID of the created place'),
+    'error': fields.String(description='Why the row was rejected')
+})
+
+import_report_model = api.model('PlaceImportReport', {
+    'created': fields.Integer(description='Rows created', example=498),
+    'failed': fields.Integer(description='Rows rejected', example=2),
+    'results': fields.List(fields.Nested(import_result_model))
+})
+
+blocked_range_model = api.model('BlockedRange', {
+    'start': fields.String(description='First blocked night (YYYY-MM-DD)', example='2025-12-20'),
+    'end': fields.String(description='Day the block ends, exclusive (YYYY-MM-DD)', example='2025-12-25')
+})
+
+calendar_model = api.model('PlaceCalendar', {
+    'place_id': fields.String(description='Place ID'),
+    'from': fields.String(description='Window start (YYYY-MM-DD)', example='2025-12-01'),
+    'to': fields.String(description='Window end, exclusive (YYYY-MM-DD)', example='2026-03-01'),
+    'blocked': fields.List(fields.Nested(blocked_range_model),
+                           description='Merged ranges held by pending or confirmed bookings')
+})
+
 error_model = api.model('Error', {
     'error': fields.String(description='Error message', example='Place not found')
 })
@@ -62,33 +111,149 @@ def serialize_create_place(place):
         "owner_id": str(place.owner.id) if place.owner else None
     }
 
-def serialize_place(place):
-    return {
-        "id": place.id,
-        "title": place.title,
-        "description": place.description,
-        "price": place.price,
-        "latitude": place.latitude,
-        "longitude": place.longitude,
-        "owner_id": str(place.owner.id) if place.owner else None,
-        "amenities": [serialize_amenity(a) for a in place.amenities],
-        "reviews": [serialize_review(r) for r in place.reviews]
-    }
+serialize_amenity = compile_serializer(('id', 'name'))
+serialize_review = compile_serializer(('id', 'text', 'rating', 'user_id'))
 
-def serialize_amenity(amenity):
-    return {
-        "id": amenity.id,
-        "name": amenity.name
-    }
+# Keys of place_model, in output order
+PLACE_COLUMNS = ('id', 'title', 'description', 'price', 'latitude', 'longitude',
+                 'owner_id', 'review_count', 'avg_rating')
+PLACE_RELATIONS = {
+    'amenities': ('amenities', serialize_amenity),
+    'reviews': ('reviews', serialize_review),
+}
+
+
+@lru_cache(maxsize=64)
+def _place_serializer(fields):
+    """Compile (once per fieldset) a serializer emitting exactly `fields`"""
+    fields = PLACE_COLUMNS + tuple(PLACE_RELATIONS) if fields is None else fields
+    return compile_serializer(
+        [f for f in fields if f not in PLACE_RELATIONS],
+        {f: PLACE_RELATIONS[f] for f in fields if f in PLACE_RELATIONS})
+
+
+def serialize_place(place, fields=None):
+    """Serialize a place in the shape of place_model, or just `fields` of it"""
+    return _place_serializer(fields)(place)
+
+def _requested_fields(args):
+    """Read ?fields=a,b or ?view=summary into a facade field tuple"""
+    fields = [f for f in args.get('fields', '').split(',') if f]
+    return facade.resolve_place_fields(fields, args.get('view'))
+
+def _parse_floats(raw, count, name):
+    """Parse a comma separated query parameter into `count` floats"""
+    try:
+        values = [float(v) for v in raw.split(',')]
+    except ValueError:
+        raise ValueError(f"{name} must be {count} comma separated numbers")
+    if len(values) != count:
+        raise ValueError(f"{name} must be {count} comma separated numbers")
+    return values
+
+PAGINATION_ARGS = ('limit', 'cursor', 'min_price', 'max_price',
+                   'amenities', 'check_in', 'check_out')
+
+
+def _search_filters(args):
+    """Translate list query parameters into facade.search_places kwargs"""
+    filters = {'limit': args.get('limit'), 'cursor': args.get('cursor')}
+    for name in ('min_price', 'max_price'):
+        if args.get(name):
+            filters[name] = _parse_floats(args[name], 1, name)[0]
+    if args.get('amenities'):
+        filters['amenity_ids'] = [a for a in args['amenities'].split(',') if a]
+    if args.get('check_in') or args.get('check_out'):
+        filters['check_in'] = args.get('check_in') or None
+        filters['check_out'] = args.get('check_out') or None
+    return filters
 
-def serialize_review(review):
+def _args_key(args):
+    """Hashable, order-insensitive cache key for a query string"""
+    return tuple(sorted(args.items(multi=True)))
+
+def _list_places(args):
+    """Build the GET /places/ payload; raises ValueError on bad parameters"""
+    fields = _requested_fields(args)
+    serialize = _place_serializer(fields)
+    if not any(arg in args for arg in PAGINATION_ARGS):
+        return [serialize(place) for place in facade.get_all_places(fields)]
+
+    page = facade.search_places(fields=fields, **_search_filters(args))
+    return _page_body(page, [serialize(place) for place in page.items])
+
+def _available_places(args):
+    """Build the GET /places/available payload; raises ValueError on bad parameters"""
+    fields = _requested_fields(args)
+    serialize = _place_serializer(fields)
+    page = facade.search_available_places(fields=fields, **_search_filters(args))
+    return _page_body(page, [serialize(place) for place in page.items])
+
+def _page_body(page, items):
+    """Cursor page envelope around already serialized items"""
     return {
-        "id": review.id,
-        "text": review.text,
-        "rating": review.rating,
-        "user_id": review.user_id
+        'items': items,
+        'next_cursor': page.next_cursor,
+        'prev_cursor': page.prev_cursor,
+        'limit': page.limit
     }
 
+def _search_places(args):
+    """Build the GET /places/search payload; raises ValueError on bad parameters"""
+    fields = _requested_fields(args)
+    serialize = _place_serializer(fields)
+    limit = args.get('limit')
+    if 'q' in args:
+        page = facade.search_places_text(args['q'], limit, args.get('cursor'), fields)
+        items = []
+        for place, score in page.items:
+            data = serialize(place)
+            data['score'] = round(score, 4)
+            items.append(data)
+        return _page_body(page, items)
+    if 'bbox' in args:
+        min_lon, min_lat, max_lon, max_lat = _parse_floats(args['bbox'], 4, 'bbox')
+        places = facade.search_places_in_bbox(
+            min_lat, min_lon, max_lat, max_lon, limit, fields)
+        return [serialize(place) for place in places]
+    if 'near' in args:
+        lat, lon = _parse_floats(args['near'], 2, 'near')
+        radius_km = _parse_floats(args.get('radius_km', ''), 1, 'radius_km')[0]
+        results = []
+        for place, distance in facade.search_places_near(lat, lon, radius_km, limit, fields):
+            data = serialize(place)
+            data['distance_km'] = round(distance, 3)
+            results.append(data)
+        return results
+    raise ValueError('Provide q, bbox, or near and radius_km')
+
+NDJSON_TYPES = ('application/x-ndjson', 'application/jsonl')
+
+
+def _import_rows(body, mimetype):
+    """
+    Decode a bulk import body: a JSON array, or one JSON object per line
+    for NDJSON. An undecodable NDJSON line becomes a ValueError row so it
+    is reported without failing the whole request.
+    """
+    if mimetype in NDJSON_TYPES:
+        rows = []
+        for number, line in enumerate(body.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                rows.append(ValueError(f"Invalid JSON on line {number}"))
+        return rows
+    try:
+        rows = json.loads(body)
+    except ValueError:
+        raise ValueError("Body must be a JSON array or NDJSON")
+    if not isinstance(rows, list):
+        raise ValueError("Body must be a JSON array")
+    return rows
+
 @api.route('/')
 class PlaceList(Resource):
     @api.doc(
@@ -125,15 +290,207 @@ class PlaceList(Resource):
             return {'error': str(e)}, 400
 
     @api.doc(
-        description='Retrieve all property listings with amenities and reviews',
+        description='Retrieve property listings with amenities and reviews. '
+                    'Passing limit, cursor or any filter switches to cursor '
+                    'pagination and returns a PlacePage envelope instead of a '
+                    'bare list. All filters are applied in a single query.',
+        params={
+            'limit': 'Page size (capped by the server)',
+            'cursor': 'Opaque next_cursor / prev_cursor from a previous page',
+            'min_price': 'Minimum price per night',
+            'max_price': 'Maximum price per night',
+            'amenities': 'Comma separated amenity IDs that must all be present',
+            'check_in': 'Only places free from this date (YYYY-MM-DD, with check_out)',
+            'check_out': 'Only places free until this date (YYYY-MM-DD, with check_in)',
+            'fields': 'Comma separated place fields to return (e.g. id,title,price)',
+            'view': "'summary' for id, title, price and coordinates only; 'full' (default)"
+        },
         responses={
-            200: ('List of places', [place_model])
+            200: ('List of places, or a PlacePage when paginating', [place_model]),
+            400: ('Invalid filter, limit or cursor', error_model)
         }
     )
-    @api.marshal_list_with(place_model)
     def get(self):
         """Get all property listings"""
-        return [serialize_place(place) for place in facade.get_all_places()]
+        args = request.args
+        by_dates = 'check_in' in args or 'check_out' in args
+        version = facade.get_places_version(by_dates)
+        etag = make_etag('places', version, _args_key(args))
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        try:
+            # Availability filters depend on bookings, which do not
+            # invalidate the place cache, so those lists are always fresh
+            if by_dates:
+                body = dumps(_list_places(args))
+            else:
+                body = facade.cached_place_read(
+                    ('places', 'list', _args_key(args)), version, lambda: dumps(_list_places(args)))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return json_response(body, 200, {'ETag': etag})
+
+
+@api.route('/available')
+class PlaceAvailable(Resource):
+    @api.doc(
+        description='Places with no pending or confirmed booking overlapping '
+                    '[check_in, check_out), in one anti-join query, cursor '
+                    'paginated. Accepts the same filters as the place list.',
+        params={
+            'check_in': 'Arrival date, YYYY-MM-DD (required)',
+            'check_out': 'Departure date, YYYY-MM-DD (required)',
+            'limit': 'Page size (capped by the server)',
+            'cursor': 'Opaque next_cursor / prev_cursor from a previous page',
+            'min_price': 'Minimum price per night',
+            'max_price': 'Maximum price per night',
+            'amenities': 'Comma separated amenity IDs that must all be present',
+            'fields': 'Comma separated place fields to return (e.g. id,title,price)',
+            'view': "'summary' for id, title, price and coordinates only; 'full' (default)"
+        },
+        responses={
+            200: ('One page of free places', place_page_model),
+            400: ('Missing or invalid dates, filter, limit or cursor', error_model)
+        }
+    )
+    def get(self):
+        """Find places free for a date range"""
+        args = request.args
+        etag = make_etag('places-available', facade.get_places_version(True), _args_key(args))
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        try:
+            # Not cached: bookings do not invalidate the place cache
+            body = dumps(_available_places(args))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return json_response(body, 200, {'ETag': etag})
+
+
+@api.route('/bulk')
+class PlaceBulkImport(Resource):
+    @api.doc(
+        description='Create many listings in one request from a JSON array of '
+                    'place inputs, or NDJSON (Content-Type: application/x-ndjson). '
+                    'Rows are validated and inserted in chunks; each row gets a '
+                    'result in the report. Admins may import for another owner.',
+        params={'owner_id': 'Owner of the imported places (admin only, defaults to you)'},
+        responses={
+            200: ('Per-row import report', import_report_model),
+            400: ('Malformed body or too many rows', error_model),
+            401: ('Authentication required', error_model),
+            403: ('Not allowed to import for another owner', error_model),
+            404: ('User not found', error_model)
+        },
+        security='Bearer Auth'
+    )
+    @jwt_required()
+    def post(self):
+        """Import property listings in bulk"""
+        user = facade.get_user(get_jwt_identity())
+        if not user:
+            return {'error': 'User not found'}, 404
+        owner_id = request.args.get('owner_id', user.id)
+        if owner_id != user.id and not getattr(user, 'is_admin', False):
+            return {'error': 'Admin privileges required'}, 403
+        try:
+            rows = _import_rows(request.get_data(as_text=True), request.mimetype)
+            max_rows = current_app.config.get('PLACE_IMPORT_MAX_ROWS', 5000)
+            if len(rows) > max_rows:
+                raise ValueError(f"At most {max_rows} rows per request")
+            results = facade.import_places(rows, owner_id)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        created = sum(1 for result in results if result['status'] == 'created')
+        return {'created': created, 'failed': len(results) - created, 'results': results}, 200
+
+
+@api.route('/search')
+class PlaceSearch(Resource):
+    @api.doc(
+        description='Find places by text or on the map. Use q for a relevance '
+                    'ranked, cursor paginated search of titles and descriptions, '
+                    'bbox for a viewport, or near plus radius_km for a distance '
+                    'search (nearest first).',
+        params={
+            'q': 'Words to search for in titles and descriptions',
+            'cursor': 'Opaque next_cursor / prev_cursor from a previous q page',
+            'bbox': 'min_lon,min_lat,max_lon,max_lat (min_lon > max_lon crosses the antimeridian)',
+            'near': 'lat,lon centre point for a radius search',
+            'radius_km': 'Search radius in kilometres (with near)',
+            'limit': 'Maximum number of places to return (capped by the server)',
+            'fields': 'Comma separated place fields to return (e.g. id,title,price)',
+            'view': "'summary' for id, title, price and coordinates only; 'full' (default)"
+        },
+        responses={
+            200: ('A PlaceSearchPage for q; a bare list of PlaceSearchResult for bbox and near',
+                  place_search_page_model),
+            400: ('Invalid search parameters', error_model)
+        }
+    )
+    def get(self):
+        """Search places by text, bounding box or radius"""
+        args = request.args
+        version = facade.get_places_version()
+        etag = make_etag('places-search', version, _args_key(args))
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        try:
+            body = facade.cached_place_read(
+                ('places', 'search', _args_key(args)), version, lambda: dumps(_search_places(args)))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return json_response(body, 200, {'ETag': etag})
+
+
+@api.route('/export')
+class PlaceExport(Resource):
+    @api.doc(
+        description='Stream the full place catalogue (admin only). Rows are '
+                    'written as they are read, so the response starts at once '
+                    'and worker memory stays flat.',
+        params={'format': "'ndjson' (default) or 'csv'"},
+        responses={
+            200: 'NDJSON or CSV stream of places with amenity_ids',
+            400: ('Unknown format', error_model),
+            403: ('Admin privileges required', error_model)
+        },
+        security='Bearer Auth'
+    )
+    @jwt_required()
+    def get(self):
+        """Export every place as NDJSON or CSV"""
+        user = facade.get_user(get_jwt_identity())
+        if not user or not getattr(user, 'is_admin', False):
+            return {"error": "Admin privileges required"}, 403
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return {"error": "format must be 'ndjson' or 'csv'"}, 400
+
+        rows = facade.export_places()
+        if export_format == 'csv':
+            chunks = iter_csv(rows, facade.place_repo.EXPORT_FIELDS)
+        else:
+            chunks = iter_ndjson(rows)
+        return Response(
+            stream_with_context(chunks), mimetype=EXPORT_FORMATS[export_format],
+            headers={'Content-Disposition': f'attachment; filename=places.{export_format}'})
+
+
+@api.route('/cache-stats')
+class PlaceCacheStats(Resource):
+    @api.doc(description='Place read cache counters for this worker (admin only)',
+             security='Bearer Auth')
+    @jwt_required()
+    def get(self):
+        """Get place cache hit/miss/eviction counters"""
+        user = facade.get_user(get_jwt_identity())
+        if not user or not getattr(user, 'is_admin', False):
+            return {"error": "Admin privileges required"}, 403
+        return facade.place_cache.stats(), 200
 
 
 @api.route('/<string:place_id>')
@@ -146,14 +503,22 @@ class PlaceResource(Resource):
             404: ('Place not found', error_model)
         }
     )
-    @api.marshal_with(place_model)
     def get(self, place_id):
         """Get property details by ID"""
-        places = facade.get_place_with_details(place_id)
-        if not places:
+        version = facade.get_place_version(place_id)
+        etag = make_etag('place', place_id, version) if version else None
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+        def load():
+            place = facade.get_place_with_details(place_id)
+            return dumps(serialize_place(place)) if place else None
+
+        body = facade.cached_place_read(('place', place_id), version, load)
+        if body is None:
             return {"error": "Place not found"}, 404
-        # Fetch the place by ID
-        return serialize_place(places)
+        return json_response(body, 200, {'ETag': etag})
 
     @api.doc(
         description='Update property details (owner only)',
@@ -169,7 +534,6 @@ class PlaceResource(Resource):
     )
     @jwt_required()
     @api.expect(place_input_model)
-    @api.marshal_with(place_model)
     def put(self, place_id):
         """Update property listing (owner only)"""
         place = facade.get_place(place_id)
@@ -181,11 +545,15 @@ class PlaceResource(Resource):
         user = facade.get_user(user_id)
         if not user:
             return {"error": "User not found"}, 404
+        if place.owner_id != user.id and not getattr(user, 'is_admin', False):
+            return {"error": "Only the owner or admin can update this place."}, 403
         try:
-            updated_place = place.update_by_owner_or_admin(user, **data)
-            return serialize_place(updated_place)
-        except PermissionError as e:
-            return {"error": str(e)}, 403
+            # Goes through the facade so the change is committed and cached
+            # copies of this place are invalidated
+            updated_place = facade.update_place(place_id, data)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return serialize_place(updated_place), 200
 
     @jwt_required()
     def delete(self, place_id):
@@ -203,6 +571,82 @@ class PlaceResource(Resource):
         return {"message": "Place deleted successfully"}, 200
 
 
+@api.route('/<string:place_id>/nearby')
+class PlaceNearby(Resource):
+    @api.doc(
+        description='Other stays nearest to a place, closest first',
+        params={
+            'place_id': 'The unique identifier of the place',
+            'k': 'Number of places to return (capped by the server)',
+            'fields': 'Comma separated place fields to return (e.g. id,title,price)',
+            'view': "'summary' for id, title, price and coordinates only; 'full' (default)"
+        },
+        responses={
+            200: ('Nearest places with distance_km', [place_search_model]),
+            400: ('Invalid k or fields', error_model),
+            404: ('Place not found', error_model)
+        }
+    )
+    def get(self, place_id):
+        """Get the k places nearest to a place"""
+        args = request.args
+        version = facade.get_places_version()
+        etag = make_etag('places-nearby', place_id, version, _args_key(args))
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+        def load():
+            fields = _requested_fields(args)
+            serialize = _place_serializer(fields)
+            nearby = facade.get_nearby_places(place_id, args.get('k'), fields, marker=version[0])
+            if nearby is None:
+                return None
+            results = []
+            for place, distance in nearby:
+                data = serialize(place)
+                data['distance_km'] = round(distance, 3)
+                results.append(data)
+            return dumps(results)
+
+        try:
+            body = facade.cached_place_read(
+                ('places', 'nearby', place_id, _args_key(args)), version, load)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        if body is None:
+            return {'error': 'Place not found'}, 404
+        return json_response(body, 200, {'ETag': etag})
+
+
+@api.route('/<string:place_id>/calendar')
+class PlaceCalendar(Resource):
+    @api.doc(
+        description='Blocked dates of a place for a datepicker: merged ranges '
+                    'held by pending or confirmed bookings within [from, to)',
+        params={
+            'place_id': 'The unique identifier of the place',
+            'from': 'Window start, YYYY-MM-DD (default today)',
+            'to': 'Window end, exclusive, YYYY-MM-DD (default 90 days after from)'
+        },
+        responses={
+            200: ('Blocked ranges', calendar_model),
+            400: ('Invalid dates', error_model),
+            404: ('Place not found', error_model)
+        }
+    )
+    def get(self, place_id):
+        """Get the blocked booking dates of a place"""
+        try:
+            calendar = facade.get_place_calendar(
+                place_id, request.args.get('from'), request.args.get('to'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        if calendar is None:
+            return {'error': 'Place not found'}, 404
+        return calendar, 200
+
+
 @api.route('/<string:place_id>/amenities/<string:amenity_id>')
 class PlaceAmenityResource(Resource):
     @jwt_required()
@@ -251,6 +695,10 @@ class PlaceReviewList(Resource):
     @api.response(200, 'Reviews for place retrieved successfully')
     def get(self, place_id):
         """Retrieve reviews for a specific place"""
+        etag = make_etag('place-reviews', place_id, facade.get_reviewers_version(place_id))
+        cached = not_modified(etag)
+        if cached:
+            return cached
         reviews = facade.get_reviews_for_place(place_id)
         review_list = []
         for review in reviews:
@@ -262,4 +710,4 @@ class PlaceReviewList(Resource):
                 'user_name': f"{review.user.first_name} {review.user.last_name}" if review.user else "Anonymous",
                 'place_id': review.place_id
             })
-        return review_list, 200
+        return review_list, 200, {'ETag': etag}
@@ -1,6 +1,7 @@
 from flask_restx import Namespace, Resource, fields
 from flask import request
 from app.services import facade
+from app.api.etag import make_etag, not_modified
 from app.models.review import Review
 from app.models.user import User
 from app.extensions import db
@@ -48,6 +49,10 @@ class ReviewList(Resource):
     @api.response(200, 'List of reviews retrieved successfully')
     def get(self):
         """Retrieve a list of all reviews"""
+        etag = make_etag('reviews', facade.get_reviews_version())
+        cached = not_modified(etag)
+        if cached:
+            return cached
         reviews = facade.get_all_reviews()
         review_list = []
         for review in reviews:
@@ -58,7 +63,7 @@ class ReviewList(Resource):
                 'user_id': review.user_id,
                 'place_id': review.place_id
             })
-        return review_list, 200
+        return review_list, 200, {'ETag': etag}
 
 
 @api.route('/<review_id>')
@@ -67,6 +72,11 @@ class ReviewResource(Resource):
     @api.response(404, 'Review not found')
     def get(self, review_id):
         """Get review details by ID"""
+        version = facade.get_reviews_version(review_id=review_id)
+        etag = make_etag('review', review_id, version) if version[0] else None
+        cached = not_modified(etag)
+        if cached:
+            return cached
         review = facade.get_review(review_id)
         if not review:
             return {'error': 'Review not found'}, 404
@@ -76,7 +86,7 @@ class ReviewResource(Resource):
             'rating': review.rating,
             'user_id': review.user_id,
             'place_id': review.place_id
-            }, 200
+            }, 200, {'ETag': etag}
 
     @jwt_required()
     @api.expect(review_model)
@@ -132,6 +142,10 @@ class PlaceReviewList(Resource):
     @api.response(404, 'Place not found')
     def get(self, place_id):
         """Get all reviews for a specific place"""
+        etag = make_etag('reviews-by-place', place_id, facade.get_reviews_version(place_id=place_id))
+        cached = not_modified(etag)
+        if cached:
+            return cached
         reviews = facade.get_reviews_by_place(place_id)
         place = facade.place_exists(place_id)
         # if reviews is None or len(reviews) == 0:
@@ -143,7 +157,7 @@ class PlaceReviewList(Resource):
                 'place_id': place_id,
                 'total_reviews': 0,
                 'reviews': []
-            },200
+            }, 200, {'ETag': etag}
 
         # Format and return reviews
 
@@ -159,4 +173,4 @@ class PlaceReviewList(Resource):
         'place_id': place_id,
         'total_reviews': len(review_list),
         'reviews': review_list
-    }, 200
+    }, 200, {'ETag': etag}
@@ -1,3 +1,6 @@
+from datetime import datetime
+
+from flask import request
 from flask_restx import Namespace, Resource, fields
 from app.services import facade
 from flask_jwt_extended import jwt_required, get_jwt_identity
@@ -19,6 +22,36 @@ user_update_model = api.model('UserUpdate', {
     'home_location': fields.String(required=False, description='Home base or location')
 })
 
+month_stats_fields = {
+    'bookings': fields.Integer(description='Stays checking in (per month) or in total'),
+    'nights_booked': fields.Integer(description='Booked nights, split across months'),
+    'occupancy_rate': fields.Float(description='Booked nights / available nights'),
+    'revenue': fields.Float(description='Revenue of non-cancelled stays')
+}
+
+host_month_model = api.model('HostStatsMonth', dict(
+    month=fields.String(description='YYYY-MM'), **month_stats_fields))
+
+host_place_stats_model = api.model('HostPlaceStats', dict(
+    place_id=fields.String(), title=fields.String(),
+    months=fields.List(fields.Nested(host_month_model)), **month_stats_fields))
+
+host_stats_model = api.model('HostStats', {
+    'from': fields.String(description='First month (YYYY-MM)'),
+    'to': fields.String(description='Last month (YYYY-MM)'),
+    'totals': fields.Nested(api.model('HostStatsTotals', month_stats_fields)),
+    'places': fields.List(fields.Nested(host_place_stats_model))
+})
+
+def _parse_month(value, name):
+    """First day of a YYYY-MM query parameter, None if absent"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m').date()
+    except ValueError:
+        raise ValueError(f"{name} must be a month (YYYY-MM)")
+
 def serialize_user(user):
     return {
         'id': user.id,
@@ -128,3 +161,29 @@ class CurrentUser(Resource):
         if not user:
             return {'error': 'User not found'}, 404
         return serialize_user(user), 200
+
+
+@api.route('/me/host-stats')
+class HostStats(Resource):
+    @jwt_required()
+    @api.doc(
+        description='Monthly nights booked, occupancy and revenue for each of '
+                    'the current user\'s places, read from an incrementally '
+                    'maintained rollup. Cancelled bookings are not counted.',
+        params={
+            'from': 'First month (YYYY-MM); default: a year before to',
+            'to': 'Last month (YYYY-MM); default: the current month'
+        },
+        security='Bearer Auth'
+    )
+    @api.response(200, 'Host statistics', host_stats_model)
+    @api.response(400, 'Invalid month range')
+    def get(self):
+        """Return booking analytics for the places the current user hosts"""
+        user_id = get_jwt_identity()
+        try:
+            start = _parse_month(request.args.get('from'), 'from')
+            end = _parse_month(request.args.get('to'), 'to')
+            return facade.get_host_stats(user_id, start, end), 200
+        except ValueError as e:
+            return {'error': str(e)}, 400
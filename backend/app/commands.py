@@ -0,0 +1,163 @@
+"""
+Maintenance commands registered on the Flask CLI.
+
+Usage:
+    flask --app run places backfill-grid-cells
+    flask --app run places rebuild-ratings
+    flask --app run places reindex-text
+    flask --app run places export --format csv --output places.csv
+    flask --app run bookings sweep-holds
+    flask --app run bookings maintain [--every 300]
+    flask --app run bookings rebuild-stats
+    flask --app run bookings reconcile --from 2025-01-01 --to 2025-02-01 --output report.ndjson
+"""
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import AppGroup
+
+from app.services import facade, payment_gateway
+from app.services.payment_gateway import LIST_PAGE_SIZE
+from app.services.reconciliation import REPORT_FIELDS, reconcile_payments
+from app.utils.export import EXPORT_FORMATS, iter_csv, iter_ndjson
+
+
+places_cli = AppGroup('places', help='Place maintenance commands.')
+bookings_cli = AppGroup('bookings', help='Booking maintenance commands.')
+
+
+@places_cli.command('backfill-grid-cells')
+@click.option('--batch-size', default=1000, show_default=True,
+              help='Rows updated per commit.')
+def backfill_grid_cells(batch_size):
+    """Compute the spatial grid cell for places that are missing one."""
+    updated = facade.place_repo.backfill_grid_cells(batch_size)
+    click.echo(f"Updated grid cells for {updated} place(s).")
+
+
+@places_cli.command('rebuild-ratings')
+def rebuild_ratings():
+    """Recompute review_count, rating_sum and avg_rating for every place."""
+    updated = facade.place_repo.rebuild_rating_aggregates()
+    click.echo(f"Rebuilt rating aggregates for {updated} place(s).")
+
+
+@places_cli.command('reindex-text')
+@click.option('--batch-size', default=500, show_default=True,
+              help='Places indexed per commit.')
+def reindex_text(batch_size):
+    """Rebuild the full-text index over place titles and descriptions."""
+    indexed = facade.place_repo.rebuild_text_index(batch_size)
+    facade.invalidate_place()
+    click.echo(f"Indexed {indexed} place(s).")
+
+
+@places_cli.command('export')
+@click.option('--format', 'export_format', type=click.Choice(sorted(EXPORT_FORMATS)),
+              default='ndjson', show_default=True)
+@click.option('--output', type=click.File('w', encoding='utf-8'), default='-',
+              help='File to write (default: stdout).')
+@click.option('--batch-size', type=int, default=None,
+              help='Rows fetched per round trip (default: PLACE_EXPORT_BATCH_SIZE).')
+def export(export_format, output, batch_size):
+    """Stream every place to NDJSON or CSV."""
+    rows = facade.export_places(batch_size)
+    if export_format == 'csv':
+        chunks = iter_csv(rows, facade.place_repo.EXPORT_FIELDS)
+    else:
+        chunks = iter_ndjson(rows)
+    for chunk in chunks:
+        output.write(chunk)
+
+
+@bookings_cli.command('sweep-holds')
+@click.option('--batch-size', default=1000, show_default=True,
+              help='Holds deleted per commit.')
+def sweep_holds(batch_size):
+    """Delete expired booking holds. Safe to run from several hosts."""
+    purged = facade.sweep_expired_holds(batch_size)
+    click.echo(f"Purged {purged} expired hold(s).")
+
+
+@bookings_cli.command('maintain')
+@click.option('--batch-size', default=1000, show_default=True,
+              help='Rows changed per UPDATE and commit.')
+@click.option('--every', type=int, default=None,
+              help='Repeat every N seconds instead of running once.')
+def maintain(batch_size, every):
+    """Complete finished bookings, report stale pending ones, purge expired holds.
+
+    Pending bookings are paid, so stale ones are only counted: confirm or
+    refund them by hand. Every step is idempotent, so overlapping runs
+    from several workers or hosts are safe.
+    """
+    while True:
+        report = facade.run_booking_maintenance(batch_size)
+        click.echo(
+            f"completed {report['completed']} ({report['completed_seconds']:.3f}s), "
+            f"{report['stale_pending']} stale pending ({report['stale_seconds']:.3f}s), "
+            f"purged {report['holds_purged']} hold(s) ({report['holds_seconds']:.3f}s), "
+            f"{report['keys_purged']} idempotency key(s) ({report['keys_seconds']:.3f}s)")
+        if report['stale_pending']:
+            click.echo(f"{report['stale_pending']} stale pending booking(s) are paid; "
+                       "confirm or refund them.")
+        if not every:
+            return
+        time.sleep(every)
+
+
+@bookings_cli.command('rebuild-stats')
+@click.option('--batch-size', default=1000, show_default=True,
+              help='Bookings fetched and rollup rows inserted per round trip.')
+def rebuild_stats(batch_size):
+    """Recompute the monthly host statistics rollup from all bookings."""
+    written = facade.stats_repo.rebuild(batch_size)
+    click.echo(f"Rebuilt {written} monthly stats row(s).")
+
+
+@bookings_cli.command('reconcile')
+@click.option('--from', 'start', type=click.DateTime(['%Y-%m-%d']), default=None,
+              help='First UTC day of bookings to check (default: the day before --to).')
+@click.option('--to', 'end', type=click.DateTime(['%Y-%m-%d']), default=None,
+              help='UTC day to stop before (default: today, so checkouts in progress are left out).')
+@click.option('--window-hours', type=click.IntRange(min=1), default=24, show_default=True,
+              help='Hours of intents held in memory and matched at a time.')
+@click.option('--format', 'report_format', type=click.Choice(sorted(EXPORT_FORMATS)),
+              default='ndjson', show_default=True)
+@click.option('--output', type=click.File('w', encoding='utf-8'), default='-',
+              help='Discrepancy report to write (default: stdout).')
+@click.option('--batch-size', default=1000, show_default=True,
+              help='Bookings fetched per round trip.')
+@click.option('--page-size', default=LIST_PAGE_SIZE, show_default=True,
+              help='Intents fetched per provider list call.')
+def reconcile(start, end, window_hours, report_format, output, batch_size, page_size):
+    """Check bookings against the payment provider and report discrepancies."""
+    end = end or datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    start = start or end - timedelta(days=1)
+    if start >= end:
+        raise click.BadParameter('--from must be before --to')
+    summary, kinds = {}, Counter()
+
+    def issues():
+        for issue in reconcile_payments(payment_gateway, facade.booking_repo, start, end,
+                                        timedelta(hours=window_hours), batch_size,
+                                        page_size, summary):
+            kinds[issue['kind']] += 1
+            yield issue
+
+    if report_format == 'csv':
+        chunks = iter_csv(issues(), REPORT_FIELDS)
+    else:
+        chunks = iter_ndjson(issues())
+    for chunk in chunks:
+        output.write(chunk)
+    found = ', '.join(f"{count} {kind}" for kind, count in sorted(kinds.items()))
+    click.echo(f"Checked {summary['bookings']} booking(s) against {summary['intents']} "
+               f"intent(s): {found or 'no discrepancies'}.", err=True)
+
+
+def register_commands(app):
+    app.cli.add_command(places_cli)
+    app.cli.add_command(bookings_cli)
@@ -3,5 +3,6 @@ from .place import Place
 from .review import Review
 from .amenity import Amenity
 from .booking import Booking
+from .booking_hold import BookingHold
 
-__all__ = ['User', 'Place', 'Review', 'Amenity', 'Booking']
+__all__ = ['User', 'Place', 'Review', 'Amenity', 'Booking', 'BookingHold']
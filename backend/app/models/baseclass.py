@@ -1,7 +1,12 @@
 import uuid
 from datetime import datetime
+from sqlalchemy.dialects import mysql
 from app.extensions import db
 
+# DATETIME(6) on MySQL, whose plain DATETIME keeps whole seconds: change
+# markers compare these values, so two writes in one second must differ
+PreciseDateTime = db.DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql')
+
 
 class BaseModel(db.Model):
     __abstract__ = True  # This ensures SQLAlchemy does not create a table for BaseModel
@@ -10,4 +15,4 @@ class BaseModel(db.Model):
                    default=lambda: str(uuid.uuid4()))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(
-        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+        PreciseDateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -4,17 +4,43 @@ from app.extensions import db
 from .baseclass import BaseModel
 from sqlalchemy.orm import validates, relationship
 
+# Cancellation policy: bookings can be cancelled until this long before check-in
+CANCELLATION_NOTICE = timedelta(hours=48)
+# Statuses a guest may still cancel
+CANCELLABLE_STATUSES = ('pending', 'confirmed')
+
+
+def cancellation_deadline(check_in_date):
+    """Last moment (UTC) a stay starting on check_in_date can be cancelled"""
+    return datetime(check_in_date.year, check_in_date.month, check_in_date.day) - CANCELLATION_NOTICE
+
 
 class Booking(BaseModel):
     """Booking model for place reservations"""
 
     __tablename__ = 'bookings'
+    __table_args__ = (
+        # Overlap probes and calendars: equality on place_id and status,
+        # then a range on the stay dates
+        db.Index('ix_bookings_place_status_dates',
+                 'place_id', 'status', 'check_in_date', 'check_out_date'),
+        # Batched status transitions (see BookingRepository.transition)
+        db.Index('ix_bookings_status_check_out', 'status', 'check_out_date'),
+        db.Index('ix_bookings_status_created_at', 'status', 'created_at'),
+        # Guest booking lists, seeked on (check_in_date, id)
+        db.Index('ix_bookings_guest_check_in', 'guest_id', 'check_in_date'),
+        # One booking per payment; the webhook and POST /bookings look it up
+        db.Index('ix_bookings_payment_intent_id', 'payment_intent_id', unique=True),
+        # Payment reconciliation scans bookings by creation window
+        db.Index('ix_bookings_created_at', 'created_at'),
+    )
 
     place_id = db.Column(db.String(60), db.ForeignKey('places.id'), nullable=False)
     guest_id = db.Column(db.String(60), db.ForeignKey('users.id'), nullable=False)
     check_in_date = db.Column(db.Date, nullable=False)
     check_out_date = db.Column(db.Date, nullable=False)
     total_price = db.Column(db.Float, nullable=False)
+    payment_intent_id = db.Column(db.String(255), nullable=True)
     status = db.Column(
         db.Enum('pending', 'confirmed', 'cancelled', 'completed', name='booking_status'),
         default='pending',
@@ -75,16 +101,15 @@ class Booking(BaseModel):
 
     def can_cancel(self):
         """Check if booking can be cancelled"""
-        if self.status not in ['pending', 'confirmed']:
+        if self.status not in CANCELLABLE_STATUSES:
             return False
 
         # Cancellation policy: Must cancel at least 48 hours before check-in
-        cancellation_deadline = datetime.combine(self.check_in_date, datetime.min.time()) - timedelta(hours=48)
-        return datetime.utcnow() < cancellation_deadline
+        return datetime.utcnow() < self.get_cancellation_deadline()
 
     def get_cancellation_deadline(self):
         """Get the deadline for cancelling this booking"""
-        return datetime.combine(self.check_in_date, datetime.min.time()) - timedelta(hours=48)
+        return cancellation_deadline(self.check_in_date)
 
     def cancel(self):
         """Cancel the booking"""
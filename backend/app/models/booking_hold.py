@@ -0,0 +1,27 @@
+from app.extensions import db
+from .baseclass import BaseModel, PreciseDateTime
+
+
+class BookingHold(BaseModel):
+    """
+    Short-lived reservation of a place's dates while the guest pays.
+
+    Created with the payment intent, turned into a Booking (and deleted)
+    when the booking is made, and ignored once expires_at has passed.
+    Expired rows are purged in batches by `flask bookings sweep-holds`.
+    """
+
+    __tablename__ = 'booking_holds'
+    __table_args__ = (
+        db.Index('ix_booking_holds_place_dates',
+                 'place_id', 'check_in_date', 'check_out_date'),
+    )
+
+    place_id = db.Column(db.String(60), db.ForeignKey(
+        'places.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.String(60), db.ForeignKey(
+        'users.id', ondelete='CASCADE'), nullable=False)
+    check_in_date = db.Column(db.Date, nullable=False)
+    check_out_date = db.Column(db.Date, nullable=False)
+    expires_at = db.Column(PreciseDateTime, nullable=False, index=True)
+    payment_intent_id = db.Column(db.String(255), nullable=True, index=True)
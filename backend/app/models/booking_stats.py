@@ -0,0 +1,18 @@
+from app.extensions import db
+
+
+# Per place, per calendar month rollup of bookings that were not cancelled
+# (see app.persistence.booking_stats_repository). Nights and revenue of a
+# stay are split across the months it spans; `bookings` counts stays in
+# their check-in month. Host dashboards read it by (host_id, month).
+booking_monthly_stats = db.Table(
+    'booking_monthly_stats',
+    db.Column('place_id', db.String(60), db.ForeignKey(
+        'places.id', ondelete='CASCADE'), primary_key=True, nullable=False),
+    db.Column('month', db.Date, primary_key=True, nullable=False),
+    db.Column('host_id', db.String(60), nullable=False),
+    db.Column('bookings', db.Integer, nullable=False, default=0),
+    db.Column('nights', db.Integer, nullable=False, default=0),
+    db.Column('revenue_cents', db.BigInteger, nullable=False, default=0),
+    db.Index('ix_booking_monthly_stats_host_month', 'host_id', 'month')
+)
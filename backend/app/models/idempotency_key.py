@@ -0,0 +1,15 @@
+from app.extensions import db
+
+
+# First response to each (user, Idempotency-Key) pair, replayed to retries
+# of the same request until expires_at. response_status is NULL while the
+# first request is still running (see app.api.idempotency).
+idempotency_keys = db.Table(
+    'idempotency_keys',
+    db.Column('user_id', db.String(60), primary_key=True, nullable=False),
+    db.Column('key', db.String(255), primary_key=True, nullable=False),
+    db.Column('fingerprint', db.String(64), nullable=False),
+    db.Column('response_status', db.Integer, nullable=True),
+    db.Column('response_body', db.Text, nullable=True),
+    db.Column('expires_at', db.DateTime, nullable=False, index=True)
+)
@@ -0,0 +1,13 @@
+from app.extensions import db
+
+
+# Payment provider webhook events already handled, keyed by the provider's
+# event id. Providers deliver at least once, so a redelivered event finds
+# its row here and is acknowledged without being applied again.
+payment_events = db.Table(
+    'payment_events',
+    db.Column('event_id', db.String(255), primary_key=True, nullable=False),
+    db.Column('event_type', db.String(64), nullable=False),
+    db.Column('outcome', db.String(255), nullable=False),
+    db.Column('processed_at', db.DateTime, nullable=False)
+)
@@ -2,6 +2,7 @@ import uuid
 from datetime import datetime
 from app.extensions import db
 from app.models.place_amenity import place_amenity
+from app.utils.geo import grid_cell
 from .baseclass import BaseModel
 from sqlalchemy.orm import validates, relationship
 
@@ -9,6 +10,10 @@ from sqlalchemy.orm import validates, relationship
 class Place(BaseModel):
 
     __tablename__ = 'places'
+    __table_args__ = (
+        # Keyset pagination walks places in (created_at, id) order
+        db.Index('ix_places_created_at_id', 'created_at', 'id'),
+    )
 
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=False)
@@ -17,6 +22,16 @@ class Place(BaseModel):
     longitude = db.Column(db.Float, nullable=False)
     owner_id = db.Column(db.String(60), db.ForeignKey(
         'users.id'), nullable=False)
+    # Spatial index cell derived from latitude/longitude (see app.utils.geo)
+    grid_cell = db.Column(db.Integer, nullable=True, index=True)
+    # Review aggregates, maintained by the facade on every review write
+    review_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    avg_rating = db.Column(db.Float, nullable=True)
+    # Bumped by every booking and hold write; the UPDATE doubles as the
+    # per-place booking lock (see PlaceRepository.lock_for_booking), and
+    # the value keys the place's cached calendars
+    booking_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # Many-to-one relationship from Owner to Place
     owner = db.relationship(
@@ -66,6 +81,7 @@ class Place(BaseModel):
     @validates('latitude')
     def validates_latitude(self, key, value):
         if isinstance(value, (int, float)) and -90.0 <= value <= 90.0:
+            self._refresh_grid_cell(value, self.longitude)
             return value
         else:
             raise ValueError("Invalid value specified for Latitude")
@@ -73,12 +89,18 @@ class Place(BaseModel):
     @validates('longitude')
     def validates_longitude(self, key, value):
         if isinstance(value, (int, float)) and -180.0 <= value <= 180.0:
+            self._refresh_grid_cell(self.latitude, value)
             return value
         else:
             raise ValueError("Invalid value specified for Longitude")
 
     # ---methods----
 
+    def _refresh_grid_cell(self, latitude, longitude):
+        """Keep grid_cell in step with the coordinates once both are known"""
+        if latitude is not None and longitude is not None:
+            self.grid_cell = grid_cell(latitude, longitude)
+
     def save(self):
         """Update the updated_at timestamp whenever the object is modified"""
         self.updated_at = datetime.utcnow()
@@ -0,0 +1,14 @@
+from app.extensions import db
+
+
+# Inverted index over place titles and descriptions (see app.utils.text).
+# One row per (term, place) holding the saturated, field-weighted term
+# frequency; lookups by term use the primary key prefix.
+place_terms = db.Table(
+    'place_terms',
+    db.Column('term', db.String(40), primary_key=True, nullable=False),
+    db.Column('place_id', db.String(60), db.ForeignKey(
+        'places.id', ondelete='CASCADE'), primary_key=True, nullable=False),
+    db.Column('weight', db.Float, nullable=False),
+    db.Index('ix_place_terms_place_id', 'place_id')
+)
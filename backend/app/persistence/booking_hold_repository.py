@@ -0,0 +1,93 @@
+from datetime import datetime
+
+from app.models.booking_hold import BookingHold
+from app.extensions import db
+from app.persistence.repository import SQLAlchemyRepository
+from sqlalchemy import delete, exists, func, select
+
+
+def active_hold_criteria(place_id, check_in, check_out, holder_id=None, now=None):
+    """
+    Criteria for unexpired holds on place_id overlapping [check_in,
+    check_out). Holds of holder_id are ignored so a guest's own hold
+    never blocks them. place_id may be a column for correlated use.
+    """
+    criteria = [
+        BookingHold.place_id == place_id,
+        BookingHold.expires_at > (now or datetime.utcnow()),
+        BookingHold.check_in_date < check_out,
+        BookingHold.check_out_date > check_in,
+    ]
+    if holder_id is not None:
+        criteria.append(BookingHold.user_id != holder_id)
+    return criteria
+
+
+def active_hold_exists(place_id, check_in, check_out, holder_id=None, now=None):
+    """EXISTS clause over active_hold_criteria"""
+    return exists().where(*active_hold_criteria(place_id, check_in, check_out, holder_id, now))
+
+
+def active_hold_ranges(place_id, start, end):
+    """[(check_in, check_out), ...] of unexpired holds on a place overlapping [start, end)"""
+    return db.session.query(BookingHold.check_in_date, BookingHold.check_out_date).filter(
+        BookingHold.place_id == place_id,
+        BookingHold.expires_at > datetime.utcnow(),
+        BookingHold.check_in_date < end,
+        BookingHold.check_out_date > start
+    ).all()
+
+
+class BookingHoldRepository(SQLAlchemyRepository):
+    """Repository for BookingHold with batched expiry"""
+
+    def __init__(self):
+        super().__init__(BookingHold)
+
+    def get_active_version(self):
+        """
+        (count, latest expires_at) of unexpired holds: changes when a hold
+        is taken, extended or released, and when one runs out. expires_at
+        keeps microseconds, so a hold replaced within a second still counts.
+        """
+        return tuple(db.session.query(
+            func.count(BookingHold.id), func.max(BookingHold.expires_at)
+        ).filter(BookingHold.expires_at > datetime.utcnow()).one())
+
+    def next_expiry(self, place_id, start, end):
+        """When the first unexpired hold on place_id overlapping [start, end) runs out, or None"""
+        return db.session.query(func.min(BookingHold.expires_at)).filter(
+            BookingHold.place_id == place_id,
+            BookingHold.expires_at > datetime.utcnow(),
+            BookingHold.check_in_date < end,
+            BookingHold.check_out_date > start).scalar()
+
+    def delete_for_user(self, place_id, user_id, check_in=None, check_out=None):
+        """Drop a user's holds on a place, or only those overlapping the dates (no commit)"""
+        criteria = [BookingHold.place_id == place_id, BookingHold.user_id == user_id]
+        if check_in is not None:
+            criteria += [BookingHold.check_in_date < check_out,
+                         BookingHold.check_out_date > check_in]
+        return db.session.execute(
+            delete(BookingHold).where(*criteria),
+            execution_options={'synchronize_session': False}).rowcount
+
+    def purge_expired(self, batch_size=1000):
+        """
+        Delete expired holds batch_size at a time, committing per batch,
+        and return how many went. Each batch is a keyed DELETE found via
+        the expires_at index, so concurrent sweepers only ever race to
+        delete the same rows, which is harmless.
+        """
+        now = datetime.utcnow()
+        purged = 0
+        while True:
+            ids = db.session.execute(
+                select(BookingHold.id).where(BookingHold.expires_at <= now).limit(
+                    batch_size)).scalars().all()
+            if not ids:
+                return purged
+            purged += db.session.execute(
+                delete(BookingHold).where(BookingHold.id.in_(ids)),
+                execution_options={'synchronize_session': False}).rowcount
+            db.session.commit()
@@ -1,7 +1,47 @@
 from app.models.booking import Booking
+from app.models.place import Place
 from app.persistence.repository import SQLAlchemyRepository
-from datetime import date
-from sqlalchemy import and_, or_
+from app.models.booking_hold import BookingHold
+from app.persistence.booking_hold_repository import (
+    active_hold_criteria, active_hold_exists, active_hold_ranges)
+from app.persistence.pagination import keyset_paginate
+from app.extensions import db
+from datetime import date, datetime
+from sqlalchemy import and_, exists, func, or_, select, update
+
+# Bookings in these states hold their dates against other guests
+BLOCKING_STATUSES = ('pending', 'confirmed')
+
+# Columns loaded by the booking list endpoints, in serialization order
+LIST_COLUMNS = (
+    Booking.id, Booking.place_id, Booking.guest_id, Booking.check_in_date,
+    Booking.check_out_date, Booking.total_price, Booking.status,
+    Booking.created_at, Booking.updated_at
+)
+
+
+def overlaps(check_in, check_out):
+    """Half-open interval test: a stay [in, out) intersects [check_in, check_out)"""
+    return and_(
+        Booking.check_in_date < check_out,
+        Booking.check_out_date > check_in
+    )
+
+
+def merge_ranges(ranges, start, end):
+    """
+    Clip [(check_in, check_out), ...] to [start, end) and merge overlapping
+    or back-to-back ranges (no free night between them) in date order
+    """
+    merged = []
+    for check_in, check_out in sorted(ranges):
+        check_in, check_out = max(check_in, start), min(check_out, end)
+        if merged and check_in <= merged[-1][1]:
+            if check_out > merged[-1][1]:
+                merged[-1] = (merged[-1][0], check_out)
+        else:
+            merged.append((check_in, check_out))
+    return merged
 
 
 class BookingRepository(SQLAlchemyRepository):
@@ -10,41 +50,113 @@ class BookingRepository(SQLAlchemyRepository):
     def __init__(self):
         super().__init__(Booking)
 
-    def check_availability(self, place_id, check_in, check_out, exclude_booking_id=None):
+    def check_availability(self, place_id, check_in, check_out, exclude_booking_id=None,
+                           for_update=False, holder_id=None):
         """
         Check if a place is available for the given dates
         Returns True if available, False if there's a conflict
-        """
-        query = self.model.query.filter(
-            and_(
-                Booking.place_id == place_id,
-                Booking.status.in_(['pending', 'confirmed']),
-                or_(
-                    # New booking starts during existing booking
-                    and_(
-                        Booking.check_in_date <= check_in,
-                        Booking.check_out_date > check_in
-                    ),
-                    # New booking ends during existing booking
-                    and_(
-                        Booking.check_in_date < check_out,
-                        Booking.check_out_date >= check_out
-                    ),
-                    # New booking completely contains existing booking
-                    and_(
-                        Booking.check_in_date >= check_in,
-                        Booking.check_out_date <= check_out
-                    )
-                )
-            )
-        )
 
+        Runs as an EXISTS probe on ix_bookings_place_status_dates: the
+        database stops at the first conflicting row and nothing is loaded.
+        for_update=True issues locking SELECT ... LIMIT 1 FOR UPDATE
+        probes instead, which on MySQL read the latest committed rows
+        rather than the transaction's snapshot; use it after
+        lock_for_booking. Unexpired holds count as conflicts too, except
+        holder_id's own, and are probed the same way.
+        """
+        if for_update:
+            held = db.session.execute(select(BookingHold.id).where(
+                *active_hold_criteria(place_id, check_in, check_out, holder_id)
+            ).limit(1).with_for_update()).first()
+            if held is not None:
+                return False
+        elif db.session.query(active_hold_exists(place_id, check_in, check_out, holder_id)).scalar():
+            return False
+        criteria = [
+            Booking.place_id == place_id,
+            Booking.status.in_(BLOCKING_STATUSES),
+            overlaps(check_in, check_out)
+        ]
         # Exclude current booking if updating
         if exclude_booking_id:
-            query = query.filter(Booking.id != exclude_booking_id)
+            criteria.append(Booking.id != exclude_booking_id)
+        if for_update:
+            conflict = db.session.execute(
+                select(Booking.id).where(*criteria).limit(1).with_for_update()).first()
+            return conflict is None
+        return not db.session.query(exists().where(*criteria)).scalar()
+
+    def get_blocked_ranges(self, place_id, start, end):
+        """
+        Return the dates held by blocking bookings and unexpired holds
+        within [start, end) as merged, sorted [(first_night, check_out), ...]
+        pairs (end exclusive). Only the date columns are read, straight off
+        ix_bookings_place_status_dates and ix_booking_holds_place_dates.
+        """
+        rows = db.session.query(Booking.check_in_date, Booking.check_out_date).filter(
+            Booking.place_id == place_id,
+            Booking.status.in_(BLOCKING_STATUSES),
+            overlaps(start, end)
+        ).all()
+        rows += active_hold_ranges(place_id, start, end)
+        return merge_ranges(rows, start, end)
+
+    def transition(self, criteria, status, batch_size=1000, on_batch=None):
+        """
+        Set status on every booking matching criteria, batch_size rows per
+        UPDATE and commit, and return (rows changed, affected place ids).
+
+        Each batch picks ids with an indexed SELECT and the UPDATE repeats
+        the criteria, so a row another worker already moved is skipped.
+        Running the job from several workers at once is therefore safe;
+        they only split the work. The batch's places get their
+        booking_version bumped first (place rows before booking rows, the
+        order create_booking locks them in), so cached calendars drop.
 
-        conflicts = query.all()
-        return len(conflicts) == 0
+        on_batch(rows), if given, runs before each commit with the batch's
+        place_id, dates and total_price. The batch is then selected FOR
+        UPDATE SKIP LOCKED so every row passed is one this call changes.
+        """
+        columns = [Booking.id, Booking.place_id]
+        if on_batch:
+            columns += [Booking.check_in_date, Booking.check_out_date, Booking.total_price]
+        changed, place_ids = 0, set()
+        while True:
+            query = select(*columns).where(*criteria).limit(batch_size)
+            if on_batch:
+                query = query.with_for_update(skip_locked=True)
+            rows = db.session.execute(query).all()
+            if not rows:
+                return changed, place_ids
+            db.session.execute(
+                update(Place).where(Place.id.in_(sorted({row.place_id for row in rows})))
+                .values(booking_version=Place.booking_version + 1, updated_at=Place.updated_at),
+                execution_options={'synchronize_session': False})
+            result = db.session.execute(
+                update(Booking).where(Booking.id.in_([row.id for row in rows]), *criteria)
+                .values(status=status, updated_at=datetime.utcnow()),
+                execution_options={'synchronize_session': False})
+            if on_batch:
+                on_batch(rows)
+            db.session.commit()
+            changed += result.rowcount
+            place_ids.update(row.place_id for row in rows)
+
+    def complete_finished(self, today, batch_size=1000):
+        """Confirmed stays whose check-out date has passed become completed"""
+        return self.transition(
+            [Booking.status == 'confirmed', Booking.check_out_date < today],
+            'completed', batch_size)
+
+    def count_stale_pending(self, created_before, today):
+        """
+        Pending bookings the host has not confirmed in time (created before
+        created_before) or whose check-in has passed. Every booking is paid
+        before it is made, so these are reported, never cancelled here.
+        """
+        return db.session.query(func.count(Booking.id)).filter(
+            Booking.status == 'pending',
+            or_(Booking.created_at < created_before, Booking.check_in_date < today)).scalar()
 
     def get_bookings_for_place(self, place_id, status=None):
         """Get all bookings for a place, optionally filtered by status"""
@@ -81,3 +193,64 @@ class BookingRepository(SQLAlchemyRepository):
                 )
             )
         ).order_by(Booking.check_out_date.desc()).all()
+
+    def list_rows(self, criteria, key, descending=False, limit=None, cursor=None):
+        """
+        Load bookings matching criteria as LIST_COLUMNS tuples ordered by the
+        key columns (the last one unique). Without limit every row is
+        returned as a list; with it, one keyset Page. No ORM objects are
+        built, so large lists skip identity-map and attribute overhead.
+        """
+        query = db.session.query(*LIST_COLUMNS).filter(*criteria)
+        if limit is None:
+            return query.order_by(*[c.desc() if descending else c for c in key]).all()
+        return keyset_paginate(query, key, limit, cursor, descending)
+
+    def list_rows_for_place(self, place_id, status=None, limit=None, cursor=None):
+        """Rows of a place's bookings by check-in date (see list_rows)"""
+        criteria = [Booking.place_id == place_id]
+        if status:
+            criteria.append(Booking.status == status)
+        return self.list_rows(criteria, (Booking.check_in_date, Booking.id),
+                              limit=limit, cursor=cursor)
+
+    def list_rows_for_guest(self, guest_id, status=None, when=None, limit=None, cursor=None):
+        """
+        Rows of a guest's bookings (see list_rows): when='upcoming' gives
+        active stays by check-in date, when='past' finished stays latest
+        check-out first, otherwise every stay latest check-in first
+        """
+        today = date.today()
+        criteria = [Booking.guest_id == guest_id]
+        if when == 'upcoming':
+            criteria += [Booking.check_in_date >= today, Booking.status.in_(BLOCKING_STATUSES)]
+            return self.list_rows(criteria, (Booking.check_in_date, Booking.id),
+                                  limit=limit, cursor=cursor)
+        if when == 'past':
+            criteria.append(or_(Booking.check_out_date < today, Booking.status == 'completed'))
+            return self.list_rows(criteria, (Booking.check_out_date, Booking.id),
+                                  descending=True, limit=limit, cursor=cursor)
+        if status:
+            criteria.append(Booking.status == status)
+        return self.list_rows(criteria, (Booking.check_in_date, Booking.id),
+                              descending=True, limit=limit, cursor=cursor)
+
+    def stream_payment_rows(self, start, end, batch_size=1000):
+        """
+        Yield (id, payment_intent_id, status, total_price, created_at) for
+        bookings created in [start, end), fetched batch_size rows at a
+        time on ix_bookings_created_at
+        """
+        query = (select(Booking.id, Booking.payment_intent_id, Booking.status,
+                        Booking.total_price, Booking.created_at)
+                 .where(Booking.created_at >= start, Booking.created_at < end)
+                 .order_by(Booking.created_at, Booking.id)
+                 .execution_options(yield_per=batch_size))
+        yield from db.session.execute(query)
+
+    def payment_intent_ids_booked(self, intent_ids):
+        """The subset of intent_ids some booking was paid with"""
+        if not intent_ids:
+            return set()
+        return set(db.session.scalars(
+            select(Booking.payment_intent_id).where(Booking.payment_intent_id.in_(intent_ids))))
@@ -0,0 +1,134 @@
+from datetime import date
+
+from app.extensions import db
+from app.models.booking import Booking
+from app.models.booking_stats import booking_monthly_stats as stats
+from app.models.place import Place
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+# Bookings in these states count towards a host's nights and revenue
+COUNTED_STATUSES = ('pending', 'confirmed', 'completed')
+
+
+def add_months(month, count):
+    """First day of the month `count` months after (or before) `month`"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def stay_months(check_in, check_out, total_price):
+    """
+    Split a stay over the calendar months it spans, yielding
+    (month, bookings, nights, revenue_cents). The price is allocated by
+    nights in whole cents and the shares always add up to the total, so
+    removing a stay later subtracts exactly what adding it added.
+    """
+    nights = (check_out - check_in).days
+    cents = int(round(total_price * 100))
+    start, counted, allocated = check_in, 0, 0
+    while start < check_out:
+        month = start.replace(day=1)
+        end = min(add_months(month, 1), check_out)
+        counted += (end - start).days
+        share = cents * counted // nights - allocated
+        allocated += share
+        yield month, 1 if start == check_in else 0, (end - start).days, share
+        start = end
+
+
+def _upsert(rows):
+    """
+    INSERT rows, adding the counters onto any existing (place_id, month)
+    row instead. Increments are applied by the database, so concurrent
+    writers never overwrite each other.
+    """
+    counters = ('bookings', 'nights', 'revenue_cents')
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'mysql':
+        stmt = mysql.insert(stats).values(rows)
+        stmt = stmt.on_duplicate_key_update(
+            {name: stats.c[name] + stmt.inserted[name] for name in counters})
+    else:
+        dialect_insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = dialect_insert(stats).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[stats.c.place_id, stats.c.month],
+            set_={name: stats.c[name] + stmt.excluded[name] for name in counters})
+    db.session.execute(stmt)
+
+
+class BookingStatsRepository:
+    """Incrementally maintained monthly booking rollup per place"""
+
+    def record(self, stays, sign=1):
+        """
+        Add (sign=1) or remove (sign=-1) stays, anything with place_id,
+        check_in_date, check_out_date and total_price, in one upsert. The
+        caller commits, in the same transaction as the status change.
+        """
+        totals = {}
+        for stay in stays:
+            for month, bookings, nights, cents in stay_months(
+                    stay.check_in_date, stay.check_out_date, stay.total_price):
+                counters = totals.setdefault((stay.place_id, month), [0, 0, 0])
+                counters[0] += sign * bookings
+                counters[1] += sign * nights
+                counters[2] += sign * cents
+        if not totals:
+            return
+        hosts = dict(db.session.execute(
+            select(Place.id, Place.owner_id).where(
+                Place.id.in_({place_id for place_id, _ in totals}))).all())
+        _upsert([{'place_id': place_id, 'month': month, 'host_id': hosts[place_id],
+                  'bookings': bookings, 'nights': nights, 'revenue_cents': cents}
+                 for (place_id, month), (bookings, nights, cents) in totals.items()
+                 if place_id in hosts])
+
+    def remove_places(self, place_ids):
+        """Drop the rollup rows of places about to be deleted (the caller commits)"""
+        db.session.execute(delete(stats).where(stats.c.place_id.in_(place_ids)))
+
+    def for_host(self, host_id, start, end):
+        """
+        Every place of host_id with its rollup rows for months in [start,
+        end], as (place_id, title, month, bookings, nights, revenue_cents)
+        ordered by place and month. A place with no rows in the range comes
+        back once with month and the counters None. The places are read by
+        owner_id and their rows by the (place_id, month) primary key.
+        """
+        return db.session.execute(
+            select(Place.id, Place.title, stats.c.month, stats.c.bookings,
+                   stats.c.nights, stats.c.revenue_cents)
+            .outerjoin(stats, (stats.c.place_id == Place.id) &
+                       stats.c.month.between(start, end))
+            .where(Place.owner_id == host_id)
+            .order_by(Place.id, stats.c.month)).all()
+
+    def rebuild(self, batch_size=1000):
+        """
+        Recompute the whole rollup from the bookings table in one
+        transaction, streaming bookings batch_size rows at a time.
+        Returns the number of rollup rows written.
+        """
+        totals = {}
+        query = (select(Booking.place_id, Place.owner_id, Booking.check_in_date,
+                        Booking.check_out_date, Booking.total_price)
+                 .join(Place, Place.id == Booking.place_id)
+                 .where(Booking.status.in_(COUNTED_STATUSES))
+                 .execution_options(yield_per=batch_size))
+        for place_id, host_id, check_in, check_out, price in db.session.execute(query):
+            for month, bookings, nights, cents in stay_months(check_in, check_out, price):
+                counters = totals.setdefault((place_id, month), [host_id, 0, 0, 0])
+                counters[1] += bookings
+                counters[2] += nights
+                counters[3] += cents
+
+        db.session.execute(delete(stats))
+        rows = [{'place_id': place_id, 'month': month, 'host_id': host_id,
+                 'bookings': bookings, 'nights': nights, 'revenue_cents': cents}
+                for (place_id, month), (host_id, bookings, nights, cents) in totals.items()]
+        for start in range(0, len(rows), batch_size):
+            db.session.execute(insert(stats), rows[start:start + batch_size])
+        db.session.commit()
+        return len(rows)
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models.idempotency_key import idempotency_keys as keys
+from sqlalchemy import delete, insert, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+
+
+class IdempotencyRepository:
+    """Stored responses of requests sent with an Idempotency-Key header"""
+
+    def _match(self, user_id, key):
+        return (keys.c.user_id == user_id) & (keys.c.key == key)
+
+    def claim(self, user_id, key, fingerprint, lease):
+        """
+        Insert an in-flight row for the key, leased for lease seconds, and
+        commit. Returns True if this request owns the key, False if a row
+        exists already. An expired row, including an in-flight claim whose
+        owner died before its lease ran out, is replaced.
+        """
+        for _ in range(2):
+            try:
+                db.session.execute(insert(keys).values(
+                    user_id=user_id, key=key, fingerprint=fingerprint,
+                    expires_at=datetime.utcnow() + timedelta(seconds=lease)))
+                db.session.commit()
+                return True
+            except IntegrityError:
+                db.session.rollback()
+            expired = db.session.execute(delete(keys).where(
+                self._match(user_id, key), keys.c.expires_at <= datetime.utcnow()))
+            db.session.commit()
+            if not expired.rowcount:
+                return False
+        return False
+
+    def get(self, user_id, key):
+        """The key's row, read in a fresh transaction so other workers' commits show"""
+        db.session.rollback()
+        row = db.session.execute(select(keys).where(self._match(user_id, key))).first()
+        db.session.rollback()
+        return row
+
+    def complete(self, user_id, key, status, body, ttl):
+        """Store the response to replay for ttl seconds and commit"""
+        db.session.execute(update(keys).where(self._match(user_id, key)).values(
+            response_status=status, response_body=body,
+            expires_at=datetime.utcnow() + timedelta(seconds=ttl)))
+        db.session.commit()
+
+    def release(self, user_id, key):
+        """Forget the key, so a retry runs the request again"""
+        db.session.rollback()
+        db.session.execute(delete(keys).where(self._match(user_id, key)))
+        db.session.commit()
+
+    def purge_expired(self, batch_size=1000):
+        """Delete expired keys batch_size at a time and return how many went"""
+        now = datetime.utcnow()
+        purged = 0
+        while True:
+            rows = db.session.execute(
+                select(keys.c.user_id, keys.c.key).where(keys.c.expires_at <= now)
+                .limit(batch_size)).all()
+            if not rows:
+                return purged
+            purged += db.session.execute(delete(keys).where(
+                tuple_(keys.c.user_id, keys.c.key).in_(rows))).rowcount
+            db.session.commit()
@@ -0,0 +1,124 @@
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import date, datetime
+
+from sqlalchemy import and_, or_
+
+
+Page = namedtuple('Page', ['items', 'next_cursor', 'prev_cursor', 'limit'])
+
+
+def clamp_limit(limit, default, maximum):
+    """Parse a client supplied page size and clamp it to [1, maximum]"""
+    if limit in (None, ''):
+        return default
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, maximum)
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+        raise ValueError("Invalid cursor")
+    # Only scalars can be bound into the seek clause
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError("Invalid cursor")
+    return value
+
+
+def encode_cursor(values, direction):
+    """Build an opaque cursor from the sort key of a boundary row"""
+    payload = {'k': [_encode_value(v) for v in values], 'd': direction}
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, key_length):
+    """Return (values, direction) from a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(payload['k'], list):
+            raise ValueError("Invalid cursor")
+        values = [_decode_value(v) for v in payload['k']]
+        direction = payload['d']
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if direction not in ('next', 'prev') or len(values) != key_length:
+        raise ValueError("Invalid cursor")
+    return values, direction
+
+
+def _seek_clause(columns, values, forward):
+    """
+    Row-value comparison (c1, c2, ...) > (v1, v2, ...) expanded into
+    OR/AND terms so every backend can drive it from a composite index
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        prefix = [columns[j] == values[j] for j in range(i)]
+        step = column > values[i] if forward else column < values[i]
+        clauses.append(and_(*prefix, step))
+    return or_(*clauses)
+
+
+def keyset_paginate(query, columns, limit, cursor=None, descending=False):
+    """
+    Seek-based pagination over a query ordered by `columns`.
+
+    The last column must be unique (usually the primary key) so the order
+    is total. Every page costs one index range scan of limit + 1 rows no
+    matter how deep the client pages, unlike OFFSET which rescans every
+    skipped row. Items may be ORM objects or column rows; the sort key is
+    read back from them by column name.
+    """
+    columns = list(columns)
+    direction = 'next'
+    if cursor:
+        values, direction = decode_cursor(cursor, len(columns))
+        # Walking backwards means seeking the other way and flipping the order
+        forward = (direction == 'next') != descending
+        query = query.filter(_seek_clause(columns, values, forward))
+
+    reverse = (direction == 'prev') != descending
+    order = [c.desc() if reverse else c.asc() for c in columns]
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == 'prev':
+        rows.reverse()
+
+    def key_of(row):
+        return [getattr(row, c.key) for c in columns]
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if direction == 'next':
+            if has_more:
+                next_cursor = encode_cursor(key_of(rows[-1]), 'next')
+            if cursor:
+                prev_cursor = encode_cursor(key_of(rows[0]), 'prev')
+        else:
+            next_cursor = encode_cursor(key_of(rows[-1]), 'next')
+            if has_more:
+                prev_cursor = encode_cursor(key_of(rows[0]), 'prev')
+    return Page(rows, next_cursor, prev_cursor, limit)
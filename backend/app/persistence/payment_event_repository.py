@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from app.extensions import db
+from app.models.payment_event import payment_events
+from sqlalchemy import exists, insert
+from sqlalchemy.exc import IntegrityError
+
+
+class PaymentEventRepository:
+    """Ledger of processed payment webhook events"""
+
+    def seen(self, event_id):
+        """True if event_id was already processed"""
+        return db.session.query(
+            exists().where(payment_events.c.event_id == event_id)).scalar()
+
+    def add(self, event_id, event_type, outcome):
+        """Record an event in the current transaction (the caller commits)"""
+        db.session.execute(insert(payment_events).values(
+            event_id=event_id, event_type=event_type, outcome=outcome[:255],
+            processed_at=datetime.utcnow()))
+
+    def record(self, event_id, event_type, outcome):
+        """
+        Record and commit an event on its own. Returns False if a
+        concurrent delivery of the same event recorded it first.
+        """
+        try:
+            self.add(event_id, event_type, outcome)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return False
+        return True
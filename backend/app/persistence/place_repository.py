@@ -0,0 +1,381 @@
+import threading
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from app.models.place import Place
+from app.models.amenity import Amenity
+from app.models.review import Review
+from app.models.booking import Booking
+from app.models.place_amenity import place_amenity
+from app.models.place_term import place_terms
+from app.persistence.booking_repository import BLOCKING_STATUSES, overlaps
+from app.persistence.booking_hold_repository import active_hold_exists
+from app.persistence.repository import SQLAlchemyRepository
+from app.persistence.pagination import Page, decode_cursor, encode_cursor, keyset_paginate
+from app.extensions import db
+from app.utils.geo import NearestIndex, cell_ranges, haversine_km, radius_bbox
+from app.utils.text import idf, term_weights
+from sqlalchemy import Float, and_, case, cast, delete, insert, or_, exists, func, select, update
+from sqlalchemy.orm import load_only, selectinload
+
+
+class PlaceRepository(SQLAlchemyRepository):
+    """Repository for Place model with paginated listing, spatial and text queries"""
+
+    # (created_at, id) is stable and unique, and backed by ix_places_created_at_id
+    PAGE_KEY = (Place.created_at, Place.id)
+
+    # Field names a client may request, mapped to what has to be loaded
+    COLUMN_FIELDS = {
+        'id': Place.id,
+        'title': Place.title,
+        'description': Place.description,
+        'price': Place.price,
+        'latitude': Place.latitude,
+        'longitude': Place.longitude,
+        'owner_id': Place.owner_id,
+        'review_count': Place.review_count,
+        'avg_rating': Place.avg_rating,
+    }
+    RELATION_FIELDS = ('amenities', 'reviews')
+    FIELDS = tuple(COLUMN_FIELDS) + RELATION_FIELDS
+    SUMMARY_FIELDS = ('id', 'title', 'price', 'latitude', 'longitude',
+                      'review_count', 'avg_rating')
+
+    def __init__(self):
+        super().__init__(Place)
+        self._nearest = None
+        self._nearest_marker = None
+        self._nearest_lock = threading.Lock()
+
+    def list_places(self, fields=None):
+        """Return every place, loading only what `fields` needs"""
+        return self._with_fields(self.model.query, fields).all()
+
+    def get_page(self, limit, cursor=None, fields=None):
+        """Return one keyset page of places"""
+        return self.search(limit, cursor, fields=fields)
+
+    def search(self, limit, cursor=None, min_price=None, max_price=None,
+               amenity_ids=None, check_in=None, check_out=None, fields=None):
+        """
+        One keyset page of places matching every given filter, issued as a
+        single SELECT: price range, all of `amenity_ids` present, and no
+        blocking booking or active hold overlapping [check_in, check_out).
+        """
+        query = self._with_fields(self.model.query, fields)
+        if min_price is not None:
+            query = query.filter(Place.price >= min_price)
+        if max_price is not None:
+            query = query.filter(Place.price <= max_price)
+        if amenity_ids:
+            amenity_ids = set(amenity_ids)
+            # Relational division: places linked to every requested amenity
+            having_all = select(place_amenity.c.place_id).where(
+                place_amenity.c.amenity_id.in_(amenity_ids)
+            ).group_by(place_amenity.c.place_id).having(
+                func.count(place_amenity.c.amenity_id) == len(amenity_ids))
+            query = query.filter(Place.id.in_(having_all))
+        if check_in is not None and check_out is not None:
+            booked = exists().where(
+                Booking.place_id == Place.id,
+                Booking.status.in_(BLOCKING_STATUSES),
+                overlaps(check_in, check_out))
+            held = active_hold_exists(Place.id, check_in, check_out)
+            query = query.filter(~booked, ~held)
+        return keyset_paginate(query, self.PAGE_KEY, limit, cursor)
+
+    # Columns written by stream_export, in output order, then amenity_ids
+    EXPORT_COLUMNS = (Place.id, Place.title, Place.description, Place.price,
+                      Place.latitude, Place.longitude, Place.owner_id,
+                      Place.review_count, Place.avg_rating,
+                      Place.created_at, Place.updated_at)
+    EXPORT_FIELDS = tuple(column.key for column in EXPORT_COLUMNS) + ('amenity_ids',)
+
+    def stream_export(self, batch_size=1000):
+        """
+        Yield every place as a flat dict of EXPORT_FIELDS.
+
+        One SELECT joined to place_amenity and ordered by place id runs on
+        a server-side cursor, fetched batch_size rows at a time; a place's
+        amenity rows arrive together and are folded into amenity_ids. No
+        ORM objects are built, so memory does not grow with the table.
+        """
+        statement = select(*self.EXPORT_COLUMNS, place_amenity.c.amenity_id).outerjoin(
+            place_amenity, place_amenity.c.place_id == Place.id
+        ).order_by(Place.id, place_amenity.c.amenity_id).execution_options(
+            stream_results=True, yield_per=batch_size)
+        names = self.EXPORT_FIELDS[:-1]
+        for _, rows in groupby(db.session.execute(statement), key=itemgetter(0)):
+            rows = list(rows)
+            data = dict(zip(names, rows[0]))
+            data['amenity_ids'] = [row[-1] for row in rows if row[-1] is not None]
+            yield data
+
+    def _with_fields(self, query, fields):
+        """
+        Restrict the SELECT to the requested fields. Unrequested columns are
+        deferred and unrequested relationships are never queried; the page
+        key columns are always loaded so cursors can be built from rows.
+        fields=None loads the full place with amenities and reviews.
+        """
+        fields = self.FIELDS if fields is None else fields
+        columns = [self.COLUMN_FIELDS[f] for f in fields if f in self.COLUMN_FIELDS]
+        options = [load_only(*self.PAGE_KEY, *columns)]
+        if 'amenities' in fields:
+            options.append(selectinload(Place.amenities).load_only(Amenity.id, Amenity.name))
+        if 'reviews' in fields:
+            options.append(selectinload(Place.reviews).load_only(
+                Review.id, Review.text, Review.rating, Review.user_id))
+        return query.options(*options)
+
+    @staticmethod
+    def _bbox_clause(min_lat, min_lon, max_lat, max_lon):
+        """Exact box test, narrowed first to grid_cell ranges when possible"""
+        if min_lon <= max_lon:
+            lon_clause = Place.longitude.between(min_lon, max_lon)
+        else:
+            # Box crosses the antimeridian
+            lon_clause = or_(Place.longitude >= min_lon, Place.longitude <= max_lon)
+        clause = and_(Place.latitude.between(min_lat, max_lat), lon_clause)
+
+        ranges = cell_ranges(min_lat, min_lon, max_lat, max_lon)
+        if ranges is not None:
+            cells = or_(*[Place.grid_cell.between(first, last) for first, last in ranges])
+            clause = and_(cells, clause)
+        return clause
+
+    def find_in_bbox(self, min_lat, min_lon, max_lat, max_lon, limit, fields=None):
+        """Return up to `limit` places inside the bounding box"""
+        query = self._with_fields(self.model.query, fields).filter(
+            self._bbox_clause(min_lat, min_lon, max_lat, max_lon))
+        return query.order_by(Place.id).limit(limit).all()
+
+    def find_near(self, lat, lon, radius_km, limit, fields=None):
+        """
+        Return [(place, distance_km), ...] within radius_km, nearest first.
+        Candidates come from the enclosing box as bare coordinate rows, so
+        only the places that make the cut are loaded as full objects.
+        """
+        hits = self._ranked_within(lat, lon, radius_km)
+        return self._load_ranked(hits[:limit], fields)
+
+    # Rows changed this long before the last seen updated_at are re-read
+    # on refresh, for transactions that committed after a later one
+    NEAREST_REFRESH_SLACK = timedelta(seconds=60)
+
+    def find_nearest(self, place_id, k, fields=None, marker=None):
+        """
+        Return the k places nearest to a place, excluding itself, as
+        [(place, distance_km)], or None if the place does not exist.
+
+        The search runs on a per-process NearestIndex of coordinates, so
+        only the k winners are read from the database. marker is the
+        places get_version() the caller already read (it is queried
+        otherwise); when it moves on, rows updated since the last refresh
+        are re-read, and the index is rebuilt if places were deleted.
+        """
+        marker = marker or self.get_version()
+        with self._nearest_lock:
+            index = self._nearest_index(marker)
+            origin = index.get(place_id)
+            if origin is None:
+                return None
+            hits = index.nearest(origin[0], origin[1], k, exclude=place_id)
+        return self._load_ranked(hits, fields)
+
+    def drop_nearest_index(self):
+        with self._nearest_lock:
+            self._nearest, self._nearest_marker = None, None
+
+    def _nearest_index(self, marker):
+        """The coordinate index, brought up to marker = (count, max(updated_at))"""
+        coordinates = db.session.query(Place.id, Place.latitude, Place.longitude)
+        if self._nearest is not None and marker != self._nearest_marker:
+            stamp = self._nearest_marker[1]
+            if stamp is not None:
+                for place_id, lat, lon in coordinates.filter(
+                        Place.updated_at >= stamp - self.NEAREST_REFRESH_SLACK):
+                    self._nearest.upsert(place_id, lat, lon)
+            if stamp is None or len(self._nearest) != marker[0]:
+                # Upserts only add rows, so a count mismatch means deletions
+                self._nearest = None
+        if self._nearest is None:
+            self._nearest = NearestIndex(coordinates)
+        self._nearest_marker = marker
+        return self._nearest
+
+    def _ranked_within(self, lat, lon, radius_km):
+        """[(distance_km, place_id), ...] within radius_km, nearest first"""
+        candidates = db.session.query(Place.id, Place.latitude, Place.longitude).filter(
+            self._bbox_clause(*radius_bbox(lat, lon, radius_km))).all()
+        hits = []
+        for place_id, p_lat, p_lon in candidates:
+            distance = haversine_km(lat, lon, p_lat, p_lon)
+            if distance <= radius_km:
+                hits.append((distance, place_id))
+        hits.sort()
+        return hits
+
+    def _load_ranked(self, hits, fields):
+        """Load the places of [(distance, place_id), ...] keeping that order"""
+        if not hits:
+            return []
+        ids = [place_id for _, place_id in hits]
+        places = {p.id: p for p in self._with_fields(self.model.query, fields).filter(
+            Place.id.in_(ids)).all()}
+        return [(places[place_id], distance) for distance, place_id in hits
+                if place_id in places]
+
+    def backfill_grid_cells(self, batch_size=1000):
+        """Populate grid_cell on rows created before the column existed"""
+        updated = 0
+        while True:
+            batch = self.model.query.filter(Place.grid_cell.is_(None)).limit(batch_size).all()
+            if not batch:
+                return updated
+            for place in batch:
+                place._refresh_grid_cell(place.latitude, place.longitude)
+            db.session.commit()
+            updated += len(batch)
+
+    def lock_for_booking(self, place_id):
+        """
+        Take the place row's write lock for the rest of the transaction by
+        bumping booking_version. Booking writes for one place queue behind
+        each other across workers while other places proceed; updated_at
+        is kept so place ETags and caches are unaffected. Returns False if
+        the place does not exist.
+        """
+        result = db.session.execute(
+            update(Place).where(Place.id == place_id).values(
+                booking_version=Place.booking_version + 1,
+                updated_at=Place.updated_at),
+            execution_options={'synchronize_session': False})
+        return result.rowcount == 1
+
+    def get_booking_version(self, place_id):
+        """A place's booking_version (keys its cached calendars), None if it does not exist"""
+        return db.session.query(Place.booking_version).filter(Place.id == place_id).scalar()
+
+    # avg_rating is recomputed in a second statement: MySQL evaluates SET
+    # assignments left to right, so one statement would see mixed values
+    _AVG_RATING = case(
+        (Place.review_count > 0, cast(Place.rating_sum, Float) / Place.review_count),
+        else_=None)
+
+    def apply_rating_delta(self, place_id, count_delta, sum_delta):
+        """
+        Adjust a place's review aggregates in the caller's transaction with
+        relative UPDATEs, so concurrent review writes never lose increments.
+        """
+        db.session.execute(
+            update(Place).where(Place.id == place_id).values(
+                review_count=Place.review_count + count_delta,
+                rating_sum=Place.rating_sum + sum_delta))
+        db.session.execute(
+            update(Place).where(Place.id == place_id).values(
+                avg_rating=self._AVG_RATING))
+
+    def rebuild_rating_aggregates(self):
+        """
+        Recompute every place's review aggregates from the reviews table
+        and return how many places had drifted. Only those rows are
+        written, so their updated_at advances and ETags and cached bodies
+        carrying the wrong ratings are dropped; the rest keep theirs.
+        """
+        count = select(func.count(Review.id)).where(
+            Review.place_id == Place.id).scalar_subquery()
+        total = select(func.coalesce(func.sum(Review.rating), 0)).where(
+            Review.place_id == Place.id).scalar_subquery()
+        average = case((count > 0, cast(total, Float) / count), else_=None)
+        result = db.session.execute(
+            update(Place).where(or_(Place.review_count != count, Place.rating_sum != total,
+                                    Place.avg_rating.is_distinct_from(average)))
+            .values(review_count=count, rating_sum=total),
+            execution_options={'synchronize_session': False})
+        db.session.execute(
+            update(Place).where(Place.avg_rating.is_distinct_from(self._AVG_RATING))
+            .values(avg_rating=self._AVG_RATING),
+            execution_options={'synchronize_session': False})
+        db.session.commit()
+        return result.rowcount
+
+    def index_text(self, place):
+        """Replace a place's rows in the text index (the caller commits)"""
+        db.session.flush()
+        db.session.execute(delete(place_terms).where(place_terms.c.place_id == place.id))
+        rows = self._term_rows(place)
+        if rows:
+            db.session.execute(insert(place_terms), rows)
+
+    def add_text(self, places):
+        """Index places that have no rows yet, in one batched INSERT (the caller commits)"""
+        db.session.flush()
+        rows = [row for place in places for row in self._term_rows(place)]
+        if rows:
+            db.session.execute(insert(place_terms), rows)
+
+    @staticmethod
+    def _term_rows(place):
+        return [{'term': term, 'place_id': place.id, 'weight': weight}
+                for term, weight in term_weights(place.title, place.description).items()]
+
+    def remove_text(self, place_ids):
+        """Drop index rows of places about to be deleted (the caller commits)"""
+        db.session.execute(delete(place_terms).where(place_terms.c.place_id.in_(place_ids)))
+
+    def text_search(self, terms, limit, cursor=None, fields=None):
+        """
+        One page of (place, score) pairs matching any of `terms`, best first.
+
+        Scores are BM25-style: the stored per-document weights times each
+        term's idf, summed by a single GROUP BY over the index rows of the
+        query terms. Relevance order has no stable seek key, so the cursor
+        carries an offset.
+        """
+        offset = decode_cursor(cursor, 1)[0][0] if cursor else 0
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError("Invalid cursor")
+        terms = list(dict.fromkeys(terms))
+        doc_freq = dict(db.session.query(place_terms.c.term, func.count()).filter(
+            place_terms.c.term.in_(terms)).group_by(place_terms.c.term).all())
+        if not doc_freq:
+            return Page([], None, None, limit)
+
+        total = db.session.query(func.count(Place.id)).scalar()
+        term_idf = case({term: idf(total, n) for term, n in doc_freq.items()},
+                        value=place_terms.c.term)
+        score = func.sum(place_terms.c.weight * term_idf).label('score')
+        rows = db.session.query(place_terms.c.place_id, score).join(
+            Place, Place.id == place_terms.c.place_id
+        ).filter(place_terms.c.term.in_(doc_freq)).group_by(
+            place_terms.c.place_id
+        ).order_by(score.desc(), place_terms.c.place_id).offset(offset).limit(limit + 1).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        places = {p.id: p for p in self._with_fields(self.model.query, fields).filter(
+            Place.id.in_([place_id for place_id, _ in rows])).all()} if rows else {}
+        items = [(places[place_id], score) for place_id, score in rows if place_id in places]
+        next_cursor = encode_cursor([offset + limit], 'next') if has_more else None
+        prev_cursor = encode_cursor([max(offset - limit, 0)], 'prev') if offset else None
+        return Page(items, next_cursor, prev_cursor, limit)
+
+    def rebuild_text_index(self, batch_size=500):
+        """Rebuild the text index from every place, committing per batch"""
+        db.session.execute(delete(place_terms))
+        db.session.commit()
+        indexed = 0
+        cursor = None
+        while True:
+            query = self.model.query.options(load_only(
+                *self.PAGE_KEY, Place.title, Place.description))
+            page = keyset_paginate(query, self.PAGE_KEY, batch_size, cursor)
+            self.add_text(page.items)
+            db.session.commit()
+            indexed += len(page.items)
+            if not page.next_cursor:
+                return indexed
+            cursor = page.next_cursor
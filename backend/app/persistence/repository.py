@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from app.extensions import db
+from sqlalchemy import func
 
 
 class Repository(ABC):
@@ -57,3 +58,13 @@ class SQLAlchemyRepository(Repository):
 
     def get_by_attribute(self, attr_name, attr_value):
         return self.model.query.filter(getattr(self.model, attr_name) == attr_value).first()
+
+    def get_version(self, *criteria):
+        """
+        Return (row count, latest updated_at) for the matching rows: a
+        cheap aggregate that changes whenever a row is added, removed or
+        updated, used to build ETags without loading the rows.
+        """
+        return tuple(db.session.query(
+            func.count(self.model.id), func.max(self.model.updated_at)
+        ).filter(*criteria).one())
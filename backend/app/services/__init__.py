@@ -1,3 +1,5 @@
 from app.services.facade import HBnBFacade
+from app.services.payment_gateway import PaymentGateway
 
 facade = HBnBFacade()
+payment_gateway = PaymentGateway()
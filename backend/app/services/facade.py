@@ -2,24 +2,118 @@ from app.persistence.repository import SQLAlchemyRepository
 from app.persistence.user_repository import UserRepository
 from app.persistence.review_repository import ReviewRepository
 from app.persistence.booking_repository import BookingRepository
+from app.persistence.booking_hold_repository import BookingHoldRepository
+from app.persistence.booking_stats_repository import (
+    COUNTED_STATUSES, BookingStatsRepository, add_months)
+from app.persistence.idempotency_repository import IdempotencyRepository
+from app.persistence.payment_event_repository import PaymentEventRepository
+from app.persistence.place_repository import PlaceRepository
+from app.persistence.pagination import clamp_limit
+from app.utils.cache import TTLCache
+from app.utils.text import tokenize
 from app.models.place import Place
 from app.models.user import User
 from app.models.review import Review
 from app.models.amenity import Amenity
 from app.models.booking import Booking
+from app.models.booking_hold import BookingHold
 from app.extensions import db
 import bleach
+import time
+from flask import current_app
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import selectinload
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
+
+
+PLACE_FIELDS = ('title', 'description', 'price', 'latitude', 'longitude')
+DESCRIPTION_TAGS = ['p', 'br', 'strong', 'em', 'ul', 'ol', 'li']
+
+
+def _clean_text(value, tags=()):
+    """
+    bleach.clean with a fast path: text with no markup, entities or
+    control characters comes back from bleach unchanged, so skip the
+    html5lib parse for it (the common case on bulk imports).
+    """
+    value = value or ""
+    if ('<' not in value and '>' not in value and '&' not in value
+            and value.replace('\t', '').replace('\n', '').isprintable()):
+        return value
+    return bleach.clean(value, tags=list(tags), strip=True)
+
+
+def _clean_place_fields(data):
+    """Return the place fields of a payload, all present and text sanitized"""
+    for field in PLACE_FIELDS:
+        if field not in data:
+            raise ValueError(f"Missing field: {field}")
+    clean = {field: data[field] for field in PLACE_FIELDS}
+    clean['title'] = _clean_text(clean['title'])
+    clean['description'] = _clean_text(clean['description'], DESCRIPTION_TAGS)
+    return clean
+
+
+def _to_date(value):
+    """Accept a date or a YYYY-MM-DD string"""
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    return value
 
 
 class HBnBFacade:
     def __init__(self):
         self.user_repo = UserRepository()
-        self.place_repo = SQLAlchemyRepository(Place)
+        self.place_repo = PlaceRepository()
         self.review_repo = ReviewRepository()
         self.amenity_repo = SQLAlchemyRepository(Amenity)
         self.booking_repo = BookingRepository()
+        self.hold_repo = BookingHoldRepository()
+        self.stats_repo = BookingStatsRepository()
+        self.payment_event_repo = PaymentEventRepository()
+        self.idempotency_repo = IdempotencyRepository()
+        # Serialized place payloads keyed by ('place', id) and ('places', ...),
+        # plus booking calendars keyed by ('calendar', place_id, from, to)
+        self.place_cache = TTLCache()
+
+    def init_app(self, app):
+        """Apply cache settings from the app config and start from a cold cache"""
+        self.place_cache.configure(
+            maxsize=app.config.get('PLACE_CACHE_MAXSIZE', 512),
+            ttl=app.config.get('PLACE_CACHE_TTL', 30),
+            enabled=app.config.get('PLACE_CACHE_ENABLED', True))
+        self.place_repo.drop_nearest_index()
+
+    #  _________________Place Cache____________________
+
+    def cached_place_read(self, key, version, producer):
+        """
+        Return the cached payload for key, building it with producer() on a
+        miss. Keys start with 'place' (one place) or 'places' (list queries).
+
+        Payloads are stored with the change marker they were built under
+        and only served while it still matches, so a write made by another
+        worker (whose invalidation never reaches this cache) is picked up
+        on the next read instead of being served under the new ETag.
+        """
+        entry = self.place_cache.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        body = producer()
+        if body is not None:
+            self.place_cache.set(key, (version, body))
+        return body
+
+    def invalidate_place(self, place_id=None):
+        """Drop one place's payload and every cached list that may embed it"""
+        if place_id is not None:
+            self.place_cache.delete(('place', place_id))
+            self.invalidate_calendar(place_id)
+        self.place_cache.delete_prefix(('places',))
+
+    def invalidate_calendar(self, place_id):
+        """Drop every cached calendar window of a place"""
+        self.place_cache.delete_prefix(('calendar', place_id))
 
      #  _________________User Operations____________________
 
@@ -53,7 +147,69 @@ class HBnBFacade:
 
     def delete_user(self, user_id):
         """Delete a user using repository"""
+        # The user's reviews go with them; take them out of place aggregates
+        for review in self.review_repo.get_review_by_user_id(user_id):
+            self.place_repo.apply_rating_delta(review.place_id, -1, -review.rating)
+        owned = [place_id for place_id, in
+                 db.session.query(Place.id).filter(Place.owner_id == user_id)]
+        self.place_repo.remove_text(owned)
+        # Their stays leave other hosts' rollups; their own places' rows go
+        self.stats_repo.record(db.session.query(
+            Booking.place_id, Booking.check_in_date, Booking.check_out_date,
+            Booking.total_price).filter(
+            Booking.guest_id == user_id,
+            Booking.status.in_(COUNTED_STATUSES),
+            Booking.place_id.notin_(owned)).all(), -1)
+        self.stats_repo.remove_places(owned)
         self.user_repo.delete(user_id)
+        # Their places and reviews cascade away with them
+        self.place_cache.clear()
+
+    #  _________________Change Markers____________________
+    # Cheap aggregates (count, max(updated_at)) the API turns into ETags.
+    # updated_at keeps microseconds (DATETIME(6) on MySQL), so writes made
+    # within the same second still change the marker.
+
+    def get_places_version(self, include_bookings=False):
+        """
+        Marker for place collections, which embed amenities and reviews.
+        include_bookings adds bookings and active holds, for date filters.
+        """
+        markers = (self.place_repo.get_version(),
+                   self.amenity_repo.get_version(),
+                   self.review_repo.get_version())
+        if include_bookings:
+            markers += (self.booking_repo.get_version(), self.hold_repo.get_active_version())
+        return markers
+
+    def get_place_version(self, place_id):
+        """Marker for one place with its reviews and amenities, None if missing"""
+        place_marker = self.place_repo.get_version(Place.id == place_id)
+        if not place_marker[0]:
+            return None
+        return (place_marker,
+                self.review_repo.get_version(Review.place_id == place_id),
+                self.amenity_repo.get_version(Amenity.places.any(Place.id == place_id)))
+
+    def get_amenities_version(self, amenity_id=None):
+        if amenity_id is None:
+            return self.amenity_repo.get_version()
+        return self.amenity_repo.get_version(Amenity.id == amenity_id)
+
+    def get_reviews_version(self, place_id=None, review_id=None):
+        criteria = []
+        if place_id is not None:
+            criteria.append(Review.place_id == place_id)
+        if review_id is not None:
+            criteria.append(Review.id == review_id)
+        return self.review_repo.get_version(*criteria)
+
+    def get_reviewers_version(self, place_id):
+        """Marker for the reviews of a place plus their authors' names"""
+        reviewer_ids = db.session.query(Review.user_id).filter(
+            Review.place_id == place_id)
+        return (self.get_reviews_version(place_id=place_id),
+                self.user_repo.get_version(User.id.in_(reviewer_ids)))
 
     #  _________________Place Operations____________________
 
@@ -62,36 +218,172 @@ class HBnBFacade:
 
     # Placeholder method for creating a place
     def create_place(self, data):
-        required_fields = ['title', 'description',
-                           'price', 'latitude', 'longitude', 'owner_id']
-        for field in required_fields:
-            if field not in data:
-                raise ValueError(f"Missing field: {field}")
-        # Convert owner_id to owner object
+        clean = _clean_place_fields(data)
+        if 'owner_id' not in data:
+            raise ValueError("Missing field: owner_id")
         owner = self.get_user(data['owner_id'])
         if not owner:
             raise ValueError("Owner not found")
-        data['owner'] = owner
-        data.pop('owner_id')  # Remove owner_id so Place doesn't get it
-        # Sanitize free-form text fields
-        data['title'] = bleach.clean(data['title'] or "", strip=True)
-        data['description'] = bleach.clean(
-            data['description'] or "",
-            tags=['p', 'br', 'strong', 'em', 'ul', 'ol', 'li'],
-            strip=True
-        )
-        place = Place(**data)
-        self.place_repo.add(place)
+        place = Place(owner=owner, **clean)
+        # The place and its text index rows are committed together
+        db.session.add(place)
+        self.place_repo.index_text(place)
+        db.session.commit()
+        self.invalidate_place()
         return place
 
+    def import_places(self, rows, owner_id, chunk_size=None):
+        """
+        Create places from an iterable of payloads owned by owner_id and
+        return one result per row: {'index', 'status', 'id' | 'error'}.
+
+        Rows are validated and sanitized chunk by chunk; each chunk's valid
+        places and their text index rows are written with batched INSERTs
+        and a single commit. A row that is not a dict (e.g. a ValueError
+        from the caller's parser) is reported as failed.
+        """
+        if not self.get_user(owner_id):
+            raise ValueError("Owner not found")
+        chunk_size = chunk_size or current_app.config.get('PLACE_IMPORT_CHUNK_SIZE', 500)
+        results = []
+        chunk = []
+        for index, row in enumerate(rows):
+            try:
+                if isinstance(row, Exception):
+                    raise row
+                if not isinstance(row, dict):
+                    raise ValueError("Row must be a JSON object")
+                chunk.append((index, Place(owner_id=owner_id, **_clean_place_fields(row))))
+            except (ValueError, TypeError) as e:
+                results.append({'index': index, 'status': 'error', 'error': str(e)})
+            if len(chunk) >= chunk_size:
+                results.extend(self._insert_place_chunk(chunk))
+                chunk = []
+        if chunk:
+            results.extend(self._insert_place_chunk(chunk))
+        self.invalidate_place()
+        results.sort(key=lambda result: result['index'])
+        return results
+
+    def _insert_place_chunk(self, chunk):
+        places = [place for _, place in chunk]
+        try:
+            db.session.add_all(places)
+            self.place_repo.add_text(places)
+            # Read ids before the commit expires them (one SELECT per row)
+            results = [{'index': index, 'status': 'created', 'id': place.id}
+                       for index, place in chunk]
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            return [{'index': index, 'status': 'error', 'error': 'Database error'}
+                    for index, _ in chunk]
+        return results
+
+    def resolve_place_fields(self, fields=None, view=None):
+        """
+        Turn a fields list or a named view into the tuple of place fields to
+        load. None means the full representation.
+        """
+        if view is not None and view not in ('summary', 'full'):
+            raise ValueError("view must be 'summary' or 'full'")
+        if fields:
+            unknown = set(fields) - set(PlaceRepository.FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown place field(s): {', '.join(sorted(unknown))}")
+            return tuple(dict.fromkeys(['id'] + list(fields)))
+        if view == 'summary':
+            return PlaceRepository.SUMMARY_FIELDS
+        return None
+
     # Placeholder method for fetching all places
-    def get_all_places(self):
-        # Use eager loading to fetch amenities and reviews in one query
-        places = db.session.query(Place).options(
-            selectinload(Place.amenities),
-            selectinload(Place.reviews)
-        ).all()
-        return places
+    def get_all_places(self, fields=None):
+        # Only the requested columns are selected; amenities and reviews are
+        # eager loaded in one extra query each when they are requested
+        return self.place_repo.list_places(fields)
+
+    def _page_limit(self, limit):
+        return clamp_limit(limit,
+                           current_app.config.get('PAGE_SIZE_DEFAULT', 20),
+                           current_app.config.get('PAGE_SIZE_MAX', 100))
+
+    def get_places_page(self, limit=None, cursor=None, fields=None):
+        """Return one cursor page of places ordered by (created_at, id)"""
+        return self.place_repo.get_page(self._page_limit(limit), cursor, fields)
+
+    def search_places(self, limit=None, cursor=None, min_price=None, max_price=None,
+                      amenity_ids=None, check_in=None, check_out=None, fields=None):
+        """
+        Return one cursor page of places filtered by price range, a required
+        amenity set and availability between check_in and check_out
+        """
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise ValueError("min_price cannot be greater than max_price")
+        if (check_in is None) != (check_out is None):
+            raise ValueError("check_in and check_out must be given together")
+        if check_in is not None:
+            check_in, check_out = _to_date(check_in), _to_date(check_out)
+            if check_out <= check_in:
+                raise ValueError("Check-out date must be after check-in date")
+        return self.place_repo.search(
+            self._page_limit(limit), cursor,
+            min_price=min_price, max_price=max_price, amenity_ids=amenity_ids,
+            check_in=check_in, check_out=check_out, fields=fields)
+
+    def search_available_places(self, check_in=None, check_out=None, **filters):
+        """
+        Return one cursor page of places with no pending or confirmed
+        booking overlapping [check_in, check_out), narrowed by any other
+        search_places filter. The booking test is a NOT EXISTS anti-join
+        in the same SELECT, not a check per place.
+        """
+        if not check_in or not check_out:
+            raise ValueError("check_in and check_out are required")
+        return self.search_places(check_in=check_in, check_out=check_out, **filters)
+
+    def _map_limit(self, limit):
+        return clamp_limit(limit,
+                           current_app.config.get('MAP_RESULT_MAX', 500),
+                           current_app.config.get('MAP_RESULT_MAX', 500))
+
+    def search_places_in_bbox(self, min_lat, min_lon, max_lat, max_lon, limit=None, fields=None):
+        """Return places inside a bounding box; min_lon > max_lon wraps the antimeridian"""
+        if not (-90.0 <= min_lat <= max_lat <= 90.0):
+            raise ValueError("Invalid latitude range")
+        if not (-180.0 <= min_lon <= 180.0 and -180.0 <= max_lon <= 180.0):
+            raise ValueError("Invalid longitude range")
+        return self.place_repo.find_in_bbox(
+            min_lat, min_lon, max_lat, max_lon, self._map_limit(limit), fields)
+
+    def search_places_near(self, lat, lon, radius_km, limit=None, fields=None):
+        """Return [(place, distance_km), ...] within radius_km of a point"""
+        if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+            raise ValueError("Invalid coordinates")
+        if radius_km <= 0:
+            raise ValueError("radius_km must be positive")
+        return self.place_repo.find_near(lat, lon, radius_km, self._map_limit(limit), fields)
+
+    def get_nearby_places(self, place_id, k=None, fields=None, marker=None):
+        """
+        Return the k places nearest to a place, excluding itself, as
+        [(place, distance_km), ...], or None if the place does not exist.
+        marker is the place_repo version the caller already read, if any.
+        """
+        k = clamp_limit(k, current_app.config.get('NEARBY_DEFAULT', 10),
+                        current_app.config.get('NEARBY_MAX', 50))
+        return self.place_repo.find_nearest(place_id, k, fields, marker)
+
+    def export_places(self, batch_size=None):
+        """Stream every place as a flat dict (see PlaceRepository.stream_export)"""
+        return self.place_repo.stream_export(
+            batch_size or current_app.config.get('PLACE_EXPORT_BATCH_SIZE', 1000))
+
+    def search_places_text(self, q, limit=None, cursor=None, fields=None):
+        """Return one page of (place, score) pairs matching the words of q, best first"""
+        if not q or not q.strip():
+            raise ValueError("q must not be empty")
+        return self.place_repo.text_search(
+            tokenize(q), self._page_limit(limit), cursor, fields)
 
     # Placeholder method for fetching a place by ID
     def get_place(self, place_id):
@@ -108,7 +400,12 @@ class HBnBFacade:
         for key in ['title', 'description', 'price', 'latitude', 'longitude']:
             if key in place_data:
                 update_dict[key] = place_data[key]
-        self.place_repo.update(place_id, update_dict)
+        for key, value in update_dict.items():
+            setattr(place, key, value)
+        if 'title' in update_dict or 'description' in update_dict:
+            self.place_repo.index_text(place)
+        db.session.commit()
+        self.invalidate_place(place_id)
         return self.place_repo.get(place_id)
 
     # Placeholder method for deleting a place
@@ -117,7 +414,10 @@ class HBnBFacade:
         place = self.place_repo.get(place_id)
         if not place:
             return None
+        self.place_repo.remove_text([place_id])
+        self.stats_repo.remove_places([place_id])
         self.place_repo.delete(place_id)
+        self.invalidate_place(place_id)
         return place
 
     def add_amenity_to_place(self, place_id, amenity_id, user):
@@ -130,7 +430,9 @@ class HBnBFacade:
         if place.owner_id != user.id and not getattr(user, 'is_admin', False):
             raise PermissionError("Unauthorized")
         place.add_amenity(amenity, user)
+        place.save()  # link changes are part of the place's version
         db.session.commit()
+        self.invalidate_place(place_id)
         return amenity
 
     def delete_amenity_from_place(self, place_id, amenity_id, user):
@@ -144,7 +446,9 @@ class HBnBFacade:
             raise PermissionError("Unauthorized")
 
         place.remove_amenity(amenity, user)
+        place.save()
         db.session.commit()
+        self.invalidate_place(place_id)
         return True
 
     def get_place_with_details(self, place_id):
@@ -197,6 +501,8 @@ class HBnBFacade:
                 update_dict[key] = value
 
         self.amenity_repo.update(amenity_id, update_dict)
+        # Amenity names are embedded in every place payload that links them
+        self.place_cache.clear()
         return self.amenity_repo.get(amenity_id)
 
     def get_amenities_for_place(self, place_id):
@@ -212,6 +518,7 @@ class HBnBFacade:
         if not amenity:
             return None
         self.amenity_repo.delete(amenity_id)
+        self.place_cache.clear()
         return amenity
 
     def get_all_amenities(self):
@@ -243,7 +550,10 @@ class HBnBFacade:
             place=place,
             user=user
         )
-        self.review_repo.add(review)
+        db.session.add(review)
+        self.place_repo.apply_rating_delta(place.id, 1, review.rating)
+        db.session.commit()
+        self.invalidate_place(place.id)
         return review
 
     def get_review(self, review_id):
@@ -267,8 +577,13 @@ class HBnBFacade:
                 tags=['p', 'br', 'strong', 'em'],
                 strip=True
             )
+        old_rating = review.rating
         review.rating = review_data.get('rating', review.rating)
+        if review.rating != old_rating:
+            self.place_repo.apply_rating_delta(
+                review.place_id, 0, review.rating - old_rating)
         db.session.commit()
+        self.invalidate_place(review.place_id)
         return review
 
     def delete_review(self, review_id, user):
@@ -277,13 +592,20 @@ class HBnBFacade:
             return None
         if review.user.id != user.id and not getattr(user, 'is_admin', False):
             raise PermissionError("Unauthorized action.")
-        self.review_repo.delete(review_id)
+        db.session.delete(review)
+        self.place_repo.apply_rating_delta(review.place_id, -1, -review.rating)
+        db.session.commit()
+        self.invalidate_place(review.place_id)
         return True
 
  #  _________________Booking Operations____________________
 
-    def create_booking(self, booking_data):
-        """Create a new booking with availability check"""
+    def create_booking(self, booking_data, event=None):
+        """
+        Create a new booking with availability check. event, an
+        (event_id, event_type) pair, is recorded as processed in the same
+        transaction (see process_payment_event).
+        """
         # Validate required fields
         required_fields = ['place_id', 'guest_id', 'check_in_date', 'check_out_date']
         for field in required_fields:
@@ -313,19 +635,13 @@ class HBnBFacade:
         if isinstance(check_out, str):
             check_out = datetime.strptime(check_out, '%Y-%m-%d').date()
 
-        # Check availability
-        is_available = self.booking_repo.check_availability(
-            place.id, check_in, check_out
-        )
-        if not is_available:
-            raise ValueError("Place is not available for selected dates")
-
         # Create booking
         booking = Booking(
             place_id=place.id,
             guest_id=guest.id,
             check_in_date=check_in,
-            check_out_date=check_out
+            check_out_date=check_out,
+            payment_intent_id=booking_data.get('payment_intent_id')
         )
 
         # Validate dates
@@ -334,10 +650,188 @@ class HBnBFacade:
         # Calculate total price
         booking.calculate_total_price(place.price)
 
-        # Save booking
-        self.booking_repo.add(booking)
+        # Check availability and insert atomically: concurrent bookings of
+        # this place wait on its row lock until we commit or roll back
+        try:
+            if not self.place_repo.lock_for_booking(place.id):
+                raise ValueError("Place not found")
+            if not self.booking_repo.check_availability(
+                    place.id, check_in, check_out, for_update=True, holder_id=guest.id):
+                raise ValueError("Place is not available for selected dates")
+            db.session.add(booking)
+            # The guest's hold on these dates has served its purpose
+            self.hold_repo.delete_for_user(place.id, guest.id, check_in, check_out)
+            self.stats_repo.record([booking])
+            if event:
+                self.payment_event_repo.add(*event, 'booked')
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        self.invalidate_calendar(booking.place_id)
         return booking
 
+    def get_booking_by_payment_intent(self, payment_intent_id):
+        """The booking paid for by a payment intent, or None"""
+        return Booking.query.filter_by(payment_intent_id=payment_intent_id).first()
+
+    def book_paid_intent(self, intent, event=None):
+        """
+        Create the booking a succeeded payment intent paid for, from its
+        metadata (set by POST /payments/create-payment-intent), and return
+        (booking, created). The amount must match the place's price for
+        the stay. A booking already made for the intent, e.g. by a
+        concurrent webhook delivery, is returned instead of a new one.
+        Raises ValueError when the intent cannot be turned into a booking.
+        """
+        existing = self.get_booking_by_payment_intent(intent.id)
+        if existing:
+            return existing, False
+        if intent.status != 'succeeded':
+            raise ValueError(f"Payment not completed. Status: {intent.status}")
+        metadata = intent.metadata or {}
+        if not all(metadata.get(key) for key in
+                   ('user_id', 'place_id', 'check_in_date', 'check_out_date')):
+            raise ValueError("Payment intent metadata missing")
+        place = self.place_repo.get(metadata['place_id'])
+        if not place:
+            raise ValueError("Place not found")
+        check_in, check_out = _to_date(metadata['check_in_date']), _to_date(metadata['check_out_date'])
+        nights = (check_out - check_in).days
+        if nights <= 0:
+            raise ValueError("Booking must be at least 1 night")
+        expected_cents = int(round(place.price * nights * 100))
+        if intent.amount != expected_cents:
+            raise ValueError("Payment amount does not match booking total")
+        if metadata.get('expected_amount_cents') not in (None, str(expected_cents)):
+            raise ValueError("Payment metadata amount mismatch")
+
+        try:
+            booking = self.create_booking({
+                'place_id': place.id, 'guest_id': metadata['user_id'],
+                'check_in_date': check_in, 'check_out_date': check_out,
+                'payment_intent_id': intent.id}, event)
+        except (ValueError, IntegrityError):
+            # Lost a race against another delivery booking the same intent
+            existing = self.get_booking_by_payment_intent(intent.id)
+            if existing:
+                return existing, False
+            raise
+        return booking, True
+
+    def process_payment_event(self, event_id, event_type, intent):
+        """
+        Apply a verified payment webhook event at most once and return its
+        outcome: 'duplicate' for a redelivery, 'booked' or 'exists' for a
+        succeeded intent, 'rejected: <reason>' when its booking cannot be
+        made (the payment then needs a manual refund), else 'ignored'.
+        Unexpected errors propagate so the provider retries the delivery.
+        """
+        if self.payment_event_repo.seen(event_id):
+            return 'duplicate'
+        if event_type != 'payment_intent.succeeded':
+            outcome = 'ignored'
+        else:
+            try:
+                booking, created = self.book_paid_intent(intent, (event_id, event_type))
+            except ValueError as e:
+                outcome = f"rejected: {e}"
+                current_app.logger.warning(
+                    "Payment %s succeeded without a booking: %s", intent.id, e)
+            else:
+                if created:
+                    return 'booked'
+                outcome = 'exists'
+        if not self.payment_event_repo.record(event_id, event_type, outcome):
+            return 'duplicate'
+        return outcome
+
+    def create_booking_hold(self, place_id, user_id, check_in, check_out):
+        """
+        Reserve a place's dates for user_id for BOOKING_HOLD_MINUTES while
+        they pay. Any earlier hold of theirs on the place is replaced. Runs
+        under the same per-place lock as create_booking, so two guests can
+        never hold or book overlapping dates.
+        """
+        check_in, check_out = _to_date(check_in), _to_date(check_out)
+        if check_out <= check_in:
+            raise ValueError("Check-out date must be after check-in date")
+        place = self.place_repo.get(place_id)
+        if not place:
+            raise ValueError("Place not found")
+        if place.owner_id == user_id:
+            raise ValueError("You cannot book your own place")
+
+        minutes = current_app.config.get('BOOKING_HOLD_MINUTES', 15)
+        hold = BookingHold(place_id=place_id, user_id=user_id,
+                           check_in_date=check_in, check_out_date=check_out,
+                           expires_at=datetime.utcnow() + timedelta(minutes=minutes))
+        try:
+            self.place_repo.lock_for_booking(place_id)
+            if not self.booking_repo.check_availability(
+                    place_id, check_in, check_out, for_update=True, holder_id=user_id):
+                raise ValueError("Place is not available for selected dates")
+            self.hold_repo.delete_for_user(place_id, user_id)
+            db.session.add(hold)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        self.invalidate_calendar(place_id)
+        return hold
+
+    def attach_hold_payment(self, hold_id, payment_intent_id):
+        """Record the payment intent a hold was created for"""
+        self.hold_repo.update(hold_id, {'payment_intent_id': payment_intent_id})
+
+    def release_booking_hold(self, hold_id):
+        """Give a hold's dates back, e.g. when the payment could not be started"""
+        hold = self.hold_repo.get(hold_id)
+        if hold:
+            place_id = hold.place_id
+            self.place_repo.lock_for_booking(place_id)
+            self.hold_repo.delete(hold_id)
+            self.invalidate_calendar(place_id)
+
+    def sweep_expired_holds(self, batch_size=1000):
+        """Purge expired holds in batches; returns how many were deleted"""
+        return self.hold_repo.purge_expired(batch_size)
+
+    def run_booking_maintenance(self, batch_size=1000):
+        """
+        Periodic job: complete confirmed bookings past check-out, count
+        stale pending ones and purge expired holds, all with batched
+        set-based statements. Returns counts and seconds per step.
+
+        Pending bookings are paid and waiting for the host, so stale ones
+        are only reported: cancelling them would keep the guest's money.
+        """
+        today = date.today()
+        stale_before = datetime.utcnow() - timedelta(
+            hours=current_app.config.get('PENDING_BOOKING_TTL_HOURS', 48))
+        report = {}
+
+        started = time.perf_counter()
+        report['completed'], completed_places = self.booking_repo.complete_finished(
+            today, batch_size)
+        report['completed_seconds'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        report['stale_pending'] = self.booking_repo.count_stale_pending(stale_before, today)
+        report['stale_seconds'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        report['holds_purged'] = self.hold_repo.purge_expired(batch_size)
+        report['holds_seconds'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        report['keys_purged'] = self.idempotency_repo.purge_expired(batch_size)
+        report['keys_seconds'] = time.perf_counter() - started
+
+        for place_id in completed_places:
+            self.invalidate_calendar(place_id)
+        return report
+
     def get_booking(self, booking_id):
         """Get a booking by ID"""
         return self.booking_repo.get(booking_id)
@@ -362,6 +856,79 @@ class HBnBFacade:
         """Get past bookings for a user"""
         return self.booking_repo.get_past_bookings(user_id)
 
+    def _list_page(self, limit, cursor):
+        """None for an unpaginated list, else the clamped page size"""
+        if limit is None and cursor is None:
+            return None
+        return self._page_limit(limit)
+
+    def list_user_bookings(self, user_id, status=None, when=None, limit=None, cursor=None):
+        """
+        A guest's bookings as column rows (see BookingRepository.list_rows);
+        passing limit or cursor returns one keyset Page instead of a list
+        """
+        if when not in ('upcoming', 'past'):
+            when = None
+        return self.booking_repo.list_rows_for_guest(
+            user_id, status, when, self._list_page(limit, cursor), cursor)
+
+    def list_place_bookings(self, place_id, status=None, limit=None, cursor=None):
+        """A place's bookings as column rows, or one Page (see list_user_bookings)"""
+        return self.booking_repo.list_rows_for_place(
+            place_id, status, self._list_page(limit, cursor), cursor)
+
+    def get_host_stats(self, host_id, start=None, end=None):
+        """
+        Nights booked, occupancy and revenue per month for each place of
+        host_id, from the booking rollup. start and end are the first days
+        of the first and last month; by default the HOST_STATS_DEFAULT_MONTHS
+        months up to the current one. Places without bookings are listed
+        with zeros and count towards the totals' occupancy.
+        """
+        default = current_app.config.get('HOST_STATS_DEFAULT_MONTHS', 12)
+        maximum = current_app.config.get('HOST_STATS_MAX_MONTHS', 36)
+        if end is None:
+            end = add_months(start, default - 1) if start else date.today().replace(day=1)
+        if start is None:
+            start = add_months(end, 1 - default)
+        span = (end.year - start.year) * 12 + end.month - start.month + 1
+        if span < 1:
+            raise ValueError("from must not be after to")
+        if span > maximum:
+            raise ValueError(f"At most {maximum} months can be requested")
+        months = [add_months(start, i) for i in range(span)]
+        days = {month: (add_months(month, 1) - month).days for month in months}
+
+        places = {}
+        for place_id, title, month, bookings, nights, cents in self.stats_repo.for_host(
+                host_id, start, end):
+            place = places.setdefault(place_id, {'title': title, 'months': {}})
+            if month is not None:
+                place['months'][month] = (bookings, nights, cents)
+
+        def summary(bookings, nights, cents, available):
+            return {'bookings': bookings, 'nights_booked': nights,
+                    'occupancy_rate': round(nights / available, 4),
+                    'revenue': cents / 100}
+
+        result, totals = [], [0, 0, 0]
+        for place_id, place in places.items():
+            series, sums = [], [0, 0, 0]
+            for month in months:
+                counters = place['months'].get(month, (0, 0, 0))
+                series.append(dict(month=month.strftime('%Y-%m'),
+                                   **summary(*counters, days[month])))
+                sums = [a + b for a, b in zip(sums, counters)]
+            totals = [a + b for a, b in zip(totals, sums)]
+            result.append(dict(place_id=place_id, title=place['title'],
+                               **summary(*sums, sum(days.values())), months=series))
+        return {
+            'from': start.strftime('%Y-%m'),
+            'to': end.strftime('%Y-%m'),
+            'totals': summary(*totals, sum(days.values()) * max(len(result), 1)),
+            'places': result
+        }
+
     def check_place_availability(self, place_id, check_in, check_out):
         """Check if a place is available for given dates"""
         # Convert string dates if needed
@@ -372,6 +939,47 @@ class HBnBFacade:
 
         return self.booking_repo.check_availability(place_id, check_in, check_out)
 
+    def get_place_calendar(self, place_id, start=None, end=None):
+        """
+        Return the merged blocked date ranges of a place between start
+        (default today) and end (default CALENDAR_DEFAULT_DAYS later), or
+        None if the place does not exist. Cached per place and window
+        under the place's booking_version, which every booking and hold
+        write bumps, so writes from other workers are seen on the next
+        read; entries also expire when the window's next hold runs out.
+        """
+        start = _to_date(start) if start else date.today()
+        end = _to_date(end) if end else start + timedelta(
+            days=current_app.config.get('CALENDAR_DEFAULT_DAYS', 90))
+        if end <= start:
+            raise ValueError("to must be after from")
+        max_days = current_app.config.get('CALENDAR_MAX_DAYS', 366)
+        if (end - start).days > max_days:
+            raise ValueError(f"Calendar window cannot exceed {max_days} days")
+
+        version = self.place_repo.get_booking_version(place_id)
+        if version is None:
+            return None
+        key = ('calendar', place_id, start, end)
+        entry = self.place_cache.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        calendar = {
+            'place_id': place_id,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'blocked': [{'start': first.isoformat(), 'end': last.isoformat()}
+                        for first, last in self.booking_repo.get_blocked_ranges(
+                            place_id, start, end)]
+        }
+        ttl = None
+        next_expiry = self.hold_repo.next_expiry(place_id, start, end)
+        if next_expiry is not None:
+            ttl = min(self.place_cache.ttl,
+                      max((next_expiry - datetime.utcnow()).total_seconds(), 0))
+        self.place_cache.set(key, (version, calendar), ttl)
+        return calendar
+
     def cancel_booking(self, booking_id, user):
         """Cancel a booking"""
         booking = self.booking_repo.get(booking_id)
@@ -383,8 +991,19 @@ class HBnBFacade:
         if booking.guest_id != user.id and place.owner_id != user.id and not getattr(user, 'is_admin', False):
             raise PermissionError("You don't have permission to cancel this booking")
 
-        booking.cancel()
-        db.session.commit()
+        try:
+            # Place first, as create_booking does: bumps booking_version
+            self.place_repo.lock_for_booking(place.id)
+            # Row lock: two concurrent cancels must not both leave the rollup
+            booking = db.session.get(Booking, booking_id, with_for_update=True,
+                                     populate_existing=True)
+            booking.cancel()
+            self.stats_repo.record([booking], -1)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        self.invalidate_calendar(booking.place_id)
         return booking
 
     def confirm_booking(self, booking_id, user):
@@ -398,8 +1017,15 @@ class HBnBFacade:
         if place.owner_id != user.id and not getattr(user, 'is_admin', False):
             raise PermissionError("Only the place owner can confirm bookings")
 
-        booking.confirm()
-        db.session.commit()
+        try:
+            # Bumps booking_version, so cached calendars are rebuilt
+            self.place_repo.lock_for_booking(place.id)
+            booking.confirm()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        self.invalidate_calendar(booking.place_id)
         return booking
 
     def complete_booking(self, booking_id):
@@ -408,6 +1034,12 @@ class HBnBFacade:
         if not booking:
             raise ValueError("Booking not found")
 
-        booking.complete()
-        db.session.commit()
+        try:
+            self.place_repo.lock_for_booking(booking.place_id)
+            booking.complete()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        self.invalidate_calendar(booking.place_id)
         return booking
@@ -0,0 +1,326 @@
+"""
+Payment provider access shared by the payments and bookings APIs.
+
+Every call goes through one PaymentGateway per process, which adds what
+the bare SDK does not give us:
+
+* one pooled HTTP session with strict connect and read timeouts, so a
+  slow provider region costs a worker seconds, not minutes;
+* retries with exponential backoff and full jitter, only for calls that
+  are safe to repeat (reads, and creates carrying an idempotency key);
+* a circuit breaker that fails fast with PaymentUnavailable once the
+  provider keeps failing, and lets a single trial call through after a
+  cool-down to find out whether it recovered;
+* a per-process cache of retrieved intents as compact IntentRecords.
+  Terminal intents (succeeded, canceled) never change, so they stay
+  until evicted; others expire after a few seconds.
+
+The provider itself is pluggable: StripeProvider talks to Stripe,
+FakeProvider keeps intents in memory for tests and load tests. Both page
+through intents by creation time for batch jobs such as reconciliation.
+"""
+import calendar
+import math
+import random
+import threading
+import time
+import uuid
+from collections import namedtuple
+from types import SimpleNamespace
+
+import requests
+import stripe
+from requests.adapters import HTTPAdapter
+
+from app.utils.cache import TTLCache
+
+# Intent states that can never change again
+TERMINAL_STATUSES = ('succeeded', 'canceled')
+
+# The intent fields the application reads, detached from the SDK object
+IntentRecord = namedtuple('IntentRecord', ['id', 'status', 'amount', 'currency', 'metadata'])
+
+# Largest page the provider's list API returns
+LIST_PAGE_SIZE = 100
+
+
+def _record(intent):
+    return IntentRecord(intent.id, intent.status, intent.amount, intent.currency,
+                        dict(intent.metadata or {}))
+
+
+class PaymentUnavailable(Exception):
+    """The provider is unreachable or failing; the request may be retried later"""
+
+
+def is_transient(error):
+    """Failures worth retrying: no answer, throttling, or a provider-side 5xx"""
+    if isinstance(error, (stripe.APIConnectionError, stripe.RateLimitError)):
+        return True
+    if isinstance(error, stripe.APIError):
+        return error.http_status is None or error.http_status >= 500
+    return False
+
+
+class CircuitBreaker:
+    """
+    Thread-safe breaker: opens after failure_threshold consecutive
+    failures, rejects calls for reset_timeout seconds, then half-opens to
+    let one trial call through. Its success closes the breaker again,
+    its failure re-opens it for another reset_timeout.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if self._clock() - self._opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def before_call(self):
+        """Raise PaymentUnavailable unless a call may go out now"""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if self._clock() - self._opened_at < self.reset_timeout or self._trial:
+                raise PaymentUnavailable("Payment provider unavailable, try again shortly")
+            self._trial = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial = False
+
+
+class StripeProvider:
+    """Stripe over one pooled requests session with (connect, read) timeouts"""
+
+    def __init__(self, api_key, connect_timeout=3.05, read_timeout=10.0, pool_size=10):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        # The gateway owns retries, so the SDK must not add its own
+        self._client = stripe.StripeClient(
+            api_key or '',
+            http_client=stripe.RequestsClient(
+                timeout=(connect_timeout, read_timeout), session=session),
+            max_network_retries=0)
+
+    def create_intent(self, params, idempotency_key=None):
+        options = {'idempotency_key': idempotency_key} if idempotency_key else None
+        return self._client.v1.payment_intents.create(params=params, options=options)
+
+    def retrieve_intent(self, intent_id):
+        return self._client.v1.payment_intents.retrieve(intent_id)
+
+    def list_intents(self, created_gte, created_lt, limit=LIST_PAGE_SIZE, starting_after=None):
+        """
+        (intents, has_more): one page of the intents created in
+        [created_gte, created_lt) (unix seconds), newest first
+        """
+        params = {'created': {'gte': created_gte, 'lt': created_lt}, 'limit': limit}
+        if starting_after:
+            params['starting_after'] = starting_after
+        page = self._client.v1.payment_intents.list(params=params)
+        return page.data, page.has_more
+
+
+class FakeProvider:
+    """
+    In-process provider for tests and load tests. Intents are plain
+    objects with id, client_secret, status, amount, currency, metadata
+    and created. Exceptions queued with fail_next() are raised by the
+    next calls, to simulate a degraded provider.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.intents = {}
+        self._by_key = {}
+        self._failures = []
+        self.calls = 0
+
+    def fail_next(self, *errors):
+        with self._lock:
+            self._failures.extend(errors)
+
+    def _enter(self):
+        with self._lock:
+            self.calls += 1
+            if self._failures:
+                raise self._failures.pop(0)
+
+    def add_intent(self, status='requires_payment_method', amount=0, currency='usd',
+                   metadata=None, intent_id=None, created=None):
+        intent = SimpleNamespace(
+            id=intent_id or f"pi_fake_{uuid.uuid4().hex[:16]}", status=status,
+            amount=amount, currency=currency, metadata=dict(metadata or {}),
+            created=int(created if created is not None else time.time()))
+        intent.client_secret = f"{intent.id}_secret"
+        with self._lock:
+            self.intents[intent.id] = intent
+        return intent
+
+    def set_status(self, intent_id, status):
+        self.intents[intent_id].status = status
+
+    def create_intent(self, params, idempotency_key=None):
+        self._enter()
+        with self._lock:
+            if idempotency_key in self._by_key:
+                return self._by_key[idempotency_key]
+        intent = self.add_intent(amount=params.get('amount', 0),
+                                 currency=params.get('currency', 'usd'),
+                                 metadata=params.get('metadata'))
+        if idempotency_key:
+            with self._lock:
+                self._by_key[idempotency_key] = intent
+        return intent
+
+    def retrieve_intent(self, intent_id):
+        self._enter()
+        intent = self.intents.get(intent_id)
+        if intent is None:
+            raise stripe.InvalidRequestError(
+                f"No such payment_intent: '{intent_id}'", 'intent', http_status=404)
+        return intent
+
+    def list_intents(self, created_gte, created_lt, limit=LIST_PAGE_SIZE, starting_after=None):
+        self._enter()
+        with self._lock:
+            matching = sorted((intent for intent in self.intents.values()
+                               if created_gte <= intent.created < created_lt),
+                              key=lambda intent: (intent.created, intent.id), reverse=True)
+        if starting_after:
+            ids = [intent.id for intent in matching]
+            matching = matching[ids.index(starting_after) + 1:]
+        return matching[:limit], len(matching) > limit
+
+
+class PaymentGateway:
+    """
+    Retrying, circuit-broken front for the configured payment provider.
+    There is no provider until init_app() picks one; calls raise until then.
+    """
+
+    def __init__(self):
+        self.provider = None
+        self.breaker = CircuitBreaker()
+        self.max_retries = 2
+        self.backoff = 0.25
+        self._sleep = time.sleep
+        # Keyed by ('intent', id); the default TTL applies to non-terminal intents
+        self.intent_cache = TTLCache(maxsize=2048, ttl=5.0)
+
+    def init_app(self, app):
+        """Build the provider named by PAYMENT_PROVIDER ('stripe' or 'fake')"""
+        config = app.config
+        if config.get('PAYMENT_PROVIDER', 'stripe') == 'fake':
+            self.provider = FakeProvider()
+        else:
+            self.provider = StripeProvider(
+                config.get('STRIPE_SECRET_KEY'),
+                connect_timeout=config.get('PAYMENT_CONNECT_TIMEOUT', 3.05),
+                read_timeout=config.get('PAYMENT_READ_TIMEOUT', 10.0),
+                pool_size=config.get('PAYMENT_POOL_SIZE', 10))
+        self.breaker = CircuitBreaker(
+            failure_threshold=config.get('PAYMENT_BREAKER_THRESHOLD', 5),
+            reset_timeout=config.get('PAYMENT_BREAKER_RESET', 30.0))
+        self.max_retries = config.get('PAYMENT_MAX_RETRIES', 2)
+        self.backoff = config.get('PAYMENT_RETRY_BACKOFF', 0.25)
+        self.intent_cache.configure(
+            maxsize=config.get('PAYMENT_INTENT_CACHE_MAXSIZE', 2048),
+            ttl=config.get('PAYMENT_INTENT_CACHE_TTL', 5.0),
+            enabled=config.get('PAYMENT_INTENT_CACHE_ENABLED', True))
+
+    def create_intent(self, params, idempotency_key=None):
+        """
+        Create a payment intent. Only retried when idempotency_key is
+        given, since the provider then returns the first intent instead
+        of charging for a second one.
+        """
+        return self._call(lambda: self.provider.create_intent(params, idempotency_key),
+                          retry=idempotency_key is not None)
+
+    def retrieve_intent(self, intent_id):
+        """The intent as an IntentRecord, from the cache when possible"""
+        record = self.intent_cache.get(('intent', intent_id))
+        if record is None:
+            record = self.remember(
+                self._call(lambda: self.provider.retrieve_intent(intent_id), retry=True))
+        return record
+
+    def remember(self, intent):
+        """
+        Cache an intent seen from the provider (a retrieve, or a verified
+        webhook event) and return its IntentRecord
+        """
+        record = _record(intent)
+        ttl = math.inf if record.status in TERMINAL_STATUSES else None
+        self.intent_cache.set(('intent', record.id), record, ttl)
+        return record
+
+    def iter_intents(self, start, end, page_size=LIST_PAGE_SIZE):
+        """
+        Yield an IntentRecord for every intent created in [start, end)
+        (naive UTC datetimes), page_size per list call, each page retried
+        on its own. Records are not cached: a scan would evict the
+        intents live checkouts are verifying.
+        """
+        created_gte = calendar.timegm(start.utctimetuple())
+        created_lt = calendar.timegm(end.utctimetuple())
+        starting_after = None
+        while True:
+            intents, has_more = self._call(
+                lambda: self.provider.list_intents(created_gte, created_lt, page_size, starting_after),
+                retry=True)
+            for intent in intents:
+                yield _record(intent)
+            if not has_more or not intents:
+                return
+            starting_after = intents[-1].id
+
+    def _call(self, request, retry):
+        if self.provider is None:
+            raise RuntimeError("Payment gateway used before init_app() configured a provider")
+        attempts = self.max_retries + 1 if retry else 1
+        for attempt in range(attempts):
+            self.breaker.before_call()
+            try:
+                result = request()
+            except stripe.StripeError as e:
+                if not is_transient(e):
+                    # The provider answered; the request itself was refused
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if attempt + 1 == attempts:
+                    raise PaymentUnavailable("Payment provider unavailable, try again shortly") from e
+                self._sleep(random.uniform(0, self.backoff * 2 ** attempt))
+            except Exception:
+                # Anything else (a bug, an SDK surprise) must still end a
+                # half-open trial, or the breaker would reject every call
+                self.breaker.record_failure()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
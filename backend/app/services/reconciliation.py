@@ -0,0 +1,109 @@
+"""
+Batch reconciliation of bookings against the payment provider.
+
+Instead of retrieving one intent per booking, the range is cut into
+windows by creation time. For each window the provider's list API is
+paged through (up to 100 intents per call) and the intents are held in a
+dict by id, while the window's bookings are streamed from the database
+and matched against it. Memory is bounded by one window's intents.
+
+An intent is always created before its booking, so the few bookings
+whose intent fell in the previous window are retrieved one by one.
+Succeeded intents left unmatched at the end of a window are checked
+against all bookings with one IN query per batch before being reported
+as paid without a booking.
+"""
+from datetime import timedelta
+
+import stripe
+
+from app.services.payment_gateway import LIST_PAGE_SIZE
+
+# Columns of a discrepancy report, in CSV order
+REPORT_FIELDS = (
+    'kind', 'booking_id', 'booking_status', 'booking_created_at', 'expected_cents',
+    'payment_intent_id', 'intent_status', 'intent_amount',
+)
+
+# Bookings that must be backed by a succeeded payment of their total.
+# Cancelled stays are matched but not checked: refunds are handled
+# outside the application.
+PAID_STATUSES = ('pending', 'confirmed', 'completed')
+
+
+def _issue(kind, booking=None, intent=None):
+    return {
+        'kind': kind,
+        'booking_id': booking.id if booking else None,
+        'booking_status': booking.status if booking else None,
+        'booking_created_at': booking.created_at if booking else None,
+        'expected_cents': int(round(booking.total_price * 100)) if booking else None,
+        'payment_intent_id': intent.id if intent else booking.payment_intent_id,
+        'intent_status': intent.status if intent else None,
+        'intent_amount': intent.amount if intent else None,
+    }
+
+
+def _check(booking, intent):
+    """The discrepancy kind between a booking and its intent, or None"""
+    if booking.status not in PAID_STATUSES:
+        return None
+    if intent.status != 'succeeded':
+        return 'intent_not_succeeded'
+    if intent.amount != int(round(booking.total_price * 100)):
+        return 'amount_mismatch'
+    return None
+
+
+def reconcile_payments(gateway, booking_repo, start, end, window=timedelta(days=1),
+                       batch_size=1000, page_size=LIST_PAGE_SIZE, summary=None):
+    """
+    Yield one report dict (see REPORT_FIELDS) per discrepancy between the
+    bookings created in [start, end) (naive UTC datetimes) and the
+    provider's intents:
+
+    * missing_intent_id: the booking records no payment
+    * intent_not_found: the provider does not know its intent
+    * intent_not_succeeded / amount_mismatch: the payment does not cover it
+    * paid_without_booking: a succeeded booking payment nothing was booked for
+
+    summary, when given, is a dict updated with the number of bookings
+    and intents scanned.
+    """
+    if summary is None:
+        summary = {}
+    summary.setdefault('bookings', 0)
+    summary.setdefault('intents', 0)
+    window_start = start
+    while window_start < end:
+        window_end = min(window_start + window, end)
+        intents = {intent.id: intent
+                   for intent in gateway.iter_intents(window_start, window_end, page_size)}
+        summary['intents'] += len(intents)
+
+        for booking in booking_repo.stream_payment_rows(window_start, window_end, batch_size):
+            summary['bookings'] += 1
+            if not booking.payment_intent_id:
+                yield _issue('missing_intent_id', booking)
+                continue
+            intent = intents.pop(booking.payment_intent_id, None)
+            if intent is None:
+                try:
+                    intent = gateway.retrieve_intent(booking.payment_intent_id)
+                except stripe.InvalidRequestError:
+                    yield _issue('intent_not_found', booking)
+                    continue
+            kind = _check(booking, intent)
+            if kind:
+                yield _issue(kind, booking, intent)
+
+        # Intents not created for a booking (no place in metadata) are not ours to check
+        unmatched = [intent for intent in intents.values()
+                     if intent.status == 'succeeded' and intent.metadata.get('place_id')]
+        for offset in range(0, len(unmatched), batch_size):
+            batch = unmatched[offset:offset + batch_size]
+            booked = booking_repo.payment_intent_ids_booked([intent.id for intent in batch])
+            for intent in batch:
+                if intent.id not in booked:
+                    yield _issue('paid_without_booking', intent=intent)
+        window_start = window_end
@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded LRU cache whose entries also expire after a
+    time-to-live. Keys are tuples so related entries can be dropped
+    together with delete_prefix(). Each process has its own instance; it
+    is a read accelerator, never the source of truth.
+    """
+
+    def __init__(self, maxsize=512, ttl=30.0, enabled=True, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = enabled
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def configure(self, maxsize=None, ttl=None, enabled=None):
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if ttl is not None:
+                self.ttl = ttl
+            if enabled is not None:
+                self.enabled = enabled
+            self._data.clear()
+
+    def get(self, key, default=None):
+        if not self.enabled:
+            return default
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        if not self.enabled:
+            return
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_set(self, key, producer, ttl=None):
+        """Return the cached value or store producer()'s result (None is not cached)"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = producer()
+        if value is not None:
+            self.set(key, value, ttl)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_prefix(self, prefix):
+        """Drop every key whose leading elements equal `prefix`"""
+        size = len(prefix)
+        with self._lock:
+            for key in [k for k in self._data if k[:size] == prefix]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
@@ -0,0 +1,60 @@
+"""
+Incremental NDJSON and CSV encoders for catalogue exports.
+
+Both take an iterator of flat dicts and yield text chunks of roughly
+CHUNK_SIZE characters, so a response or file can be written while rows
+are still being read and memory stays flat however many rows there are.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _chunked(lines):
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def iter_ndjson(rows):
+    """One JSON object per line"""
+    return _chunked(json.dumps(row, default=_json_default, separators=(',', ':')) + '\n'
+                    for row in rows)
+
+
+def iter_csv(rows, columns):
+    """A header line, then one line per row; list values are joined with ';'"""
+    def lines():
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([';'.join(value) if isinstance(value, list) else
+                             value.isoformat() if isinstance(value, (datetime, date)) else value
+                             for value in (row[column] for column in columns)])
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+        yield out.getvalue()
+    return _chunked(lines())
+
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
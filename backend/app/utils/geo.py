@@ -0,0 +1,218 @@
+"""
+Fixed-grid spatial index helpers for Place latitude/longitude.
+
+The globe is cut into CELL_DEGREES x CELL_DEGREES cells numbered row by
+row from the south-west corner, so every row of a bounding box is one
+contiguous range of cell ids. A box query becomes a handful of
+BETWEEN ranges on the indexed places.grid_cell column instead of a full
+table scan; the exact lat/lon filter then only runs on those rows.
+"""
+import math
+from bisect import bisect_left, bisect_right
+
+CELL_DEGREES = 0.25
+ROWS = int(180 / CELL_DEGREES)
+COLS = int(360 / CELL_DEGREES)
+# Past this many grid rows a box covers so much of the map that a plain
+# coordinate filter is as cheap as the OR of per-row ranges
+MAX_ROW_RANGES = 64
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def _row(lat):
+    return min(int((lat + 90.0) / CELL_DEGREES), ROWS - 1)
+
+
+def _col(lon):
+    return min(int((lon + 180.0) / CELL_DEGREES), COLS - 1)
+
+
+def grid_cell(lat, lon):
+    """Return the grid cell id containing (lat, lon)"""
+    return _row(lat) * COLS + _col(lon)
+
+
+def cell_ranges(min_lat, min_lon, max_lat, max_lon):
+    """
+    Return [(first_cell, last_cell), ...] covering the box, or None when
+    the box spans too many rows to be worth a range scan. A box with
+    min_lon > max_lon crosses the antimeridian.
+    """
+    rows = range(_row(min_lat), _row(max_lat) + 1)
+    if len(rows) > MAX_ROW_RANGES:
+        return None
+    if min_lon <= max_lon:
+        col_spans = [(_col(min_lon), _col(max_lon))]
+    else:
+        col_spans = [(_col(min_lon), COLS - 1), (0, _col(max_lon))]
+    return [(row * COLS + first, row * COLS + last)
+            for row in rows for first, last in col_spans]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + \
+        math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_bbox(lat, lon, radius_km):
+    """Return (min_lat, min_lon, max_lat, max_lon) enclosing the circle"""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    min_lat, max_lat = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    # Near the poles (or for huge radii) every longitude is in range
+    widest = max(abs(min_lat), abs(max_lat))
+    if widest >= 90.0:
+        return min_lat, -180.0, max_lat, 180.0
+    dlon = radius_km / (KM_PER_DEGREE_LAT * math.cos(math.radians(widest)))
+    if dlon >= 180.0:
+        return min_lat, -180.0, max_lat, 180.0
+    min_lon = lon - dlon
+    max_lon = lon + dlon
+    if min_lon < -180.0:
+        min_lon += 360.0
+    if max_lon > 180.0:
+        max_lon -= 360.0
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def _spread_bits(value):
+    """Put the bits of a 16-bit int on the even bit positions"""
+    value = (value | (value << 8)) & 0x00FF00FF
+    value = (value | (value << 4)) & 0x0F0F0F0F
+    value = (value | (value << 2)) & 0x33333333
+    return (value | (value << 1)) & 0x55555555
+
+
+class NearestIndex:
+    """
+    In-memory grid over (id, lat, lon) points for exact k-nearest-neighbour
+    queries without a database round trip.
+
+    Points are kept sorted by the Z-order code of their BASE_DEGREES cell.
+    Every cell of level i (2**i base cells on a side) is then one
+    contiguous run of that order, found with two bisects, so all levels
+    come from one sorted array. A query picks the finest level whose 3x3
+    block around the origin holds k points. The k-th of their distances
+    bounds the answer, so only the cells of that level covering the
+    bounding circle are scanned.
+    """
+    BASE_DEGREES = 0.02
+    LEVELS = 16
+    # Past this many cells a circle is scanned one level coarser
+    MAX_SCAN_CELLS = 256
+
+    _ROWS = math.ceil(180.0 / BASE_DEGREES)
+    _COLS = math.ceil(360.0 / BASE_DEGREES)
+
+    def __init__(self, points=()):
+        self._points = {}
+        for point_id, lat, lon in points:
+            self._points[point_id] = (lat, lon)
+        entries = sorted((self._code(lat, lon), point_id)
+                         for point_id, (lat, lon) in self._points.items())
+        self._codes = [code for code, _ in entries]
+        self._ids = [point_id for _, point_id in entries]
+
+    def __len__(self):
+        return len(self._points)
+
+    def get(self, point_id):
+        """(lat, lon) of a point, or None"""
+        return self._points.get(point_id)
+
+    def upsert(self, point_id, lat, lon):
+        old = self._points.get(point_id)
+        if old == (lat, lon):
+            return
+        if old is not None:
+            code = self._code(*old)
+            position = bisect_left(self._codes, code)
+            position = self._ids.index(point_id, position)
+            del self._codes[position], self._ids[position]
+        code = self._code(lat, lon)
+        position = bisect_right(self._codes, code)
+        self._codes.insert(position, code)
+        self._ids.insert(position, point_id)
+        self._points[point_id] = (lat, lon)
+
+    def _base_cell(self, lat, lon):
+        return (min(int((lat + 90.0) / self.BASE_DEGREES), self._ROWS - 1),
+                min(int((lon + 180.0) / self.BASE_DEGREES), self._COLS - 1))
+
+    def _code(self, lat, lon):
+        row, col = self._base_cell(lat, lon)
+        return (_spread_bits(row) << 1) | _spread_bits(col)
+
+    def _span(self, level, row, col):
+        """(first, last) positions of a level's cell in the sorted order"""
+        start = ((_spread_bits(row) << 1) | _spread_bits(col)) << (2 * level)
+        return (bisect_left(self._codes, start),
+                bisect_left(self._codes, start + (1 << (2 * level))))
+
+    def _block(self, level, lat, lon):
+        """The cells of the 3x3 block around (lat, lon), wrapping at the antimeridian"""
+        rows, cols = ((self._ROWS - 1) >> level) + 1, ((self._COLS - 1) >> level) + 1
+        row, col = self._base_cell(lat, lon)
+        row, col = row >> level, col >> level
+        return {(r, c % cols) for r in (row - 1, row, row + 1) if 0 <= r < rows
+                for c in (col - 1, col, col + 1)}
+
+    def _box_cells(self, level, min_lat, min_lon, max_lat, max_lon):
+        """
+        The cells covering a box (min_lon > max_lon crosses the
+        antimeridian), or None when there are more than MAX_SCAN_CELLS
+        """
+        cols = ((self._COLS - 1) >> level) + 1
+        first_row, first_col = self._base_cell(min_lat, min_lon)
+        last_row, last_col = self._base_cell(max_lat, max_lon)
+        first_row, first_col = first_row >> level, first_col >> level
+        last_row, last_col = last_row >> level, last_col >> level
+        if min_lon <= max_lon:
+            col_range = set(range(first_col, last_col + 1))
+        else:
+            col_range = set(range(first_col, cols)) | set(range(0, last_col + 1))
+        if (last_row - first_row + 1) * len(col_range) > self.MAX_SCAN_CELLS:
+            return None
+        return [(row, col) for row in range(first_row, last_row + 1) for col in col_range]
+
+    def _members(self, level, cells):
+        ids = self._ids
+        for row, col in cells:
+            first, last = self._span(level, row, col)
+            yield from ids[first:last]
+
+    def nearest(self, lat, lon, k, exclude=None):
+        """[(distance_km, id), ...] of the k points nearest to (lat, lon), nearest first"""
+        k = min(k, len(self._points) - (exclude in self._points))
+        if k <= 0:
+            return []
+        points = self._points
+        for level in range(self.LEVELS):
+            cells = self._block(level, lat, lon)
+            held = sum(last - first for first, last in
+                       (self._span(level, row, col) for row, col in cells))
+            # The origin itself may be one of them
+            if held > k:
+                break
+        block = [point_id for point_id in self._members(level, cells) if point_id != exclude]
+        bound = sorted(haversine_km(lat, lon, *points[point_id]) for point_id in block)[k - 1]
+
+        # radius_bbox is built on a slightly shorter degree than haversine_km; pad for it
+        box = radius_bbox(lat, lon, bound * 1.01 + 1e-6)
+        cells = self._box_cells(level, *box)
+        while cells is None:
+            level += 1
+            cells = self._box_cells(level, *box)
+        hits = []
+        for point_id in self._members(level, cells):
+            if point_id != exclude:
+                distance = haversine_km(lat, lon, *points[point_id])
+                if distance <= bound:
+                    hits.append((distance, point_id))
+        hits.sort()
+        return hits[:k]
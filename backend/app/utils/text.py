@@ -0,0 +1,50 @@
+"""
+Tokenizing and term weighting for the place full-text index.
+
+Text is stripped of the HTML tags bleach lets through, lower-cased and
+split on word characters. Stop words and single characters are dropped
+and a trailing plural 's' is folded ("villas" -> "villa") so queries
+and documents meet on the same terms. Title terms count TITLE_BOOST
+times; each term's frequency is then saturated BM25-style so a word
+repeated many times cannot dominate the score.
+"""
+import math
+import re
+from collections import Counter
+
+TITLE_BOOST = 3
+MAX_TERM_LENGTH = 40
+_K1 = 1.2
+_TAG = re.compile(r'<[^>]+>')
+_WORD = re.compile(r'\w+', re.UNICODE)
+STOP_WORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in',
+    'is', 'it', 'of', 'on', 'or', 'the', 'this', 'to', 'with',
+))
+
+
+def _fold(token):
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Return the index terms of `text`, in order, duplicates included"""
+    words = _WORD.findall(_TAG.sub(' ', text or '').lower())
+    return [_fold(w)[:MAX_TERM_LENGTH] for w in words
+            if len(w) > 1 and w not in STOP_WORDS]
+
+
+def term_weights(title, description):
+    """Return {term: weight} for a place document"""
+    counts = Counter()
+    for term in tokenize(title):
+        counts[term] += TITLE_BOOST
+    counts.update(tokenize(description))
+    return {term: tf * (_K1 + 1) / (tf + _K1) for term, tf in counts.items()}
+
+
+def idf(total_docs, doc_freq):
+    """BM25 inverse document frequency (always positive)"""
+    return math.log(1 + (total_docs - doc_freq + 0.5) / (doc_freq + 0.5))
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Latency of BookingRepository.check_availability at 1M bookings.
+
+Fills a sqlite database with --bookings bookings spread over --places
+places, then times random availability checks three ways:
+
+  legacy   the previous three-branch OR predicate, loading every
+           conflicting Booking with .all() to count them
+  probe    the current EXISTS probe on the canonical overlap test
+  no-index the same probe with ix_bookings_place_status_dates dropped
+
+Usage (from backend/):
+    python benchmarks/bench_booking_availability.py [--bookings 1000000] [--places 10000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import and_, insert, or_, text  # noqa: E402
+
+from app import create_app  # noqa: E402
+from config import TestingConfig  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import Booking, Place, User  # noqa: E402
+from app.services import facade  # noqa: E402
+
+START = date(2030, 1, 1)
+
+
+def legacy_check(place_id, check_in, check_out):
+    conflicts = Booking.query.filter(
+        and_(
+            Booking.place_id == place_id,
+            Booking.status.in_(['pending', 'confirmed']),
+            or_(
+                and_(Booking.check_in_date <= check_in, Booking.check_out_date > check_in),
+                and_(Booking.check_in_date < check_out, Booking.check_out_date >= check_out),
+                and_(Booking.check_in_date >= check_in, Booking.check_out_date <= check_out)
+            )
+        )
+    ).all()
+    return len(conflicts) == 0
+
+
+def fill(bookings, places, rng):
+    now = datetime.utcnow()
+    db.session.execute(insert(User), [{
+        "id": "guest", "first_name": "Bench", "last_name": "Guest",
+        "email": "guest@example.com", "password": "x", "is_admin": False}])
+    place_ids = [str(uuid.uuid4()) for _ in range(places)]
+    db.session.execute(insert(Place), [{
+        "id": place_id, "title": "Bench", "description": "", "price": 100.0,
+        "latitude": 0.0, "longitude": 0.0, "owner_id": "guest",
+        "created_at": now, "updated_at": now} for place_id in place_ids])
+
+    per_place = bookings // places
+    batch = []
+    for place_id in place_ids:
+        day = START
+        for _ in range(per_place):
+            day += timedelta(days=rng.randint(0, 3))
+            nights = rng.randint(1, 7)
+            batch.append({
+                "id": str(uuid.uuid4()), "place_id": place_id, "guest_id": "guest",
+                "check_in_date": day, "check_out_date": day + timedelta(days=nights),
+                "total_price": 100.0 * nights,
+                "status": rng.choice(("pending", "confirmed", "cancelled", "completed")),
+                "created_at": now, "updated_at": now})
+            day += timedelta(days=nights)
+        if len(batch) >= 50000:
+            db.session.execute(insert(Booking), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(Booking), batch)
+    db.session.commit()
+    return place_ids
+
+
+def time_checks(check, queries):
+    timings = []
+    for place_id, check_in, check_out in queries:
+        started = time.perf_counter()
+        check(place_id, check_in, check_out)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--bookings', type=int, default=1000000)
+    parser.add_argument('--places', type=int, default=10000)
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        # The engine is built in create_app, so the URI must be in the config
+        class BenchConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp}/bench.db"
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            started = time.perf_counter()
+            place_ids = fill(args.bookings, args.places, rng)
+            print(f"loaded {args.bookings} bookings in {time.perf_counter() - started:.0f} s")
+
+            queries = []
+            for _ in range(args.queries):
+                check_in = START + timedelta(days=rng.randint(0, 400))
+                queries.append((rng.choice(place_ids), check_in,
+                                check_in + timedelta(days=rng.randint(1, 14))))
+            probe = facade.booking_repo.check_availability
+            assert all(legacy_check(*q) == probe(*q) for q in queries[:50])
+
+            for name, check in (("legacy", legacy_check), ("probe", probe)):
+                median, p95 = time_checks(check, queries)
+                print(f"{name:<9} median {median:6.3f} ms   p95 {p95:6.3f} ms")
+            db.session.execute(text("DROP INDEX ix_bookings_place_status_dates"))
+            median, p95 = time_checks(probe, queries[:20])
+            print(f"{'no-index':<9} median {median:6.3f} ms   p95 {p95:6.3f} ms")
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
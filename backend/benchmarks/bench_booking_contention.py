@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Booking throughput under contention, and a double-booking check.
+
+--threads workers each create --per-thread bookings through
+facade.create_booking on a sqlite file database. Every worker aims at
+the same --places places with randomly chosen 3-night stays, so most
+attempts conflict and all writes for a place queue on its row lock.
+The run reports attempts per second, then checks that no two blocking
+bookings of a place overlap.
+
+sqlite allows one writer at a time, so this shows correctness and
+queueing cost; on MySQL, bookings of different places take different
+row locks and proceed in parallel.
+
+Usage (from backend/):
+    python benchmarks/bench_booking_contention.py [--threads 8] [--per-thread 50] [--places 4]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import Booking  # noqa: E402
+from app.persistence.booking_repository import BLOCKING_STATUSES  # noqa: E402
+from app.services import facade  # noqa: E402
+from config import TestingConfig  # noqa: E402
+
+START = date(2030, 1, 1)
+
+
+def seed(app, places, guests):
+    with app.app_context():
+        db.create_all()
+        owner = facade.create_user({"first_name": "Host", "last_name": "User",
+                                    "email": "host@example.com", "password": "Password1!"})
+        place_ids = [facade.create_place({
+            "title": f"Place {i}", "description": "", "price": 100.0,
+            "latitude": 1.0, "longitude": 1.0, "owner_id": owner.id}).id for i in range(places)]
+        guest_ids = [facade.create_user({
+            "first_name": "Guest", "last_name": "User",
+            "email": f"guest{i}@example.com", "password": "Password1!"}).id for i in range(guests)]
+        return place_ids, guest_ids
+
+
+def count_overlaps(app):
+    with app.app_context():
+        stays = Booking.query.filter(Booking.status.in_(BLOCKING_STATUSES)).order_by(
+            Booking.place_id, Booking.check_in_date).all()
+    overlaps = 0
+    for previous, current in zip(stays, stays[1:]):
+        if previous.place_id == current.place_id and current.check_in_date < previous.check_out_date:
+            overlaps += 1
+    return len(stays), overlaps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--per-thread', type=int, default=50)
+    parser.add_argument('--places', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp}/contention.db"
+
+        app = create_app(BenchConfig)
+        place_ids, guest_ids = seed(app, args.places, args.threads)
+        outcomes = {"booked": 0, "conflict": 0, "busy": 0}
+        lock = threading.Lock()
+        barrier = threading.Barrier(args.threads)
+
+        def worker(guest_id, seed_value):
+            rng = random.Random(seed_value)
+            with app.app_context():
+                barrier.wait()
+                for _ in range(args.per_thread):
+                    check_in = START + timedelta(days=rng.randint(0, 60))
+                    try:
+                        facade.create_booking({
+                            "place_id": rng.choice(place_ids), "guest_id": guest_id,
+                            "check_in_date": check_in,
+                            "check_out_date": check_in + timedelta(days=3)})
+                        outcome = "booked"
+                    except ValueError:
+                        outcome = "conflict"
+                    except OperationalError:
+                        db.session.rollback()
+                        outcome = "busy"
+                    with lock:
+                        outcomes[outcome] += 1
+
+        threads = [threading.Thread(target=worker, args=(guest_id, i))
+                   for i, guest_id in enumerate(guest_ids)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        attempts = args.threads * args.per_thread
+        stays, overlaps = count_overlaps(app)
+        print(f"{attempts} attempts in {elapsed:.2f} s ({attempts / elapsed:.0f}/s): "
+              f"{outcomes['booked']} booked, {outcomes['conflict']} conflicts, "
+              f"{outcomes['busy']} lock timeouts")
+        print(f"{stays} blocking bookings, {overlaps} overlapping pairs")
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Throughput of place creation, in rows per second.
+
+Compares one facade.create_place call per row (what N calls to
+POST /api/v1/places/ cost, minus HTTP) against facade.import_places,
+the chunked path behind POST /api/v1/places/bulk. Runs on the in-memory
+sqlite database of TestingConfig, so absolute numbers are optimistic;
+the ratio is what matters.
+
+Usage (from backend/):
+    python benchmarks/bench_place_import.py [--rows 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.services import facade  # noqa: E402
+
+
+def build_rows(count):
+    return [{"title": f"Listing {i}", "description": "Bright two-bedroom flat near the park",
+             "price": 80.0 + i % 50, "latitude": 40.0 + i % 90 / 100.0,
+             "longitude": -74.0 + i % 90 / 100.0} for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=2000)
+    args = parser.parse_args()
+
+    app = create_app("config.TestingConfig")
+    with app.app_context():
+        db.create_all()
+        owner = facade.create_user({"first_name": "Bench", "last_name": "Owner",
+                                    "email": "bench@example.com", "password": "Password1!"})
+
+        rows = build_rows(args.rows)
+        start = time.perf_counter()
+        for row in rows:
+            facade.create_place(dict(row, owner_id=owner.id))
+        before = args.rows / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        results = facade.import_places(build_rows(args.rows), owner.id)
+        after = args.rows / (time.perf_counter() - start)
+        assert all(r["status"] == "created" for r in results)
+
+    print(f"create_place {before:8.0f} rows/s   import_places {after:8.0f} rows/s   "
+          f"({after / before:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Latency of the k-nearest-neighbour lookup behind GET /places/<id>/nearby.
+
+Loads --places random places (clustered around a few cities, like real
+listings, plus a uniform sprinkle) into the in-memory sqlite database of
+TestingConfig, then times for random origins:
+
+* the neighbour search alone, on the NearestIndex of coordinates;
+* facade.get_nearby_places, uncached: the search plus loading the k
+  winners through the ORM, with the places marker the endpoint already
+  reads for its ETag;
+* a brute-force haversine scan of every place, for reference.
+
+Usage (from backend/):
+    python benchmarks/bench_place_nearby.py [--places 100000] [--k 10] [--queries 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import Place  # noqa: E402
+from app.services import facade  # noqa: E402
+from app.utils.geo import NearestIndex, haversine_km  # noqa: E402
+
+CITIES = [(48.8566, 2.3522), (40.7128, -74.0060), (35.6762, 139.6503),
+          (-33.8688, 151.2093), (51.5074, -0.1278)]
+
+
+def build_rows(count, rng):
+    rows = []
+    for i in range(count):
+        if i % 10 == 0:
+            lat, lon = rng.uniform(-60, 70), rng.uniform(-180, 180)
+        else:
+            city_lat, city_lon = rng.choice(CITIES)
+            lat, lon = city_lat + rng.gauss(0, 0.3), city_lon + rng.gauss(0, 0.3)
+        rows.append({"title": f"Place {i}", "description": "Listing", "price": 100.0,
+                     "latitude": max(-90.0, min(90.0, lat)),
+                     "longitude": max(-180.0, min(180.0, lon))})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--places', type=int, default=100000)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    app = create_app("config.TestingConfig")
+    app.config['PLACE_IMPORT_CHUNK_SIZE'] = 5000
+    with app.app_context():
+        db.create_all()
+        owner = facade.create_user({"first_name": "Bench", "last_name": "Owner",
+                                    "email": "bench@example.com", "password": "Password1!"})
+        facade.import_places(build_rows(args.places, rng), owner.id)
+        points = db.session.query(Place.id, Place.latitude, Place.longitude).all()
+        origins = rng.sample(points, args.queries)
+
+        start = time.perf_counter()
+        index = NearestIndex(points)
+        index.nearest(0.0, 0.0, args.k)
+        build = (time.perf_counter() - start) * 1000
+        searches = []
+        for place_id, lat, lon in origins:
+            start = time.perf_counter()
+            index.nearest(lat, lon, args.k, exclude=place_id)
+            searches.append((time.perf_counter() - start) * 1000)
+
+        marker = facade.place_repo.get_version()
+        facade.get_nearby_places(origins[0][0], args.k, fields=('id',), marker=marker)
+        timings = []
+        for place_id, _, _ in origins:
+            start = time.perf_counter()
+            facade.get_nearby_places(place_id, args.k, fields=('id',), marker=marker)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        for place_id, lat, lon in origins[:10]:
+            sorted((haversine_km(lat, lon, p_lat, p_lon), p_id)
+                   for p_id, p_lat, p_lon in points if p_id != place_id)[:args.k]
+        brute = (time.perf_counter() - start) * 100
+
+    print(f"{args.places} places, k={args.k}, index built in {build:.0f} ms")
+    for label, values in (("neighbour search", searches), ("with loading k places", timings)):
+        values.sort()
+        print(f"  {label:22} median {statistics.median(values):.3f} ms, "
+              f"p95 {values[int(len(values) * 0.95)]:.3f} ms")
+    print(f"  brute-force scan       {brute:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
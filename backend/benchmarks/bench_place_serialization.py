@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Serialization cost of the place list response, per 1,000 places.
+
+Compares the previous path (build dicts, run them through flask-restx
+marshal() with place_model, encode with restx's JSON representation)
+against the compiled serializers plus compact encoder now used by
+GET /api/v1/places/. No database is involved: places are transient
+objects with 3 amenities and 5 reviews each.
+
+Usage (from backend/):
+    python benchmarks/bench_place_serialization.py [--places 1000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_restx import marshal  # noqa: E402
+from flask_restx.representations import output_json  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.api.serializers import dumps  # noqa: E402
+from app.api.v1.places import place_model, serialize_place  # noqa: E402
+from app.models import Amenity, Place, Review  # noqa: E402
+
+
+def build_places(count):
+    amenities = [Amenity(id=f"a{i}", name=f"Amenity {i}", description="d", number=1)
+                 for i in range(3)]
+    places = []
+    for i in range(count):
+        place = Place(id=f"p{i}", title=f"Place {i}", description="Sea view " * 20,
+                      price=120.0 + i, latitude=40.0, longitude=-74.0,
+                      owner_id="owner", review_count=5, avg_rating=4.2)
+        place.amenities = list(amenities)
+        place.reviews = [Review(id=f"r{i}-{j}", text="Lovely stay " * 10, rating=4,
+                                user_id="guest") for j in range(5)]
+        places.append(place)
+    return places
+
+
+def legacy_dict(place):
+    return {
+        "id": place.id, "title": place.title, "description": place.description,
+        "price": place.price, "latitude": place.latitude, "longitude": place.longitude,
+        "owner_id": place.owner_id, "review_count": place.review_count,
+        "avg_rating": place.avg_rating,
+        "amenities": [{"id": a.id, "name": a.name} for a in place.amenities],
+        "reviews": [{"id": r.id, "text": r.text, "rating": r.rating, "user_id": r.user_id}
+                    for r in place.reviews],
+    }
+
+
+def before(places):
+    return output_json(marshal([legacy_dict(p) for p in places], place_model), 200).get_data()
+
+
+def after(places):
+    return dumps([serialize_place(p) for p in places])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--places', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app("config.TestingConfig")
+    places = build_places(args.places)
+    scale = 1000.0 / args.places
+    # restx pretty-prints JSON when the app runs in debug mode
+    for debug in (False, True):
+        app.debug = debug
+        with app.app_context(), app.test_request_context():
+            assert len(before(places)) >= len(after(places))
+            results = {}
+            for name, fn in (("before", before), ("after", after)):
+                best = min(timeit.repeat(lambda: fn(places), number=1, repeat=args.repeat))
+                results[name] = best * 1000 * scale
+        print(f"debug={str(debug):<5}  before {results['before']:7.1f} ms  "
+              f"after {results['after']:6.1f} ms  per 1,000 places  "
+              f"({results['before'] / results['after']:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,62 @@ class Config:
     DEBUG = False
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:3000')
+    # Payment provider ('stripe', or 'fake' for an in-process stand-in)
+    PAYMENT_PROVIDER = os.getenv('PAYMENT_PROVIDER', 'stripe')
+    STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY')
+    # Signing secret of the Stripe webhook endpoint (POST /payments/webhook)
+    STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET')
+    # Provider calls: timeouts in seconds, pooled connections, retries of
+    # idempotent calls (backoff doubles per attempt, with jitter) and the
+    # circuit breaker (consecutive failures to open, seconds until a trial)
+    PAYMENT_CONNECT_TIMEOUT = 3.05
+    PAYMENT_READ_TIMEOUT = 10.0
+    PAYMENT_POOL_SIZE = 10
+    PAYMENT_MAX_RETRIES = 2
+    PAYMENT_RETRY_BACKOFF = 0.25
+    PAYMENT_BREAKER_THRESHOLD = 5
+    PAYMENT_BREAKER_RESET = 30.0
+    # Retrieved payment intents, per process: succeeded and canceled ones
+    # are final and kept until evicted, others for TTL seconds
+    PAYMENT_INTENT_CACHE_ENABLED = True
+    PAYMENT_INTENT_CACHE_MAXSIZE = 2048
+    PAYMENT_INTENT_CACHE_TTL = 5.0
+    # Page size for cursor-paginated list endpoints
+    PAGE_SIZE_DEFAULT = 20
+    PAGE_SIZE_MAX = 100
+    # Upper bound on places returned by a single map/radius search
+    MAP_RESULT_MAX = 500
+    # GET /places/<id>/nearby: default and maximum k
+    NEARBY_DEFAULT = 10
+    NEARBY_MAX = 50
+    # GET /places/<id>/calendar: default and maximum window, in days
+    CALENDAR_DEFAULT_DAYS = 90
+    CALENDAR_MAX_DAYS = 366
+    # How long a payment intent reserves the dates it was created for
+    BOOKING_HOLD_MINUTES = 15
+    # Pending bookings not confirmed within this many hours are reported as stale
+    PENDING_BOOKING_TTL_HOURS = 48
+    # Idempotency-Key: how long a response is replayed, how long a claim
+    # in flight is leased to its request (longer than a worker timeout),
+    # and how long a duplicate waits (polling every IDEMPOTENCY_POLL_SECONDS)
+    # for the first request to finish before answering 409
+    IDEMPOTENCY_TTL_SECONDS = 24 * 3600
+    IDEMPOTENCY_LEASE_SECONDS = 300
+    IDEMPOTENCY_WAIT_SECONDS = 10
+    IDEMPOTENCY_POLL_SECONDS = 0.05
+    # GET /users/me/host-stats: default and maximum window, in months
+    HOST_STATS_DEFAULT_MONTHS = 12
+    HOST_STATS_MAX_MONTHS = 36
+    # Per-process cache of serialized place reads. Writes invalidate the
+    # local worker immediately; other workers catch up within the TTL.
+    PLACE_CACHE_ENABLED = True
+    PLACE_CACHE_MAXSIZE = 512
+    PLACE_CACHE_TTL = 30  # seconds
+    # POST /places/bulk: rows per request, and rows written per commit
+    PLACE_IMPORT_MAX_ROWS = 5000
+    PLACE_IMPORT_CHUNK_SIZE = 500
+    # Rows fetched per round trip by the streaming catalogue export
+    PLACE_EXPORT_BATCH_SIZE = 1000
 
 
 class DevelopmentConfig(Config):
@@ -45,5 +101,8 @@ class TestingConfig(Config):
     # Use in-memory SQLite for fast, isolated tests (no MySQL required)
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
     BCRYPT_LOG_ROUNDS = 4  # Minimal rounds for testing (default is 12, very slow!)
+    PLACE_CACHE_ENABLED = False
+    PAYMENT_PROVIDER = 'fake'
+    PAYMENT_RETRY_BACKOFF = 0
     JWT_SECRET_KEY = "test-secret-key"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
@@ -0,0 +1,25 @@
+from datetime import date
+
+from app.extensions import db
+from app.services import facade
+
+
+def test_overlap_probe_uses_half_open_stays(app, create_place, register_user):
+    place_id = create_place()["place"]["id"]
+    guest = register_user()
+    with app.app_context():
+        booking = facade.create_booking({"place_id": place_id, "guest_id": guest["id"],
+                                         "check_in_date": "2030-05-10",
+                                         "check_out_date": "2030-05-15"})
+        check = facade.booking_repo.check_availability
+
+        assert check(place_id, date(2030, 5, 15), date(2030, 5, 20))
+        assert check(place_id, date(2030, 5, 1), date(2030, 5, 10))
+        assert not check(place_id, date(2030, 5, 12), date(2030, 5, 13))
+        assert not check(place_id, date(2030, 5, 1), date(2030, 5, 30))
+        assert check(place_id, date(2030, 5, 12), date(2030, 5, 13),
+                     exclude_booking_id=booking.id)
+
+        booking.status = 'cancelled'
+        db.session.commit()
+        assert check(place_id, date(2030, 5, 12), date(2030, 5, 13))
@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.models.booking import Booking
+from app.services import facade
+from config import TestingConfig
+
+
+@pytest.fixture()
+def file_app(tmp_path):
+    """App on a file database so threads get separate connections"""
+    class FileConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'race.db'}"
+
+    app = create_app(FileConfig)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def _seed(app, guests):
+    with app.app_context():
+        owner = facade.create_user({"first_name": "Host", "last_name": "User",
+                                    "email": "host@example.com", "password": "Password1!"})
+        place = facade.create_place({"title": "Contested loft", "description": "",
+                                     "price": 100.0, "latitude": 1.0, "longitude": 1.0,
+                                     "owner_id": owner.id})
+        guest_ids = [facade.create_user({"first_name": "Guest", "last_name": "Guest" + "abcdefgh"[i],
+                                         "email": f"guest{i}@example.com",
+                                         "password": "Password1!"}).id
+                     for i in range(guests)]
+        return place.id, guest_ids
+
+
+def test_concurrent_overlapping_bookings_never_double_book(file_app):
+    place_id, guest_ids = _seed(file_app, 8)
+    barrier = threading.Barrier(len(guest_ids))
+    outcomes = []
+
+    def book(guest_id, offset):
+        with file_app.app_context():
+            barrier.wait()
+            try:
+                facade.create_booking({
+                    "place_id": place_id, "guest_id": guest_id,
+                    "check_in_date": f"2030-06-{10 + offset:02d}",
+                    "check_out_date": f"2030-06-{14 + offset:02d}"})
+                outcomes.append("booked")
+            except ValueError:
+                outcomes.append("conflict")
+
+    threads = [threading.Thread(target=book, args=(guest_id, i % 2))
+               for i, guest_id in enumerate(guest_ids)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes.count("booked") == 1
+    assert outcomes.count("conflict") == len(guest_ids) - 1
+    with file_app.app_context():
+        assert Booking.query.count() == 1
@@ -0,0 +1,127 @@
+from datetime import date, datetime, timedelta
+
+import stripe
+from sqlalchemy import event
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+
+from app.extensions import db
+from app.models.booking_hold import BookingHold
+from app.services import facade, payment_gateway
+
+
+def _start_payment(client, guest, place_id, check_in="2030-03-01", check_out="2030-03-04"):
+    return client.post("/api/v1/payments/create-payment-intent", headers=guest["headers"],
+                       json={"place_id": place_id, "check_in_date": check_in,
+                             "check_out_date": check_out})
+
+
+def test_payment_intent_holds_dates_for_the_payer(app, client, create_place, register_user):
+    place_id = create_place()["place"]["id"]
+    first, second = register_user(), register_user()
+
+    started = _start_payment(client, first, place_id)
+    assert started.status_code == 200
+    assert _start_payment(client, second, place_id, "2030-03-03", "2030-03-06").status_code == 400
+    # The payer can restart checkout; their own hold does not block them
+    restarted = _start_payment(client, first, place_id)
+    assert restarted.status_code == 200
+    blocked = client.get(f"/api/v1/places/{place_id}/calendar?from=2030-03-01&to=2030-03-31")
+    assert blocked.get_json()["blocked"] == [{"start": "2030-03-01", "end": "2030-03-04"}]
+
+    with app.app_context():
+        assert BookingHold.query.one().payment_intent_id == \
+            restarted.get_json()["payment_intent_id"]
+        assert restarted.get_json()["payment_intent_id"] != started.get_json()["payment_intent_id"]
+        facade.create_booking({"place_id": place_id, "guest_id": first["id"],
+                               "check_in_date": "2030-03-01", "check_out_date": "2030-03-04"})
+        assert BookingHold.query.count() == 0
+
+
+def test_expired_holds_stop_blocking_and_are_swept(app, client, create_place, register_user):
+    place_id = create_place()["place"]["id"]
+    holder, guest = register_user(), register_user()
+    with app.app_context():
+        facade.create_booking_hold(place_id, holder["id"], "2030-04-01", "2030-04-05")
+        assert not facade.check_place_availability(place_id, "2030-04-02", "2030-04-03")
+        BookingHold.query.update({BookingHold.expires_at: datetime.utcnow() - timedelta(minutes=1)})
+        db.session.commit()
+        assert facade.check_place_availability(place_id, "2030-04-02", "2030-04-03")
+
+    result = app.test_cli_runner().invoke(args=["bookings", "sweep-holds", "--batch-size", "1"])
+
+    assert "Purged 1 expired hold" in result.output
+    with app.app_context():
+        assert BookingHold.query.count() == 0
+        facade.create_booking({"place_id": place_id, "guest_id": guest["id"],
+                               "check_in_date": "2030-04-01", "check_out_date": "2030-04-05"})
+
+
+def test_failed_payment_start_releases_the_hold(app, client, create_place, register_user):
+    place_id = create_place()["place"]["id"]
+    guest = register_user()
+
+    down = stripe.APIConnectionError("network down")
+    # Intent creation is keyed by the hold, so a blip is retried transparently
+    payment_gateway.provider.fail_next(down)
+    assert _start_payment(client, guest, place_id).status_code == 200
+    with app.app_context():
+        BookingHold.query.delete()
+        db.session.commit()
+
+    payment_gateway.provider.fail_next(down, down, down)
+    assert _start_payment(client, guest, place_id).status_code == 503
+    with app.app_context():
+        assert BookingHold.query.count() == 0
+
+
+def test_locking_availability_check_locks_the_hold_probe(app, create_place):
+    place_id = create_place()["place"]["id"]
+    probes = []
+
+    def record(state):
+        probes.append(str(state.statement.compile(dialect=mysql.dialect())))
+
+    with app.app_context():
+        event.listen(Session, "do_orm_execute", record)
+        try:
+            assert facade.booking_repo.check_availability(
+                place_id, date(2030, 3, 1), date(2030, 3, 4), for_update=True)
+        finally:
+            event.remove(Session, "do_orm_execute", record)
+    hold_probe = next(sql for sql in probes if "booking_holds" in sql)
+    assert "FOR UPDATE" in hold_probe
+    assert all("FOR UPDATE" in sql for sql in probes if "bookings." in sql)
+
+
+def test_date_filtered_listings_revalidate_when_holds_change(app, client, create_place,
+                                                             register_user):
+    place_id = create_place()["place"]["id"]
+    holder = register_user()
+    urls = ["/api/v1/places/available?check_in=2030-06-01&check_out=2030-06-03",
+            "/api/v1/places/?check_in=2030-06-01&check_out=2030-06-03"]
+    etags = [client.get(url).headers["ETag"] for url in urls]
+
+    with app.app_context():
+        facade.create_booking_hold(place_id, holder["id"], "2030-06-01", "2030-06-03")
+    for url, etag in zip(urls, etags):
+        held = client.get(url, headers={"If-None-Match": etag})
+        assert held.status_code == 200
+        assert held.get_json()["items"] == []
+
+    etags = [client.get(url).headers["ETag"] for url in urls]
+    with app.app_context():
+        BookingHold.query.update({BookingHold.expires_at: datetime.utcnow() - timedelta(minutes=1)})
+        db.session.commit()
+    for url, etag in zip(urls, etags):
+        released = client.get(url, headers={"If-None-Match": etag})
+        assert released.status_code == 200
+        assert [place["id"] for place in released.get_json()["items"]] == [place_id]
+
+
+def test_hold_expiry_keeps_sub_second_precision():
+    # The listing marker uses max(expires_at): a hold replaced within a
+    # second must not leave it unchanged on MySQL
+    ddl = str(CreateTable(BookingHold.__table__).compile(dialect=mysql.dialect()))
+    assert "expires_at DATETIME(6)" in ddl
@@ -0,0 +1,95 @@
+from datetime import date, datetime, timedelta
+
+from app.extensions import db
+from app.models.booking import Booking
+from app.persistence.booking_stats_repository import stay_months
+from app.services import facade
+
+
+def _stats(client, host, query="?from=2030-01&to=2030-02"):
+    response = client.get("/api/v1/users/me/host-stats" + query, headers=host["headers"])
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def _book(app, place_id, guest_id, check_in, check_out):
+    with app.app_context():
+        return facade.create_booking({"place_id": place_id, "guest_id": guest_id,
+                                      "check_in_date": check_in,
+                                      "check_out_date": check_out}).id
+
+
+def test_stay_months_split_nights_and_cents_exactly():
+    parts = list(stay_months(date(2030, 1, 30), date(2030, 2, 2), 100.01))
+    assert [(m, b, n) for m, b, n, _ in parts] == [
+        (date(2030, 1, 1), 1, 2), (date(2030, 2, 1), 0, 1)]
+    assert sum(cents for *_, cents in parts) == 10001
+
+
+def test_rollup_follows_create_and_cancel(client, app, create_place, register_user):
+    owner = register_user()
+    place_id = create_place(owner=owner, price=100.0)["place"]["id"]
+    guest = register_user()
+    booking_id = _book(app, place_id, guest["id"], "2030-01-30", "2030-02-02")
+    _book(app, place_id, guest["id"], "2030-02-10", "2030-02-12")
+
+    stats = _stats(client, owner)
+    place = stats["places"][0]
+    january, february = place["months"]
+    assert (january["month"], january["nights_booked"], january["revenue"]) == ("2030-01", 2, 200.0)
+    assert january["occupancy_rate"] == round(2 / 31, 4)
+    assert (february["bookings"], february["nights_booked"], february["revenue"]) == (1, 3, 300.0)
+    assert stats["totals"]["revenue"] == 500.0 and place["bookings"] == 2
+
+    response = client.delete(f"/api/v1/bookings/{booking_id}", headers=guest["headers"])
+    assert response.status_code == 200
+    january, february = _stats(client, owner)["places"][0]["months"]
+    assert january["nights_booked"] == 0 and january["revenue"] == 0
+    assert (february["nights_booked"], february["revenue"]) == (2, 200.0)
+
+    assert _stats(client, guest)["places"] == []
+
+
+
+def test_idle_places_are_listed_and_count_towards_occupancy(client, app, create_place,
+                                                            register_user):
+    owner = register_user()
+    booked = create_place(owner=owner, price=100.0)["place"]["id"]
+    idle = [create_place(owner=owner)["place"]["id"] for _ in range(4)]
+    _book(app, booked, register_user()["id"], "2030-01-10", "2030-01-16")
+
+    stats = _stats(client, owner)
+    places = {place["place_id"]: place for place in stats["places"]}
+    assert set(places) == {booked, *idle}
+    assert places[booked]["nights_booked"] == 6
+    assert all(places[place_id]["nights_booked"] == 0 and len(places[place_id]["months"]) == 2
+               for place_id in idle)
+    assert stats["totals"]["occupancy_rate"] == round(6 / (59 * 5), 4)
+
+
+def test_maintenance_and_rebuild_agree_with_incremental_rollup(client, app, create_place, register_user):
+    owner = register_user()
+    place_id = create_place(owner=owner, price=80.0)["place"]["id"]
+    guest = register_user()
+    stale = _book(app, place_id, guest["id"], "2030-01-05", "2030-01-08")
+    _book(app, place_id, guest["id"], "2030-01-20", "2030-02-03")
+    with app.app_context():
+        db.session.query(Booking).filter(Booking.id == stale).update(
+            {"created_at": datetime.utcnow() - timedelta(days=5)}, synchronize_session=False)
+        db.session.commit()
+        assert facade.run_booking_maintenance()["stale_pending"] == 1
+
+    # Stale pending stays are paid: still counted
+    incremental = _stats(client, owner)
+    assert incremental["totals"]["nights_booked"] == 17
+    result = app.test_cli_runner().invoke(args=["bookings", "rebuild-stats"])
+    assert "Rebuilt 2 monthly stats row(s)" in result.output
+    assert _stats(client, owner) == incremental
+
+
+def test_host_stats_rejects_bad_ranges(client, register_user):
+    host = register_user()
+    for query in ("?from=2030-13", "?from=2030-05&to=2030-01", "?from=2020-01&to=2030-01"):
+        response = client.get("/api/v1/users/me/host-stats" + query, headers=host["headers"])
+        assert response.status_code == 400
+    assert _stats(client, host, "")["places"] == []
@@ -0,0 +1,92 @@
+from datetime import date, datetime, timedelta
+
+from app.api.v1.bookings import serialize_booking, serialize_booking_rows
+from app.services import facade
+
+
+def _book(app, place_id, guest_id, start, nights=2):
+    with app.app_context():
+        booking = facade.create_booking({
+            "place_id": place_id, "guest_id": guest_id,
+            "check_in_date": start.isoformat(),
+            "check_out_date": (start + timedelta(days=nights)).isoformat()})
+        return booking.id
+
+
+def test_row_serializer_matches_model_methods(app, create_place, register_user):
+    place_id = create_place()["place"]["id"]
+    guest = register_user()
+    soon = _book(app, place_id, guest["id"], date.today() + timedelta(days=1))
+    later = _book(app, place_id, guest["id"], date.today() + timedelta(days=30))
+    with app.app_context():
+        for booking_id in (soon, later):
+            booking = facade.get_booking(booking_id)
+            data = serialize_booking(booking)
+            assert data["can_cancel"] == booking.can_cancel()
+            assert data["cancellation_deadline"] == \
+                booking.get_cancellation_deadline().isoformat()
+        assert not serialize_booking(facade.get_booking(soon))["can_cancel"]
+        assert serialize_booking(facade.get_booking(later))["can_cancel"]
+
+        cancelled = facade.get_booking(later)
+        cancelled.status = 'cancelled'
+        data = serialize_booking(cancelled)
+        assert data["can_cancel"] is False
+        assert data["cancellation_deadline"] is None
+
+
+def test_rows_share_one_now(app):
+    check_in = date(2030, 1, 10)
+    row = ("b1", "p1", "g1", check_in, check_in + timedelta(days=2), 300.0,
+           "confirmed", datetime(2029, 1, 1), datetime(2029, 1, 1))
+    deadline = datetime(2030, 1, 8)
+    assert serialize_booking_rows([row], now=deadline - timedelta(seconds=1))[0]["can_cancel"]
+    assert not serialize_booking_rows([row], now=deadline)[0]["can_cancel"]
+
+
+def test_guest_bookings_cursor_pagination(client, app, create_place, register_user):
+    place_id = create_place()["place"]["id"]
+    guest = register_user()
+    first = date.today() + timedelta(days=10)
+    ids = [_book(app, place_id, guest["id"], first + timedelta(days=3 * i)) for i in range(5)]
+
+    bare = client.get("/api/v1/bookings/", headers=guest["headers"])
+    assert bare.status_code == 200
+    assert [b["id"] for b in bare.get_json()] == ids[::-1]
+
+    seen, cursor = [], None
+    while True:
+        query = "?limit=2" + (f"&cursor={cursor}" if cursor else "")
+        page = client.get("/api/v1/bookings/" + query, headers=guest["headers"]).get_json()
+        assert len(page["items"]) <= 2
+        seen += [b["id"] for b in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert seen == ids[::-1]
+
+    upcoming = client.get("/api/v1/bookings/?type=upcoming&limit=3",
+                          headers=guest["headers"]).get_json()
+    assert [b["id"] for b in upcoming["items"]] == ids[:3]
+
+    bad = client.get("/api/v1/bookings/?cursor=nope", headers=guest["headers"])
+    assert bad.status_code == 400
+
+
+def test_place_bookings_pagination(client, app, create_place, register_user):
+    created = create_place()
+    place_id, owner = created["place"]["id"], created["owner"]
+    guest = register_user()
+    first = date.today() + timedelta(days=10)
+    ids = [_book(app, place_id, guest["id"], first + timedelta(days=3 * i)) for i in range(3)]
+
+    page = client.get(f"/api/v1/bookings/places/{place_id}?limit=2",
+                      headers=owner["headers"]).get_json()
+    assert [b["id"] for b in page["items"]] == ids[:2]
+    rest = client.get(f"/api/v1/bookings/places/{place_id}?cursor={page['next_cursor']}",
+                      headers=owner["headers"]).get_json()
+    assert [b["id"] for b in rest["items"]] == ids[2:]
+    assert rest["next_cursor"] is None
+
+    forbidden = client.get(f"/api/v1/bookings/places/{place_id}", headers=guest["headers"])
+    assert forbidden.status_code == 403
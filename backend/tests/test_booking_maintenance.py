@@ -0,0 +1,51 @@
+from datetime import date, datetime, timedelta
+
+from app.extensions import db
+from app.models.booking import Booking
+from app.services import facade
+
+
+def _booking(place_id, guest_id, check_in, check_out, status, **columns):
+    booking_id = facade.create_booking({"place_id": place_id, "guest_id": guest_id,
+                                        "check_in_date": check_in,
+                                        "check_out_date": check_out}).id
+    # Move rows into the past behind the model validators' back
+    db.session.query(Booking).filter(Booking.id == booking_id).update(
+        dict(status=status, **columns), synchronize_session=False)
+    db.session.commit()
+    return booking_id
+
+
+def test_maintenance_transitions_in_batches_and_is_idempotent(app, create_place, register_user):
+    owner = register_user()
+    place_id = create_place(owner=owner)["place"]["id"]
+    guest = register_user()
+    long_ago = datetime.utcnow() - timedelta(days=5)
+    yesterday = date.today() - timedelta(days=1)
+    with app.app_context():
+        finished = [_booking(place_id, guest["id"], f"2030-01-0{i}", f"2030-01-0{i + 1}",
+                             "confirmed", check_in_date=yesterday - timedelta(days=2),
+                             check_out_date=yesterday) for i in (1, 3)]
+        # Made before bookings recorded their payment intent, but paid all the same
+        legacy = _booking(place_id, guest["id"], "2030-02-01", "2030-02-03", "pending",
+                          created_at=long_ago)
+        fresh = _booking(place_id, guest["id"], "2030-03-01", "2030-03-03", "pending")
+        paid = _booking(place_id, guest["id"], "2030-05-01", "2030-05-03", "pending",
+                        created_at=long_ago, payment_intent_id="pi_paid")
+        upcoming = _booking(place_id, guest["id"], "2030-04-01", "2030-04-03", "confirmed")
+        version = facade.place_repo.get_booking_version(place_id)
+
+    result = app.test_cli_runner().invoke(args=["bookings", "maintain", "--batch-size", "1"])
+
+    assert "completed 2" in result.output and "2 stale pending" in result.output
+    assert "2 stale pending booking(s) are paid" in result.output
+    with app.app_context():
+        statuses = dict(db.session.query(Booking.id, Booking.status).all())
+        assert [statuses[b] for b in finished] == ["completed", "completed"]
+        assert (statuses[fresh], statuses[upcoming]) == ("pending", "confirmed")
+        # Paid with or without a recorded intent: reported, never cancelled
+        assert (statuses[legacy], statuses[paid]) == ("pending", "pending")
+        # Transitions bump booking_version, so every worker's cached calendars drop
+        assert facade.place_repo.get_booking_version(place_id) > version
+        report = facade.run_booking_maintenance()
+        assert (report["completed"], report["stale_pending"]) == (0, 2)
@@ -2,15 +2,7 @@ import datetime
 
 import pytest
 
-
-class FakePaymentIntent:
-    """Simple stand-in for stripe.PaymentIntent.retrieve result."""
-
-    def __init__(self, status, amount, metadata):
-        self.id = "pi_test"
-        self.status = status
-        self.amount = amount
-        self.metadata = metadata
+from app.services import payment_gateway
 
 
 def _expected_amount(price_per_night: float, check_in: str, check_out: str) -> int:
@@ -21,7 +13,7 @@ def _expected_amount(price_per_night: float, check_in: str, check_out: str) -> i
 
 
 def test_booking_succeeds_with_matching_payment_intent(
-    client, register_user, create_place, monkeypatch
+    client, register_user, create_place
 ):
     owner = register_user()
     place = create_place(owner=owner)["place"]
@@ -30,17 +22,15 @@ def test_booking_succeeds_with_matching_payment_intent(
     check_in, check_out = "2030-01-01", "2030-01-03"  # 2 nights
     expected_amount = _expected_amount(place["price"], check_in, check_out)
 
-    def fake_retrieve(payment_intent_id):
-        metadata = {
-            "user_id": guest["id"],
-            "place_id": place["id"],
-            "check_in_date": check_in,
-            "check_out_date": check_out,
-            "expected_amount_cents": str(expected_amount),
-        }
-        return FakePaymentIntent(status="succeeded", amount=expected_amount, metadata=metadata)
-
-    monkeypatch.setattr("app.api.v1.bookings.stripe.PaymentIntent.retrieve", fake_retrieve)
+    metadata = {
+        "user_id": guest["id"],
+        "place_id": place["id"],
+        "check_in_date": check_in,
+        "check_out_date": check_out,
+        "expected_amount_cents": str(expected_amount),
+    }
+    payment_gateway.provider.add_intent(
+        intent_id="pi_test", status="succeeded", amount=expected_amount, metadata=metadata)
 
     resp = client.post(
         "/api/v1/bookings/",
@@ -60,7 +50,7 @@ def test_booking_succeeds_with_matching_payment_intent(
     assert data["total_price"] == pytest.approx(expected_amount / 100.0)
 
 
-def test_booking_rejects_amount_mismatch(client, register_user, create_place, monkeypatch):
+def test_booking_rejects_amount_mismatch(client, register_user, create_place):
     owner = register_user()
     place = create_place(owner=owner)["place"]
     guest = register_user()
@@ -68,18 +58,16 @@ def test_booking_rejects_amount_mismatch(client, register_user, create_place, mo
     check_in, check_out = "2030-02-10", "2030-02-12"  # 2 nights
     expected_amount = _expected_amount(place["price"], check_in, check_out)
 
-    def fake_retrieve(payment_intent_id):
-        metadata = {
-            "user_id": guest["id"],
-            "place_id": place["id"],
-            "check_in_date": check_in,
-            "check_out_date": check_out,
-            "expected_amount_cents": str(expected_amount),
-        }
-        # Intentionally wrong amount to trigger rejection
-        return FakePaymentIntent(status="succeeded", amount=expected_amount - 500, metadata=metadata)
-
-    monkeypatch.setattr("app.api.v1.bookings.stripe.PaymentIntent.retrieve", fake_retrieve)
+    metadata = {
+        "user_id": guest["id"],
+        "place_id": place["id"],
+        "check_in_date": check_in,
+        "check_out_date": check_out,
+        "expected_amount_cents": str(expected_amount),
+    }
+    # Intentionally wrong amount to trigger rejection
+    payment_gateway.provider.add_intent(
+        intent_id="pi_test", status="succeeded", amount=expected_amount - 500, metadata=metadata)
 
     resp = client.post(
         "/api/v1/bookings/",
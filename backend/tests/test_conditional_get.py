@@ -0,0 +1,72 @@
+from sqlalchemy.dialects import mysql
+from sqlalchemy.schema import CreateTable
+
+from app.extensions import db
+
+
+def _revalidate(client, url):
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    return etag, client.get(url, headers={"If-None-Match": etag})
+
+
+def test_place_list_returns_304_until_a_place_changes(client, create_place, register_user):
+    owner = register_user()
+    create_place(owner=owner)
+
+    etag, repeat = _revalidate(client, "/api/v1/places/")
+    assert repeat.status_code == 304
+    assert repeat.data == b""
+
+    create_place(owner=owner)
+    changed = client.get("/api/v1/places/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_place_detail_etag_tracks_amenity_links(client, create_place, create_amenity):
+    created = create_place()
+    place, owner = created["place"], created["owner"]
+    amenity = create_amenity(creator=owner)["amenity"]
+    url = f"/api/v1/places/{place['id']}"
+
+    etag, repeat = _revalidate(client, url)
+    assert repeat.status_code == 304
+
+    client.post(f"{url}/amenities/{amenity['id']}", headers=owner["headers"])
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_amenity_and_review_endpoints_support_etags(client, create_place, create_amenity, register_user):
+    amenity = create_amenity()["amenity"]
+    place = create_place()["place"]
+    client.post("/api/v1/reviews/", headers=register_user()["headers"],
+                json={"text": "Good", "rating": 4, "place_id": place["id"]})
+
+    for url in ("/api/v1/amenities/", f"/api/v1/amenities/{amenity['id']}",
+                "/api/v1/reviews/", f"/api/v1/places/{place['id']}/reviews"):
+        _, repeat = _revalidate(client, url)
+        assert repeat.status_code == 304, url
+
+
+def test_edits_within_a_second_change_the_etag(client, create_place):
+    created = create_place()
+    url = f"/api/v1/places/{created['place']['id']}"
+    etags = {client.get(url).headers["ETag"]}
+    for price in (151.0, 152.0):
+        client.put(url, headers=created["owner"]["headers"], json={"price": price})
+        etags.add(client.get(url).headers["ETag"])
+    assert len(etags) == 3
+
+    # MySQL's plain DATETIME would round both edits to the same second
+    for table in db.metadata.sorted_tables:
+        if "updated_at" in table.c:
+            ddl = str(CreateTable(table).compile(dialect=mysql.dialect()))
+            assert "updated_at DATETIME(6)" in ddl, table.name
+
+
+def test_missing_place_has_no_etag(client):
+    response = client.get("/api/v1/places/does-not-exist")
+    assert response.status_code == 404
+    assert "ETag" not in response.headers
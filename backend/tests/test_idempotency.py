@@ -0,0 +1,149 @@
+from datetime import datetime, timedelta
+
+import stripe
+
+from app.api import idempotency
+from app.extensions import db
+from app.models.booking_hold import BookingHold
+from app.models.idempotency_key import idempotency_keys
+from app.services import facade, payment_gateway
+
+
+def _start_payment(client, guest, place_id, key, check_out="2030-07-04"):
+    headers = dict(guest["headers"], **{"Idempotency-Key": key})
+    return client.post("/api/v1/payments/create-payment-intent", headers=headers,
+                       json={"place_id": place_id, "check_in_date": "2030-07-01",
+                             "check_out_date": check_out})
+
+
+def test_retried_payment_intent_is_replayed(client, app, create_place, register_user):
+    place_id = create_place()["place"]["id"]
+    guest = register_user()
+
+    first = _start_payment(client, guest, place_id, "checkout-1")
+    calls = payment_gateway.provider.calls
+    retry = _start_payment(client, guest, place_id, "checkout-1")
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.get_json() == first.get_json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert payment_gateway.provider.calls == calls
+    assert _start_payment(client, guest, place_id, "checkout-1", "2030-07-05").status_code == 422
+
+    # Keys are per user: someone else's identical key is a new request
+    other = _start_payment(client, register_user(), place_id, "checkout-1")
+    assert other.status_code == 400  # the first guest holds the dates
+    with app.app_context():
+        assert BookingHold.query.count() == 1
+
+
+def test_server_errors_release_the_key(client, app, create_place, register_user):
+    place_id = create_place()["place"]["id"]
+    guest = register_user()
+    down = stripe.APIConnectionError("network down")
+    payment_gateway.provider.fail_next(down, down, down)
+
+    assert _start_payment(client, guest, place_id, "checkout-2").status_code == 503
+    assert _start_payment(client, guest, place_id, "checkout-2").status_code == 200
+
+
+def test_retried_booking_is_replayed(client, app, create_place, register_user):
+    place = create_place()["place"]
+    guest = register_user()
+    payment_gateway.provider.add_intent(
+        intent_id="pi_idem", status="succeeded", amount=int(place["price"] * 2 * 100),
+        metadata={"user_id": guest["id"], "place_id": place["id"],
+                  "check_in_date": "2030-08-01", "check_out_date": "2030-08-03"})
+    headers = dict(guest["headers"], **{"Idempotency-Key": "book-1"})
+    payload = {"place_id": place["id"], "check_in_date": "2030-08-01",
+               "check_out_date": "2030-08-03", "payment_intent_id": "pi_idem"}
+
+    first = client.post("/api/v1/bookings/", headers=headers, json=payload)
+    retry = client.post("/api/v1/bookings/", headers=headers, json=payload)
+    assert first.status_code == retry.status_code == 201
+    assert retry.get_json()["id"] == first.get_json()["id"]
+
+
+def test_duplicate_waits_for_the_request_in_flight(client, app, create_place, register_user,
+                                                   monkeypatch):
+    place_id = create_place()["place"]["id"]
+    guest = register_user()
+    with app.app_context():
+        facade.idempotency_repo.claim(guest["id"], "checkout-3", "other", 60)
+    app.config["IDEMPOTENCY_WAIT_SECONDS"] = 0
+    assert _start_payment(client, guest, place_id, "checkout-3").status_code == 422
+
+    with app.app_context():
+        facade.idempotency_repo.release(guest["id"], "checkout-3")
+    assert _start_payment(client, guest, place_id, "checkout-4").status_code == 200
+    with app.app_context():
+        # Put checkout-4 back in flight, as if its first attempt were still running
+        db.session.execute(idempotency_keys.update().where(
+            idempotency_keys.c.key == "checkout-4").values(response_status=None))
+        db.session.commit()
+    assert _start_payment(client, guest, place_id, "checkout-4").status_code == 409
+
+    app.config["IDEMPOTENCY_WAIT_SECONDS"] = 5
+    polls = []
+
+    def first_request_finishes(seconds):
+        polls.append(seconds)
+        facade.idempotency_repo.complete(
+            guest["id"], "checkout-4", 200,
+            '{"client_secret": "pi_first_secret", "payment_intent_id": "pi_first"}', 60)
+
+    monkeypatch.setattr(idempotency.time, "sleep", first_request_finishes)
+    waited = _start_payment(client, guest, place_id, "checkout-4")
+    assert waited.status_code == 200
+    assert waited.get_json()["payment_intent_id"] == "pi_first"
+    assert len(polls) == 1
+
+
+
+def test_claim_abandoned_by_a_dead_worker_is_taken_over(client, app, create_place,
+                                                        register_user, monkeypatch):
+    place_id = create_place()["place"]["id"]
+    guest = register_user()
+    first = _start_payment(client, guest, place_id, "checkout-5")
+    assert first.status_code == 200
+
+    def in_flight(expires_at):
+        # As if the first attempt's worker were killed before it completed
+        with app.app_context():
+            db.session.execute(idempotency_keys.update().where(
+                idempotency_keys.c.key == "checkout-5").values(
+                    response_status=None, response_body=None, expires_at=expires_at))
+            db.session.commit()
+
+    in_flight(datetime.utcnow() - timedelta(seconds=1))
+    retry = _start_payment(client, guest, place_id, "checkout-5")
+    assert retry.status_code == 200
+    assert retry.get_json()["payment_intent_id"] != first.get_json()["payment_intent_id"]
+
+    # A duplicate already waiting takes over once the lease runs out
+    in_flight(datetime.utcnow() + timedelta(minutes=5))
+    monkeypatch.setattr(idempotency.time, "sleep",
+                        lambda seconds: in_flight(datetime.utcnow() - timedelta(seconds=1)))
+    waited = _start_payment(client, guest, place_id, "checkout-5")
+    assert waited.status_code == 200 and "Idempotent-Replayed" not in waited.headers
+    with app.app_context():
+        row = facade.idempotency_repo.get(guest["id"], "checkout-5")
+        # The response is kept for the full TTL, not the lease
+        assert row.response_status == 200
+        assert row.expires_at > datetime.utcnow() + timedelta(hours=23)
+
+
+def test_maintenance_purges_expired_keys(app, register_user):
+    user = register_user()
+    with app.app_context():
+        repo = facade.idempotency_repo
+        assert repo.claim(user["id"], "old", "f", 60)
+        assert repo.claim(user["id"], "new", "f", 60)
+        db.session.execute(idempotency_keys.update().where(
+            idempotency_keys.c.key == "old").values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        db.session.commit()
+        # A live key cannot be claimed a second time
+        assert not repo.claim(user["id"], "new", "f", 60)
+
+        assert facade.run_booking_maintenance()["keys_purged"] == 1
+        assert [row.key for row in db.session.execute(idempotency_keys.select())] == ["new"]
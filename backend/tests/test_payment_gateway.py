@@ -0,0 +1,143 @@
+import pytest
+import stripe
+
+from app.services.payment_gateway import (
+    CircuitBreaker, FakeProvider, IntentRecord, PaymentGateway, PaymentUnavailable)
+from app.services import payment_gateway
+from app.utils.cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _gateway(threshold=3, reset=10.0, retries=2):
+    clock = Clock()
+    gateway = PaymentGateway()
+    gateway.provider = FakeProvider()
+    gateway.breaker = CircuitBreaker(threshold, reset, clock=clock)
+    gateway.max_retries = retries
+    gateway._sleep = lambda seconds: None
+    gateway.intent_cache = TTLCache(ttl=5.0, clock=clock)
+    return gateway, clock
+
+
+def test_reads_are_retried_and_creates_only_with_an_idempotency_key():
+    gateway, _ = _gateway(threshold=10)
+    intent = gateway.provider.add_intent(status="succeeded", amount=500)
+    gateway.provider.fail_next(stripe.APIConnectionError("reset"),
+                               stripe.APIError("bad gateway", http_status=502))
+    assert gateway.retrieve_intent(intent.id).id == intent.id
+    assert gateway.provider.calls == 3
+
+    gateway.provider.fail_next(stripe.APIConnectionError("reset"))
+    with pytest.raises(PaymentUnavailable):
+        gateway.create_intent({"amount": 100})
+
+    gateway.provider.fail_next(stripe.APIConnectionError("reset"))
+    first = gateway.create_intent({"amount": 100}, idempotency_key="hold-1")
+    assert gateway.create_intent({"amount": 100}, idempotency_key="hold-1") is first
+
+    with pytest.raises(stripe.InvalidRequestError):
+        gateway.retrieve_intent("pi_missing")
+
+
+def test_breaker_fails_fast_then_lets_one_trial_through():
+    gateway, clock = _gateway(threshold=3, reset=10.0, retries=0)
+    intent = gateway.provider.add_intent()
+    down = stripe.APIConnectionError("timeout")
+    gateway.provider.fail_next(down, down, down)
+    for _ in range(3):
+        with pytest.raises(PaymentUnavailable):
+            gateway.retrieve_intent(intent.id)
+    assert gateway.breaker.state == "open"
+
+    calls = gateway.provider.calls
+    with pytest.raises(PaymentUnavailable):
+        gateway.retrieve_intent(intent.id)
+    assert gateway.provider.calls == calls  # rejected without a network call
+
+    clock.now += 10.0
+    assert gateway.breaker.state == "half-open"
+    gateway.provider.fail_next(down)
+    with pytest.raises(PaymentUnavailable):
+        gateway.retrieve_intent(intent.id)
+    assert gateway.breaker.state == "open"  # the failed trial re-opens it
+
+    clock.now += 10.0
+    assert gateway.retrieve_intent(intent.id).id == intent.id
+    assert gateway.breaker.state == "closed"
+
+
+def test_refused_requests_do_not_trip_the_breaker():
+    gateway, _ = _gateway(threshold=1, retries=0)
+    for _ in range(3):
+        with pytest.raises(stripe.InvalidRequestError):
+            gateway.retrieve_intent("pi_missing")
+    assert gateway.breaker.state == "closed"
+
+
+def test_unexpected_errors_end_a_half_open_trial():
+    gateway, clock = _gateway(threshold=1, reset=10.0, retries=0)
+    intent = gateway.provider.add_intent()
+    gateway.provider.fail_next(stripe.APIConnectionError("timeout"))
+    with pytest.raises(PaymentUnavailable):
+        gateway.retrieve_intent(intent.id)
+
+    clock.now += 10.0
+    gateway.provider.fail_next(KeyError("unexpected"))
+    with pytest.raises(KeyError):
+        gateway.retrieve_intent(intent.id)
+    assert gateway.breaker.state == "open"
+
+    clock.now += 10.0
+    assert gateway.retrieve_intent(intent.id).id == intent.id
+    assert gateway.breaker.state == "closed"
+
+
+def test_gateway_refuses_calls_until_configured():
+    with pytest.raises(RuntimeError):
+        PaymentGateway().retrieve_intent("pi_any")
+
+
+def test_terminal_intents_are_cached_until_evicted_and_others_briefly():
+    gateway, clock = _gateway()
+    intent = gateway.provider.add_intent(status="processing", amount=900,
+                                         metadata={"place_id": "p1"})
+
+    record = gateway.retrieve_intent(intent.id)
+    assert record == IntentRecord(intent.id, "processing", 900, "usd", {"place_id": "p1"})
+    gateway.provider.set_status(intent.id, "succeeded")
+    assert gateway.retrieve_intent(intent.id).status == "processing"
+    assert gateway.provider.calls == 1
+
+    clock.now += 5.0
+    assert gateway.retrieve_intent(intent.id).status == "succeeded"
+    clock.now += 10 ** 6
+    assert gateway.retrieve_intent(intent.id).status == "succeeded"
+    assert gateway.provider.calls == 2
+
+
+def test_checkout_verifies_a_succeeded_intent_once(client, create_place, register_user):
+    place = create_place()["place"]
+    guest = register_user()
+    intent = payment_gateway.provider.add_intent(
+        status="succeeded", amount=int(place["price"] * 2 * 100),
+        metadata={"user_id": guest["id"], "place_id": place["id"],
+                  "check_in_date": "2030-09-01", "check_out_date": "2030-09-03"})
+    calls = payment_gateway.provider.calls
+
+    for _ in range(2):
+        verified = client.get(f"/api/v1/payments/verify-payment/{intent.id}",
+                              headers=guest["headers"])
+        assert verified.get_json()["status"] == "succeeded"
+    booked = client.post("/api/v1/bookings/", headers=guest["headers"], json={
+        "place_id": place["id"], "check_in_date": "2030-09-01",
+        "check_out_date": "2030-09-03", "payment_intent_id": intent.id})
+
+    assert booked.status_code == 201
+    assert payment_gateway.provider.calls == calls + 1
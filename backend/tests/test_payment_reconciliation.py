@@ -0,0 +1,88 @@
+import calendar
+import json
+from datetime import datetime
+
+from app.extensions import db
+from app.models.booking import Booking
+from app.services import facade, payment_gateway
+
+DAY = datetime(2030, 1, 10)
+
+
+def _at(hour, minute=0):
+    return DAY.replace(hour=hour, minute=minute)
+
+
+def _intent(hour, minute=0, status="succeeded", amount=20000, place_id="p"):
+    created = calendar.timegm(_at(hour, minute).utctimetuple())
+    metadata = {"place_id": place_id} if place_id else {}
+    return payment_gateway.provider.add_intent(status=status, amount=amount, metadata=metadata,
+                                               created=created).id
+
+
+def _book(app, place_id, guest_id, stay, created_at, payment_intent_id=None, status=None):
+    """A two-night booking (20000 cents at 100/night) created at created_at"""
+    with app.app_context():
+        booking = facade.create_booking({
+            "place_id": place_id, "guest_id": guest_id,
+            "check_in_date": f"2030-03-{stay * 3 + 1:02d}",
+            "check_out_date": f"2030-03-{stay * 3 + 3:02d}",
+            "payment_intent_id": payment_intent_id})
+        booking.created_at = created_at
+        if status:
+            booking.status = status
+        db.session.commit()
+        return booking.id
+
+
+def test_reconcile_reports_every_kind_of_discrepancy(app, create_place, register_user, tmp_path):
+    place_id = create_place(price=100.0)["place"]["id"]
+    guest_id = register_user()["id"]
+
+    ok = _book(app, place_id, guest_id, 0, _at(10, 5), _intent(10))
+    short = _book(app, place_id, guest_id, 1, _at(11, 5), _intent(11, amount=19000))
+    unpaid = _book(app, place_id, guest_id, 2, _at(12, 5), _intent(12, status="processing"))
+    legacy = _book(app, place_id, guest_id, 3, _at(13))
+    lost = _book(app, place_id, guest_id, 4, _at(14), "pi_gone")
+    # The intent falls in the previous window: retrieved on its own, not an orphan
+    _book(app, place_id, guest_id, 5, _at(6, 1), _intent(5, 59))
+    _book(app, place_id, guest_id, 6, _at(15), _intent(14, 50, status="canceled"),
+          status="cancelled")
+    orphan = _intent(16)
+    _intent(17, place_id=None)  # not a booking payment
+    _intent(9, status="requires_payment_method")  # abandoned checkout
+    with app.app_context():
+        assert Booking.query.count() == 7
+
+    report = tmp_path / "report.ndjson"
+    result = app.test_cli_runner().invoke(args=[
+        "bookings", "reconcile", "--from", "2030-01-10", "--to", "2030-01-11",
+        "--window-hours", "6", "--page-size", "2", "--output", str(report)])
+    assert result.exit_code == 0, result.output
+    assert "Checked 7 booking(s) against 8 intent(s)" in result.output
+
+    issues = {issue["booking_id"] or issue["payment_intent_id"]: issue
+              for issue in map(json.loads, report.read_text().splitlines())}
+    assert {key: issue["kind"] for key, issue in issues.items()} == {
+        short: "amount_mismatch", unpaid: "intent_not_succeeded",
+        legacy: "missing_intent_id", lost: "intent_not_found",
+        orphan: "paid_without_booking"}
+    assert (issues[short]["expected_cents"], issues[short]["intent_amount"]) == (20000, 19000)
+    assert ok not in issues
+
+    csv_report = tmp_path / "report.csv"
+    result = app.test_cli_runner().invoke(args=[
+        "bookings", "reconcile", "--from", "2030-01-10", "--to", "2030-01-11",
+        "--format", "csv", "--output", str(csv_report)])
+    assert result.exit_code == 0, result.output
+    lines = csv_report.read_text().splitlines()
+    assert lines[0].startswith("kind,booking_id") and len(lines) == 6
+
+
+def test_intents_are_listed_newest_first_a_page_per_call(app):
+    created = [_intent(8, minute) for minute in range(5)]
+    _intent(23)  # outside the range
+    calls = payment_gateway.provider.calls
+    scanned = list(payment_gateway.iter_intents(_at(0), _at(23), page_size=2))
+    assert [intent.id for intent in scanned] == created[::-1]
+    assert payment_gateway.provider.calls == calls + 3
@@ -0,0 +1,85 @@
+import hashlib
+import hmac
+import json
+import time
+
+from app.extensions import db
+from app.models.booking import Booking
+from app.models.payment_event import payment_events
+from app.services import payment_gateway
+
+SECRET = "whsec_test"
+
+
+def _deliver(client, event, secret=SECRET):
+    """POST an event signed the way Stripe signs webhook deliveries"""
+    body = json.dumps(event)
+    timestamp = int(time.time())
+    signature = hmac.new(secret.encode(), f"{timestamp}.{body}".encode(),
+                         hashlib.sha256).hexdigest()
+    return client.post("/api/v1/payments/webhook", data=body,
+                       content_type="application/json",
+                       headers={"Stripe-Signature": f"t={timestamp},v1={signature}"})
+
+
+def _succeeded(event_id, guest, place, amount=None, check_in="2030-06-01", check_out="2030-06-03"):
+    nights = 2
+    return {
+        "id": event_id, "object": "event", "type": "payment_intent.succeeded",
+        "data": {"object": {
+            "id": "pi_webhook", "object": "payment_intent", "status": "succeeded",
+            "amount": amount if amount is not None else int(place["price"] * nights * 100),
+            "currency": "usd",
+            "metadata": {"user_id": guest["id"], "place_id": place["id"],
+                         "check_in_date": check_in, "check_out_date": check_out},
+        }},
+    }
+
+
+def test_webhook_books_once_and_post_is_a_lookup(app, client, create_place, register_user):
+    app.config["STRIPE_WEBHOOK_SECRET"] = SECRET
+    place = create_place()["place"]
+    guest = register_user()
+    event = _succeeded("evt_1", guest, place)
+
+    assert _deliver(client, event).get_json()["outcome"] == "booked"
+    assert _deliver(client, event).get_json()["outcome"] == "duplicate"
+    # Same intent in a different event (e.g. a resent notification)
+    assert _deliver(client, dict(event, id="evt_2")).get_json()["outcome"] == "exists"
+
+    calls = payment_gateway.provider.calls
+    resp = client.post("/api/v1/bookings/", headers=guest["headers"], json={
+        "place_id": place["id"], "check_in_date": "2030-06-01",
+        "check_out_date": "2030-06-03", "payment_intent_id": "pi_webhook"})
+    assert resp.status_code == 200, resp.get_json()
+    assert payment_gateway.provider.calls == calls  # answered without the provider
+    with app.app_context():
+        booking = Booking.query.one()
+        assert resp.get_json()["id"] == booking.id
+        assert booking.payment_intent_id == "pi_webhook"
+        assert db.session.query(payment_events).count() == 2
+
+    other = register_user()
+    stolen = client.post("/api/v1/bookings/", headers=other["headers"], json={
+        "place_id": place["id"], "check_in_date": "2030-06-01",
+        "check_out_date": "2030-06-03", "payment_intent_id": "pi_webhook"})
+    assert stolen.status_code == 400
+
+
+def test_webhook_rejects_bad_signatures_and_records_unbookable_events(app, client, create_place,
+                                                                      register_user):
+    place = create_place()["place"]
+    guest = register_user()
+    event = _succeeded("evt_underpaid", guest, place, amount=100)
+    assert _deliver(client, event).status_code == 503
+
+    app.config["STRIPE_WEBHOOK_SECRET"] = SECRET
+    assert _deliver(client, event, secret="whsec_other").status_code == 400
+
+    outcome = _deliver(client, event).get_json()["outcome"]
+    assert outcome.startswith("rejected") and "amount" in outcome
+    ignored = dict(event, id="evt_other", type="payment_intent.created")
+    assert _deliver(client, ignored).get_json()["outcome"] == "ignored"
+    with app.app_context():
+        assert Booking.query.count() == 0
+        assert db.session.query(payment_events).count() == 2
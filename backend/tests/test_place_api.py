@@ -52,3 +52,17 @@ def test_create_place_validation_errors(client, register_user, field, value):
     )
 
     assert response.status_code == 400
+
+
+def test_update_place_returns_the_place_or_the_error(client, create_place):
+    created = create_place()
+    url = f"/api/v1/places/{created['place']['id']}"
+
+    updated = client.put(url, headers=created["owner"]["headers"], json={"title": "Renamed"})
+    assert updated.status_code == 200
+    assert updated.get_json()["title"] == "Renamed"
+    assert "reviews" in updated.get_json()
+
+    invalid = client.put(url, headers=created["owner"]["headers"], json={"price": -5})
+    assert invalid.status_code == 400
+    assert set(invalid.get_json()) == {"error"}
@@ -0,0 +1,48 @@
+import json
+
+
+def _row(**overrides):
+    row = {"title": "Imported flat", "description": "Two rooms", "price": 90.0,
+           "latitude": 51.5, "longitude": -0.12}
+    row.update(overrides)
+    return row
+
+
+def test_bulk_import_reports_each_row(client, register_user):
+    owner = register_user()
+    rows = [_row(title="<b>Loft</b> one"), _row(price=-5), _row(title="Loft two"), "nope"]
+
+    response = client.post("/api/v1/places/bulk", headers=owner["headers"], json=rows)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body["created"], body["failed"]) == (2, 2)
+    assert [r["status"] for r in body["results"]] == ["created", "error", "created", "error"]
+    place = client.get(f"/api/v1/places/{body['results'][0]['id']}").get_json()
+    assert place["title"] == "Loft one"
+    assert place["owner_id"] == owner["id"]
+    assert len(client.get("/api/v1/places/search?q=loft").get_json()["items"]) == 2
+
+
+def test_bulk_import_accepts_ndjson_in_chunks(app, client, register_user):
+    owner = register_user()
+    app.config["PLACE_IMPORT_CHUNK_SIZE"] = 2
+    lines = [json.dumps(_row(title=f"Cabin {i}")) for i in range(5)] + ["{broken"]
+
+    response = client.post("/api/v1/places/bulk", headers=owner["headers"],
+                           data="\n".join(lines), content_type="application/x-ndjson")
+
+    body = response.get_json()
+    assert (body["created"], body["failed"]) == (5, 1)
+    assert body["results"][-1]["error"] == "Invalid JSON on line 6"
+    assert len(client.get("/api/v1/places/").get_json()) == 5
+
+
+def test_bulk_import_rejects_bad_bodies(app, client, register_user):
+    owner = register_user()
+    url = "/api/v1/places/bulk"
+    assert client.post(url, headers=owner["headers"], json={"title": "x"}).status_code == 400
+    app.config["PLACE_IMPORT_MAX_ROWS"] = 1
+    assert client.post(url, headers=owner["headers"], json=[_row(), _row()]).status_code == 400
+    assert client.post(f"{url}?owner_id=someone-else", headers=owner["headers"],
+                       json=[_row()]).status_code == 403
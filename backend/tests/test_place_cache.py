@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.extensions import db
+from app.models.place import Place
+from app.services import facade
+from app.utils.cache import TTLCache
+
+
+@pytest.fixture()
+def place_cache(app):
+    facade.place_cache.configure(enabled=True)
+    return facade.place_cache
+
+
+def test_lru_eviction_and_ttl_expiry():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.set(("a",), 1)
+    cache.set(("b",), 2)
+    cache.get(("a",))
+    cache.set(("c",), 3)  # evicts ("b",), the least recently used
+
+    assert cache.get(("b",)) is None
+    now[0] = 11
+    assert cache.get(("a",)) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["evictions"], stats["expirations"]) == (1, 1, 1)
+
+
+def test_list_is_served_from_cache_until_a_write(client, place_cache, create_place):
+    created = create_place(title="Before")
+    place, owner = created["place"], created["owner"]
+
+    client.get("/api/v1/places/")
+    client.get("/api/v1/places/")
+    assert place_cache.stats()["hits"] == 1
+
+    response = client.put(f"/api/v1/places/{place['id']}", headers=owner["headers"],
+                          json={"title": "After"})
+    assert response.status_code == 200
+
+    assert client.get("/api/v1/places/").get_json()[0]["title"] == "After"
+    assert client.get(f"/api/v1/places/{place['id']}").get_json()["title"] == "After"
+
+
+def test_review_write_invalidates_place_detail(client, place_cache, create_place, register_user):
+    place = create_place()["place"]
+    assert client.get(f"/api/v1/places/{place['id']}").get_json()["reviews"] == []
+
+    client.post("/api/v1/reviews/", headers=register_user()["headers"],
+                json={"text": "Lovely", "rating": 5, "place_id": place["id"]})
+
+    detail = client.get(f"/api/v1/places/{place['id']}").get_json()
+    assert [r["text"] for r in detail["reviews"]] == ["Lovely"]
+
+
+def test_cache_disabled_in_testing_config(app):
+    assert facade.place_cache.enabled is False
+
+
+def test_write_from_another_worker_is_not_served_stale(app, client, place_cache, create_place):
+    place = create_place(title="Old")["place"]
+    url = f"/api/v1/places/{place['id']}"
+    stale = client.get(url)
+    client.get("/api/v1/places/")
+
+    # Another worker's write: committed, but this worker's cache is not invalidated
+    with app.app_context():
+        db.session.execute(update(Place).where(Place.id == place["id"]).values(
+            title="New", updated_at=datetime.utcnow() + timedelta(seconds=5)))
+        db.session.commit()
+
+    fresh = client.get(url, headers={"If-None-Match": stale.headers["ETag"]})
+    assert fresh.status_code == 200
+    assert fresh.get_json()["title"] == "New"
+    assert client.get("/api/v1/places/").get_json()[0]["title"] == "New"
+    assert client.get(url, headers={"If-None-Match": fresh.headers["ETag"]}).status_code == 304
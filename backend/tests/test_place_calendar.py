@@ -0,0 +1,86 @@
+import time
+
+import pytest
+
+from app.extensions import db
+from app.models.user import User
+from app.services import facade
+
+
+@pytest.fixture()
+def place_cache(app):
+    facade.place_cache.configure(enabled=True)
+    return facade.place_cache
+
+
+def _book(app, place_id, guest_id, check_in, check_out):
+    with app.app_context():
+        return facade.create_booking({"place_id": place_id, "guest_id": guest_id,
+                                      "check_in_date": check_in, "check_out_date": check_out}).id
+
+
+def _blocked(client, place_id, query="from=2030-05-12&to=2030-06-01"):
+    response = client.get(f"/api/v1/places/{place_id}/calendar?{query}")
+    assert response.status_code == 200, response.get_json()
+    return [(r["start"], r["end"]) for r in response.get_json()["blocked"]]
+
+
+def test_calendar_merges_and_clips_blocked_ranges(app, client, create_place, register_user):
+    place = create_place()["place"]
+    guest = register_user()
+    _book(app, place["id"], guest["id"], "2030-05-10", "2030-05-15")
+    _book(app, place["id"], guest["id"], "2030-05-15", "2030-05-18")
+    _book(app, place["id"], guest["id"], "2030-05-20", "2030-05-22")
+    _book(app, place["id"], guest["id"], "2030-07-01", "2030-07-05")
+
+    assert _blocked(client, place["id"]) == [("2030-05-12", "2030-05-18"),
+                                             ("2030-05-20", "2030-05-22")]
+
+
+def test_calendar_cache_follows_booking_writes(app, client, place_cache, create_place, register_user):
+    place = create_place()["place"]
+    guest = register_user()
+    hits = place_cache.stats()["hits"]
+    assert _blocked(client, place["id"]) == []
+    assert _blocked(client, place["id"]) == []
+    assert place_cache.stats()["hits"] == hits + 1
+
+    booking_id = _book(app, place["id"], guest["id"], "2030-05-20", "2030-05-22")
+    assert _blocked(client, place["id"]) == [("2030-05-20", "2030-05-22")]
+
+    with app.app_context():
+        facade.cancel_booking(booking_id, db.session.get(User, guest["id"]))
+    assert _blocked(client, place["id"]) == []
+
+
+
+def test_calendar_follows_writes_made_by_other_workers(app, client, place_cache, create_place,
+                                                       register_user, monkeypatch):
+    place = create_place()["place"]
+    guest = register_user()
+    assert _blocked(client, place["id"]) == []
+    # Writes on another worker never reach this process's cache
+    monkeypatch.setattr(facade, "invalidate_calendar", lambda place_id: None)
+
+    booking_id = _book(app, place["id"], guest["id"], "2030-05-20", "2030-05-22")
+    assert _blocked(client, place["id"]) == [("2030-05-20", "2030-05-22")]
+    with app.app_context():
+        facade.cancel_booking(booking_id, db.session.get(User, guest["id"]))
+    assert _blocked(client, place["id"]) == []
+
+    app.config["BOOKING_HOLD_MINUTES"] = 0.01
+    with app.app_context():
+        facade.create_booking_hold(place["id"], guest["id"], "2030-05-25", "2030-05-27")
+    assert _blocked(client, place["id"]) == [("2030-05-25", "2030-05-27")]
+    # The entry lives no longer than the hold behind it
+    time.sleep(0.7)
+    assert _blocked(client, place["id"]) == []
+
+
+def test_calendar_rejects_bad_windows(client, create_place):
+    place_id = create_place()["place"]["id"]
+    url = f"/api/v1/places/{place_id}/calendar"
+    assert client.get(f"{url}?from=2030-05-10&to=2030-05-01").status_code == 400
+    assert client.get(f"{url}?from=2030-01-01&to=2032-01-01").status_code == 400
+    assert client.get(f"{url}?from=soon").status_code == 400
+    assert client.get("/api/v1/places/missing/calendar").status_code == 404
@@ -0,0 +1,56 @@
+import csv
+import io
+import json
+
+from app.extensions import db
+from app.models.user import User
+
+
+def _make_admin(app, user):
+    with app.app_context():
+        db.session.get(User, user["id"]).is_admin = True
+        db.session.commit()
+    return user
+
+
+def test_export_streams_ndjson_with_amenities(app, client, create_place, create_amenity):
+    created = create_place(title="Export me")
+    place, owner = created["place"], created["owner"]
+    amenity = create_amenity(creator=owner)["amenity"]
+    client.post(f"/api/v1/places/{place['id']}/amenities/{amenity['id']}", headers=owner["headers"])
+    create_place(owner=owner, title="Second")
+    _make_admin(app, owner)
+
+    response = client.get("/api/v1/places/export", headers=owner["headers"])
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    by_title = {row["title"]: row for row in rows}
+    assert set(by_title) == {"Export me", "Second"}
+    assert by_title["Export me"]["amenity_ids"] == [amenity["id"]]
+    assert by_title["Second"]["amenity_ids"] == []
+
+
+def test_export_csv_and_admin_only(app, client, create_place):
+    owner = create_place(title="Csv row")["owner"]
+    assert client.get("/api/v1/places/export", headers=owner["headers"]).status_code == 403
+    _make_admin(app, owner)
+
+    response = client.get("/api/v1/places/export?format=csv", headers=owner["headers"])
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert response.mimetype == "text/csv"
+    assert [row["title"] for row in rows] == ["Csv row"]
+    assert client.get("/api/v1/places/export?format=xml",
+                      headers=owner["headers"]).status_code == 400
+
+
+def test_export_command_writes_file(app, create_place, tmp_path):
+    create_place(title="Cli row")
+    target = tmp_path / "places.ndjson"
+
+    app.test_cli_runner().invoke(args=["places", "export", "--output", str(target),
+                                       "--batch-size", "1"])
+
+    assert json.loads(target.read_text())["title"] == "Cli row"
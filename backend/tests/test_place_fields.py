@@ -0,0 +1,44 @@
+from sqlalchemy import event
+
+from app.extensions import db
+
+
+def test_summary_view_returns_only_summary_fields(client, create_place):
+    create_place()
+
+    body = client.get("/api/v1/places/?view=summary").get_json()
+
+    assert set(body[0]) == {"id", "title", "price", "latitude", "longitude",
+                            "review_count", "avg_rating"}
+
+
+def test_fields_parameter_on_paginated_list(client, create_place):
+    create_place(title="Loft")
+
+    body = client.get("/api/v1/places/?limit=5&fields=title,price").get_json()
+
+    assert body["items"] == [{"id": body["items"][0]["id"], "title": "Loft", "price": 150.0}]
+
+
+def test_projection_skips_unrequested_columns_and_relations(app, client, create_place):
+    create_place()
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement.lower())
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            client.get("/api/v1/places/?fields=title")
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+    place_selects = [s for s in statements if "from places" in s]
+    assert place_selects and "places.description" not in place_selects[0]
+    assert not any("reviews.text" in s or "amenities.name" in s for s in statements)
+
+
+def test_unknown_field_is_rejected(client):
+    response = client.get("/api/v1/places/?fields=title,password")
+    assert response.status_code == 400
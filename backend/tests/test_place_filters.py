@@ -0,0 +1,76 @@
+from app.services import facade
+
+
+def _ids(response):
+    assert response.status_code == 200, response.get_json()
+    return {p["id"] for p in response.get_json()["items"]}
+
+
+def test_price_range_filter(client, create_place, register_user):
+    owner = register_user()
+    cheap = create_place(owner=owner, price=80.0)["place"]
+    mid = create_place(owner=owner, price=200.0)["place"]
+    create_place(owner=owner, price=900.0)
+
+    assert _ids(client.get("/api/v1/places/?min_price=100&max_price=500")) == {mid["id"]}
+    assert _ids(client.get("/api/v1/places/?max_price=100")) == {cheap["id"]}
+
+
+def test_amenity_filter_requires_every_amenity(client, create_place, create_amenity):
+    created = create_place()
+    owner = created["owner"]
+    both = created["place"]
+    only_wifi = create_place(owner=owner)["place"]
+    wifi = create_amenity(creator=owner, name="Wi-Fi")["amenity"]
+    pool = create_amenity(creator=owner, name="Pool")["amenity"]
+    for place, amenity in ((both, wifi), (both, pool), (only_wifi, wifi)):
+        client.post(f"/api/v1/places/{place['id']}/amenities/{amenity['id']}",
+                    headers=owner["headers"])
+
+    found = _ids(client.get(f"/api/v1/places/?amenities={wifi['id']},{pool['id']}"))
+
+    assert found == {both["id"]}
+
+
+def test_date_filter_excludes_overlapping_bookings(app, client, create_place, register_user):
+    owner = register_user()
+    booked = create_place(owner=owner)["place"]
+    free = create_place(owner=owner)["place"]
+    guest = register_user()
+    with app.app_context():
+        facade.create_booking({
+            "place_id": booked["id"], "guest_id": guest["id"],
+            "check_in_date": "2030-05-10", "check_out_date": "2030-05-15",
+        })
+
+    overlapping = _ids(client.get("/api/v1/places/?check_in=2030-05-14&check_out=2030-05-20"))
+    adjacent = _ids(client.get("/api/v1/places/?check_in=2030-05-15&check_out=2030-05-20"))
+
+    assert overlapping == {free["id"]}
+    assert adjacent == {booked["id"], free["id"]}
+
+
+def test_invalid_filters_are_rejected(client):
+    assert client.get("/api/v1/places/?min_price=abc").status_code == 400
+    assert client.get("/api/v1/places/?check_in=2030-05-10").status_code == 400
+    assert client.get("/api/v1/places/?min_price=50&max_price=10").status_code == 400
+
+
+def test_available_endpoint_requires_dates_and_paginates(app, client, create_place, register_user):
+    owner = register_user()
+    booked = create_place(owner=owner)["place"]
+    free = [create_place(owner=owner)["place"]["id"] for _ in range(3)]
+    guest = register_user()
+    with app.app_context():
+        facade.create_booking({
+            "place_id": booked["id"], "guest_id": guest["id"],
+            "check_in_date": "2030-05-10", "check_out_date": "2030-05-15",
+        })
+    url = "/api/v1/places/available?check_in=2030-05-12&check_out=2030-05-13&limit=2"
+
+    first = client.get(url).get_json()
+    second = client.get(f"{url}&cursor={first['next_cursor']}").get_json()
+
+    assert {p["id"] for p in first["items"] + second["items"]} == set(free)
+    assert second["next_cursor"] is None
+    assert client.get("/api/v1/places/available?check_in=2030-05-12").status_code == 400
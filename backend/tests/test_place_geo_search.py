@@ -0,0 +1,127 @@
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, update
+
+from app.extensions import db
+from app.models.place import Place
+from app.utils.geo import NearestIndex, cell_ranges, grid_cell, haversine_km
+
+
+def test_grid_cell_follows_coordinate_updates(app, create_place):
+    place_id = create_place(latitude=48.85, longitude=2.35)["place"]["id"]
+
+    with app.app_context():
+        place = db.session.get(Place, place_id)
+        assert place.grid_cell == grid_cell(48.85, 2.35)
+        place.latitude = -33.86
+        assert place.grid_cell == grid_cell(-33.86, 2.35)
+
+
+def test_cell_ranges_split_at_antimeridian():
+    ranges = cell_ranges(0.0, 179.0, 0.1, -179.0)
+    assert len(ranges) == 2
+
+
+def test_bbox_search_returns_only_places_inside(client, create_place, register_user):
+    owner = register_user()
+    paris = create_place(owner=owner, title="Paris", latitude=48.8566, longitude=2.3522)["place"]
+    create_place(owner=owner, title="Sydney", latitude=-33.8688, longitude=151.2093)
+
+    response = client.get("/api/v1/places/search?bbox=2.0,48.5,2.7,49.0")
+
+    assert response.status_code == 200
+    assert [p["id"] for p in response.get_json()] == [paris["id"]]
+
+
+def test_radius_search_orders_by_distance(client, create_place, register_user):
+    owner = register_user()
+    far = create_place(owner=owner, title="Versailles", latitude=48.8049, longitude=2.1204)["place"]
+    near = create_place(owner=owner, title="Louvre", latitude=48.8606, longitude=2.3376)["place"]
+    create_place(owner=owner, title="Lyon", latitude=45.7640, longitude=4.8357)
+
+    response = client.get("/api/v1/places/search?near=48.8566,2.3522&radius_km=25")
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [p["id"] for p in body] == [near["id"], far["id"]]
+    assert body[0]["distance_km"] < body[1]["distance_km"] <= 25
+
+
+def test_search_requires_a_shape(client):
+    assert client.get("/api/v1/places/search").status_code == 400
+    assert client.get("/api/v1/places/search?bbox=1,2,3").status_code == 400
+
+
+def test_backfill_command_fills_missing_cells(app, create_place):
+    place_id = create_place()["place"]["id"]
+    with app.app_context():
+        db.session.query(Place).update({Place.grid_cell: None})
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["places", "backfill-grid-cells"])
+
+    assert "1 place" in result.output
+    with app.app_context():
+        assert db.session.get(Place, place_id).grid_cell is not None
+
+
+def test_nearby_returns_k_closest_other_places(client, create_place, register_user):
+    owner = register_user()
+    origin = create_place(owner=owner, title="Notre-Dame", latitude=48.853, longitude=2.3499)["place"]
+    louvre = create_place(owner=owner, title="Louvre", latitude=48.8606, longitude=2.3376)["place"]
+    orsay = create_place(owner=owner, title="Orsay", latitude=48.86, longitude=2.3266)["place"]
+    create_place(owner=owner, title="Tokyo", latitude=35.6762, longitude=139.6503)
+
+    response = client.get(f"/api/v1/places/{origin['id']}/nearby?k=2&view=summary")
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [p["id"] for p in body] == [louvre["id"], orsay["id"]]
+    assert body[0]["distance_km"] < body[1]["distance_km"] < 5
+
+
+def test_nearby_widens_search_for_remote_places(client, create_place, register_user):
+    owner = register_user()
+    origin = create_place(owner=owner, title="Paris", latitude=48.8566, longitude=2.3522)["place"]
+    tokyo = create_place(owner=owner, title="Tokyo", latitude=35.6762, longitude=139.6503)["place"]
+
+    body = client.get(f"/api/v1/places/{origin['id']}/nearby?k=5").get_json()
+
+    assert [p["id"] for p in body] == [tokyo["id"]]
+    assert client.get("/api/v1/places/missing/nearby").status_code == 404
+    assert client.get(f"/api/v1/places/{origin['id']}/nearby?k=0").status_code == 400
+
+
+def test_nearest_index_matches_a_brute_force_scan():
+    rng = random.Random(7)
+    points = [(i, rng.gauss(48.85, 0.2), rng.gauss(2.35, 0.2)) for i in range(300)]
+    points += [(300 + i, rng.uniform(-90, 90), rng.uniform(-180, 180)) for i in range(100)]
+    points += [(400, 0.0, 179.99), (401, 0.0, -179.99), (402, 89.99, 0.0)]
+    index = NearestIndex(points)
+    for lat, lon in [(48.85, 2.35), (0.0, 180.0), (0.0, -179.995), (90.0, 0.0), (-45.0, 60.0)]:
+        for k in (1, 10, 50):
+            expected = sorted((haversine_km(lat, lon, p_lat, p_lon), i)
+                              for i, p_lat, p_lon in points if i != 0)[:k]
+            assert index.nearest(lat, lon, k, exclude=0) == expected
+
+
+def test_nearby_follows_writes_made_by_other_workers(app, client, create_place, register_user):
+    owner = register_user()
+    origin = create_place(owner=owner, latitude=48.853, longitude=2.3499)["place"]
+    near = create_place(owner=owner, latitude=48.8606, longitude=2.3376)["place"]
+    far = create_place(owner=owner, latitude=35.6762, longitude=139.6503)["place"]
+    url = f"/api/v1/places/{origin['id']}/nearby?k=1&view=summary"
+    assert client.get(url).get_json()[0]["id"] == near["id"]
+
+    # Committed elsewhere: this worker's index only sees the new marker
+    with app.app_context():
+        db.session.execute(update(Place).where(Place.id == far["id"]).values(
+            latitude=48.854, longitude=2.35, updated_at=datetime.utcnow() + timedelta(seconds=5)))
+        db.session.commit()
+    assert client.get(url).get_json()[0]["id"] == far["id"]
+
+    with app.app_context():
+        db.session.execute(delete(Place).where(Place.id == far["id"]))
+        db.session.commit()
+    assert client.get(url).get_json()[0]["id"] == near["id"]
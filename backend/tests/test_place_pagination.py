@@ -0,0 +1,62 @@
+import base64
+
+
+def _walk(client, limit):
+    ids, cursor, pages = [], None, 0
+    while True:
+        url = f"/api/v1/places/?limit={limit}"
+        if cursor:
+            url += f"&cursor={cursor}"
+        body = client.get(url).get_json()
+        ids.extend(item["id"] for item in body["items"])
+        pages += 1
+        cursor = body["next_cursor"]
+        if not cursor:
+            return ids, pages
+
+
+def test_cursor_pages_cover_every_place_once(client, create_place, register_user):
+    owner = register_user()
+    created = {create_place(owner=owner, title=f"Place {i}")["place"]["id"] for i in range(5)}
+
+    ids, pages = _walk(client, 2)
+
+    assert pages == 3
+    assert len(ids) == len(set(ids))
+    assert set(ids) == created
+
+
+def test_prev_cursor_returns_previous_page(client, create_place, register_user):
+    owner = register_user()
+    for i in range(4):
+        create_place(owner=owner, title=f"Place {i}")
+
+    first = client.get("/api/v1/places/?limit=2").get_json()
+    assert first["prev_cursor"] is None
+    second = client.get(f"/api/v1/places/?limit=2&cursor={first['next_cursor']}").get_json()
+    back = client.get(f"/api/v1/places/?limit=2&cursor={second['prev_cursor']}").get_json()
+
+    assert [p["id"] for p in back["items"]] == [p["id"] for p in first["items"]]
+
+
+def test_limit_is_capped(app, client, create_place):
+    create_place()
+    app.config["PAGE_SIZE_MAX"] = 1
+
+    body = client.get("/api/v1/places/?limit=500").get_json()
+
+    assert body["limit"] == 1
+
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.get("/api/v1/places/?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+
+def test_crafted_cursor_values_are_rejected(client, create_place):
+    create_place()
+    for payload in ('{"k":[[1],[2]],"d":"next"}', '{"k":[{"x":1},null],"d":"next"}',
+                    '{"k":{"a":1,"b":2},"d":"next"}', '{"k":[true,"id"],"d":"next"}'):
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+        response = client.get(f"/api/v1/places/?cursor={cursor}")
+        assert response.status_code == 400, payload
@@ -0,0 +1,59 @@
+from app.extensions import db
+from app.models.place import Place
+
+
+def _post_review(client, reviewer, place_id, rating):
+    response = client.post(
+        "/api/v1/reviews/",
+        headers=reviewer["headers"],
+        json={"text": "Nice", "rating": rating, "place_id": place_id},
+    )
+    assert response.status_code == 201
+    return response.get_json()["id"]
+
+
+def _aggregates(client, place_id):
+    body = client.get("/api/v1/places/?fields=review_count,avg_rating").get_json()
+    return next((p["review_count"], p["avg_rating"]) for p in body if p["id"] == place_id)
+
+
+def test_review_writes_maintain_place_aggregates(client, create_place, register_user):
+    place_id = create_place()["place"]["id"]
+    first, second = register_user(), register_user()
+    assert _aggregates(client, place_id) == (0, None)
+
+    review_id = _post_review(client, first, place_id, 5)
+    _post_review(client, second, place_id, 2)
+    assert _aggregates(client, place_id) == (2, 3.5)
+
+    client.put(f"/api/v1/reviews/{review_id}", headers=first["headers"],
+               json={"text": "Fine", "rating": 3})
+    assert _aggregates(client, place_id) == (2, 2.5)
+
+    client.delete(f"/api/v1/reviews/{review_id}", headers=first["headers"])
+    assert _aggregates(client, place_id) == (1, 2.0)
+
+
+def test_rebuild_command_recomputes_aggregates(app, client, create_place, register_user):
+    place_id = create_place()["place"]["id"]
+    untouched_id = create_place()["place"]["id"]
+    _post_review(client, register_user(), place_id, 4)
+    with app.app_context():
+        # Drift the aggregates without touching updated_at, as a lost update would
+        db.session.query(Place).filter(Place.id == place_id).update(
+            {Place.review_count: 0, Place.rating_sum: 0, Place.avg_rating: None,
+             Place.updated_at: Place.updated_at})
+        db.session.commit()
+        untouched_at = db.session.get(Place, untouched_id).updated_at
+    url = f"/api/v1/places/{place_id}"
+    etag = client.get(url).headers["ETag"]
+
+    result = app.test_cli_runner().invoke(args=["places", "rebuild-ratings"])
+
+    assert result.exit_code == 0
+    assert "for 1 place(s)" in result.output
+    assert _aggregates(client, place_id) == (1, 4.0)
+    # The corrected place is served afresh; places that were right keep their ETags
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+    with app.app_context():
+        assert db.session.get(Place, untouched_id).updated_at == untouched_at
@@ -0,0 +1,70 @@
+from app.extensions import db
+from app.models.place_term import place_terms
+from app.utils.text import tokenize
+
+
+def _search(client, query):
+    response = client.get(f"/api/v1/places/search?{query}")
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_tokenize_drops_markup_stop_words_and_plurals():
+    assert tokenize("<p>The Villas by the <em>sea</em></p>") == ["villa", "sea"]
+
+
+def test_text_search_ranks_title_matches_first(client, create_place, register_user):
+    owner = register_user()
+    in_text = create_place(owner=owner, title="Quiet flat",
+                           description="Walk to the beachfront in minutes")["place"]
+    in_title = create_place(owner=owner, title="Beachfront villa",
+                            description="Sea views")["place"]
+    create_place(owner=owner, title="Mountain cabin", description="Snow and pines")
+
+    body = _search(client, "q=beachfront")
+
+    assert [p["id"] for p in body["items"]] == [in_title["id"], in_text["id"]]
+    assert body["items"][0]["score"] > body["items"][1]["score"]
+
+
+def test_text_search_paginates_with_cursor(client, create_place, register_user):
+    owner = register_user()
+    ids = {create_place(owner=owner, title=f"Loft {i}", description="Loft downtown")["place"]["id"]
+           for i in range(3)}
+
+    first = _search(client, "q=loft&limit=2")
+    second = _search(client, f"q=loft&limit=2&cursor={first['next_cursor']}")
+
+    assert len(first["items"]) == 2 and len(second["items"]) == 1
+    assert second["next_cursor"] is None and second["prev_cursor"]
+    assert {p["id"] for p in first["items"] + second["items"]} == ids
+
+
+def test_text_index_follows_updates_and_deletes(client, create_place):
+    created = create_place(title="Garden studio")
+    place_id, headers = created["place"]["id"], created["owner"]["headers"]
+
+    client.put(f"/api/v1/places/{place_id}", headers=headers,
+               json={"title": "Rooftop studio", "description": "City lights"})
+    assert _search(client, "q=garden")["items"] == []
+    assert [p["id"] for p in _search(client, "q=rooftop")["items"]] == [place_id]
+
+    client.delete(f"/api/v1/places/{place_id}", headers=headers)
+    assert _search(client, "q=rooftop")["items"] == []
+
+
+def test_reindex_command_rebuilds_the_index(app, create_place):
+    create_place(title="Harbour cottage")
+    with app.app_context():
+        db.session.execute(place_terms.delete())
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["places", "reindex-text"])
+
+    assert "Indexed 1 place" in result.output
+    with app.test_client() as client:
+        assert len(_search(client, "q=harbour")["items"]) == 1
+
+
+def test_text_search_rejects_empty_query(client):
+    assert client.get("/api/v1/places/search?q=").status_code == 400